@@ -2,7 +2,7 @@ from fastapi import Depends, HTTPException, status, Request
 from jose import jwt, JWTError
 from sqlmodel import Session
 from app.core.config import settings
-from app.core.db import get_session
+from app.core.db import engine, get_session
 from app.models.base import User, UserRole
 from pydantic import BaseModel
 
@@ -10,7 +10,7 @@ class TokenPayload(BaseModel):
     sub: str = None
     role: str = None
 
-def get_current_user(request: Request, session: Session = Depends(get_session)):
+def _user_from_request(request: Request, session: Session):
     # Allow preflight requests without auth
     if request.method == "OPTIONS":
         return None
@@ -33,12 +33,30 @@ def get_current_user(request: Request, session: Session = Depends(get_session)):
     
     return user
 
+def get_current_user(request: Request, session: Session = Depends(get_session)):
+    return _user_from_request(request, session)
+
+def _check_role(user: User, allowed_roles: list[UserRole]):
+    if user.role not in allowed_roles:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"User does not have sufficient permissions. Required: {[r.value for r in allowed_roles]}"
+        )
+    return user
+
 def RoleChecker(allowed_roles: list[UserRole]):
     def _role_checker(user: User = Depends(get_current_user)):
-        if user.role not in allowed_roles:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"User does not have sufficient permissions. Required: {[r.value for r in allowed_roles]}"
-            )
-        return user
+        return _check_role(user, allowed_roles)
+    return _role_checker
+
+def StreamRoleChecker(allowed_roles: list[UserRole]):
+    """
+    RoleChecker for streaming routes. FastAPI only cleans up a `get_session` dependency
+    once the response has finished, so each open stream would hold a pooled connection;
+    this loads the user in its own session, closed before the route runs.
+    """
+    def _role_checker(request: Request):
+        with Session(engine) as session:
+            user = _user_from_request(request, session)
+        return _check_role(user, allowed_roles)
     return _role_checker
@@ -0,0 +1,86 @@
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import literal, tuple_
+from sqlmodel import Session
+from typing import Any, List, Literal, Optional, Tuple
+from datetime import datetime, timezone
+from uuid import UUID
+import base64
+import json
+from app.core.config import settings
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Timestamps are stored as naive UTC
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def encode_cursor(sort_value: datetime, row_id: UUID) -> str:
+    raw = json.dumps({"v": sort_value.isoformat(), "id": str(row_id)})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return _naive_utc(datetime.fromisoformat(data["v"])), UUID(data["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+class PageParams:
+    """
+    Query parameters of a keyset-paginated listing: `limit` (capped at PAGE_SIZE_MAX),
+    the `cursor` from the previous page's X-Next-Cursor header, an optional [from, to)
+    range on the listing's sort column and the sort `order`.
+    """
+
+    def __init__(
+        self,
+        limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+        cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+        date_from: Optional[datetime] = Query(None, alias="from"),
+        date_to: Optional[datetime] = Query(None, alias="to"),
+        order: Literal["asc", "desc"] = "desc"
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.date_from = _naive_utc(date_from)
+        self.date_to = _naive_utc(date_to)
+        self.order = order
+
+def keyset_statement(statement, sort_column, id_column, page: PageParams):
+    """
+    Applies the page's range, cursor position, order and limit (plus one row, to detect a
+    following page) to `statement`. Ordered by (sort_column, id_column), which is unique
+    and therefore stable under concurrent inserts.
+    """
+    if page.date_from is not None:
+        statement = statement.where(sort_column >= page.date_from)
+    if page.date_to is not None:
+        statement = statement.where(sort_column < page.date_to)
+
+    keys = tuple_(sort_column, id_column)
+    if page.cursor:
+        sort_value, last_id = decode_cursor(page.cursor)
+        position = tuple_(literal(sort_value, sort_column.type), literal(last_id, id_column.type))
+        statement = statement.where(keys < position if page.order == "desc" else keys > position)
+
+    if page.order == "desc":
+        statement = statement.order_by(sort_column.desc(), id_column.desc())
+    else:
+        statement = statement.order_by(sort_column.asc(), id_column.asc())
+    return statement.limit(page.limit + 1)
+
+def keyset_page(session: Session, statement, sort_column, id_column, page: PageParams, response: Response) -> List[Any]:
+    """
+    Returns one page of `statement` (see keyset_statement). The position is carried in an
+    opaque cursor instead of an OFFSET, so every page costs one index range scan however
+    deep it is. Sets X-Next-Cursor when another page follows.
+    """
+    rows = session.exec(keyset_statement(statement, sort_column, id_column, page)).all()
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+    return rows
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlmodel import Session, select
 from app.core.db import get_session
 from app.models.base import Appointment, User, UserRole, AppointmentStatus
 from app.api.deps import get_current_user
+from app.api.pagination import PageParams, keyset_page
 from app.schemas.appointment import AppointmentCreate
 from datetime import datetime, timezone
 from uuid import UUID
@@ -56,16 +57,23 @@ def create_appointment(
 
 @router.get("/me")
 def get_my_appointments(
+    response: Response,
+    page: PageParams = Depends(),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
+    """
+    Lists the caller's appointments (all of them for front desk), ordered by scheduled_at.
+    Paginated: pass the X-Next-Cursor response header back as `cursor`; `from`/`to`
+    filter on scheduled_at.
+    """
     if current_user.role == UserRole.PATIENT:
         statement = select(Appointment).where(Appointment.patient_id == current_user.id)
     elif current_user.role == UserRole.DOCTOR:
         statement = select(Appointment).where(Appointment.doctor_id == current_user.id)
     else:
         statement = select(Appointment)
-    return session.exec(statement).all()
+    return keyset_page(session, statement, Appointment.scheduled_at, Appointment.id, page, response)
 
 @router.patch("/{id}/status")
 def update_status(
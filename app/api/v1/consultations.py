@@ -1,17 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Response, UploadFile, File
 from sqlmodel import Session, select
-from app.core.db import get_session
+from app.core.db import get_session, get_async_session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models.base import Consultation, ConsultationStatus, Appointment, User, UserRole, AudioFile, SOAPNote, AudioUploaderType
 from app.api.deps import get_current_user, RoleChecker
+from app.api.pagination import PageParams, keyset_page
+from app.services.job_queue import JobQueueService
+from app.services.triage_queue import TriageQueueService
+from app.services.storage_service import StorageService, UploadTooLargeError
+from app.core.config import settings
 from pydantic import BaseModel
 from typing import Optional, List, Any
 from uuid import UUID, uuid4
 import os
-import shutil
 
 router = APIRouter()
 
-UPLOAD_DIR = "uploads"
+UPLOAD_DIR = settings.UPLOAD_DIR
 if not os.path.exists(UPLOAD_DIR):
     os.makedirs(UPLOAD_DIR)
 
@@ -64,6 +69,33 @@ def create_consultation(
 
 from sqlalchemy.orm import selectinload
 
+# Must be registered before /{id}, which would otherwise capture "me"
+@router.get("/me", response_model=List[ConsultationRead])
+def get_my_consultations(
+    response: Response,
+    page: PageParams = Depends(),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Lists the caller's consultations (all of them for front desk), ordered by created_at.
+    Paginated: pass the X-Next-Cursor response header back as `cursor`; `from`/`to`
+    filter on created_at. Relationships are loaded for the returned page only.
+    """
+    if current_user.role == UserRole.PATIENT:
+        statement = select(Consultation).where(Consultation.patient_id == current_user.id)
+    elif current_user.role == UserRole.DOCTOR:
+        statement = select(Consultation).where(Consultation.doctor_id == current_user.id)
+    else:
+        statement = select(Consultation)
+        
+    statement = statement.options(
+        selectinload(Consultation.audio_file),
+        selectinload(Consultation.soap_note),
+        selectinload(Consultation.appointment)
+    )
+    return keyset_page(session, statement, Consultation.created_at, Consultation.id, page, response)
+
 @router.get("/{id}", response_model=ConsultationRead) # Returning DB model direct for now, includes relationships
 def get_consultation(
     id: UUID,
@@ -92,51 +124,32 @@ def get_consultation(
          
     return consultation
 
-@router.get("/me", response_model=List[ConsultationRead])
-def get_my_consultations(
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user)
-):
-    if current_user.role == UserRole.PATIENT:
-        statement = select(Consultation).where(Consultation.patient_id == current_user.id)
-    elif current_user.role == UserRole.DOCTOR:
-        statement = select(Consultation).where(Consultation.doctor_id == current_user.id)
-    else:
-        statement = select(Consultation)
-        
-    results = session.exec(
-        statement.options(
-            selectinload(Consultation.audio_file), 
-            selectinload(Consultation.soap_note),
-            selectinload(Consultation.appointment)
-        )
-    ).all()
-    return results
-
 @router.post("/{id}/upload")
 async def upload_audio(
     id: UUID,
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(RoleChecker([UserRole.DOCTOR, UserRole.PATIENT]))
 ):
-    consultation = session.get(Consultation, id)
+    consultation = await session.get(Consultation, id)
     if not consultation:
         raise HTTPException(status_code=404, detail="Consultation not found")
         
     # Validation
     if not file.filename.endswith(('.wav', '.mp3', '.m4a')):
         raise HTTPException(status_code=400, detail="Invalid file format")
+    if file.size is not None and file.size > settings.MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="File too large")
 
-    # Save File
+    # Save File (chunked, off the event loop; size + SHA-256 computed while streaming).
+    # Storage is content-addressed, so a retried upload of the same audio is stored once.
     file_id = uuid4()
     file_ext = os.path.splitext(file.filename)[1]
-    safe_filename = f"{file_id}{file_ext}"
-    file_path = os.path.join(UPLOAD_DIR, safe_filename)
-    
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    try:
+        stored = await StorageService.save_upload_async(file, UPLOAD_DIR, file_ext)
+    except UploadTooLargeError:
+        raise HTTPException(status_code=413, detail="File too large")
+    file_path = stored["path"]
         
     # Create AudioFile Record
     uploader_type = AudioUploaderType.DOCTOR if current_user.role == UserRole.DOCTOR else AudioUploaderType.PATIENT
@@ -146,17 +159,19 @@ async def upload_audio(
         uploaded_by=uploader_type,
         file_name=file.filename,
         file_url=file_path,
+        file_size=stored["file_size"],
+        content_hash=stored["sha256"],
         mime_type=file.content_type
     )
     session.add(audio_file)
     
-    # Update Status
+    # Update Status (a re-upload takes a completed consultation off the dashboard queue)
+    await TriageQueueService.leave_async(session, consultation)
     consultation.status = ConsultationStatus.IN_PROGRESS
     session.add(consultation)
-    session.commit()
-    
-    # Trigger Background Task
-    from app.services.consultation_processor import process_consultation_flow
-    background_tasks.add_task(process_consultation_flow, consultation.id)
 
-    return {"message": "Audio uploaded, processing started", "audio_id": file_id}
+    # Queue for the processing worker (python -m app.worker) in the same transaction
+    job = await JobQueueService.enqueue_async(session, consultation.id)
+    await session.commit()
+
+    return {"message": "Audio uploaded, processing queued", "audio_id": file_id, "job_id": job.id}
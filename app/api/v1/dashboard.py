@@ -1,74 +1,129 @@
-from fastapi import APIRouter, Depends
-from sqlmodel import Session, select
-from typing import List, Dict, Any
-from datetime import datetime
-from app.core.db import get_session
-from app.models.base import Consultation, PatientProfile, ConsultationStatus
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import List, Dict, Any, Optional
+from uuid import UUID
+from app.api.deps import RoleChecker, StreamRoleChecker
+from app.core.config import settings
+from app.core.db import get_async_session, get_session
+from app.models.base import TriageCategory, User, UserRole
+from app.services.cache_service import cache_key
+from app.services.job_queue import JobQueueService
+from app.services.queue_broker import queue_broker
+from app.services.triage_queue import TriageQueueService, dashboard_cache
 
 router = APIRouter()
 
+class QueueFilters:
+    """
+    Query parameters shared by the dashboard queues: optional doctor and triage category
+    filters, and a bounded window (limit / offset) so every poll costs the same however
+    long the history is.
+    """
+
+    def __init__(
+        self,
+        doctor_id: Optional[UUID] = None,
+        triage_category: Optional[TriageCategory] = None,
+        limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+        offset: int = Query(0, ge=0, le=settings.DASHBOARD_MAX_OFFSET)
+    ):
+        self.doctor_id = doctor_id
+        self.triage_category = triage_category
+        self.limit = limit
+        self.offset = offset
+
+    def as_kwargs(self) -> Dict[str, Any]:
+        return {"limit": self.limit, "offset": self.offset, "doctor_id": self.doctor_id, "triage_category": self.triage_category}
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match uses weak comparison: W/"x" matches "x"
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+async def _cached_response(name: str, filters: QueueFilters, if_none_match: Optional[str], load) -> Response:
+    """
+    Serves the rendered queue from dashboard_cache (one query per key per TTL, shared by
+    concurrent requests), or 304 when the client's ETag is current.
+    """
+    etag, body = await dashboard_cache.get_or_load(cache_key(name, filters.as_kwargs()), load)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"} # Clients revalidate every poll
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
 @router.get("/queue/failed", response_model=List[Dict[str, Any]])
-def get_failed_queue(session: Session = Depends(get_session)):
+async def get_failed_queue(
+    filters: QueueFilters = Depends(),
+    if_none_match: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_async_session)
+):
     """
-    Returns patients whose AI processing failed and require manual review.
+    Returns patients whose AI processing failed and require manual review (newest first).
     """
-    query = (
-        select(Consultation, PatientProfile)
-        .join(PatientProfile, Consultation.patient_id == PatientProfile.user_id)
-        .where(Consultation.requires_manual_review == True)
-        .order_by(Consultation.created_at.desc())
-    )
-    results = session.exec(query).all()
-    
-    queue = []
-    for consult, profile in results:
-        # Calculate wait time
-        wait_time = "N/A"
-        if consult.created_at:
-             delta = datetime.utcnow() - consult.created_at
-             minutes = int(delta.total_seconds() / 60)
-             wait_time = f"{minutes} min"
+    async def load():
+        results = (await session.exec(TriageQueueService.failed_query(**filters.as_kwargs()))).all()
+        return [TriageQueueService.failed_item(row) for row in results]
+    return await _cached_response("failed", filters, if_none_match, load)
+
+class ReprocessRequest(BaseModel):
+    consultation_ids: Optional[List[UUID]] = None # Selected consultations...
+    all: bool = False # ...or every consultation in the failed queue
+    limit: Optional[int] = Field(None, ge=1, le=settings.REPROCESS_MAX_BATCH)
+    per_minute: Optional[float] = Field(None, gt=0) # Defaults to REPROCESS_PER_MINUTE
 
-        queue.append({
-            "patient_name": f"{profile.first_name} {profile.last_name}",
-            "consultation_id": str(consult.id),
-            "reason": "AI Processing Failed (Quota/Error)",
-            "wait_time": wait_time,
-            "status": "REQUIRES_REVIEW"
-        })
-    return queue
+@router.post("/queue/failed/reprocess", response_model=Dict[str, Any])
+def reprocess_failed_queue(
+    request: ReprocessRequest,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(RoleChecker([UserRole.DOCTOR, UserRole.FRONT_DESK]))
+):
+    """
+    Re-queues consultations from the manual-review queue for the processing worker,
+    paced at `per_minute` (consultations without audio or already queued are skipped).
+    A stored transcription is reused, so only the failed stages call the providers again.
+    """
+    if not request.all and not request.consultation_ids:
+        raise HTTPException(status_code=400, detail="Pass consultation_ids or set all")
+    jobs = JobQueueService.reprocess(session, None if request.all else request.consultation_ids, request.limit, request.per_minute)
+    queued = [{"consultation_id": job.consultation_id, "job_id": job.id, "available_at": job.available_at} for job in jobs]
+    session.commit()
+    return {"queued": len(queued), "jobs": queued}
 
 @router.get("/queue", response_model=List[Dict[str, Any]])
-def get_patient_queue(session: Session = Depends(get_session)):
+async def get_patient_queue(
+    filters: QueueFilters = Depends(),
+    if_none_match: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_async_session)
+):
     """
-    Returns the prioritized patient queue for the dashboard.
+    Returns a window of the prioritized patient queue for the dashboard.
     Sorting Logic:
     1. Urgency Score (DESC) - Critical patients first.
     2. Wait Time (ASC) - First come first served within same urgency.
     """
-    query = (
-        select(Consultation, PatientProfile)
-        .join(PatientProfile, Consultation.patient_id == PatientProfile.user_id)
-        .where(Consultation.status == ConsultationStatus.COMPLETED)
-        .order_by(Consultation.urgency_score.desc(), Consultation.created_at.asc())
-    )
-    results = session.exec(query).all()
-    
-    queue = []
-    for consultation, patient in results:
-        # Calculate approximate wait time since creation
-        wait_time_min = 0
-        if consultation.created_at:
-            delta = datetime.utcnow() - consultation.created_at
-            wait_time_min = int(delta.total_seconds() / 60)
+    async def load():
+        results = (await session.exec(TriageQueueService.top_query(**filters.as_kwargs()))).all()
+        return [TriageQueueService.queue_item(row) for row in results]
+    return await _cached_response("queue", filters, if_none_match, load)
 
-        queue.append({
-            "consultation_id": str(consultation.id),
-            "patient_name": f"{patient.first_name} {patient.last_name}",
-            "urgency_score": consultation.urgency_score or 0,
-            "triage_category": consultation.triage_category,
-            "wait_time_minutes": wait_time_min,
-            "safety_warnings": len(consultation.safety_warnings) if consultation.safety_warnings else 0
-        })
-    
-    return queue
+@router.get("/queue/stream")
+async def stream_queues(current_user: User = Depends(StreamRoleChecker([UserRole.DOCTOR, UserRole.FRONT_DESK]))):
+    """
+    Server-Sent Events feed of both dashboard queues (top QUEUE_STREAM_LIMIT of each):
+    a `snapshot` event, then `insert`, `reprioritize` and `remove` events as
+    consultations complete, fail or are reprocessed. Apply events in order: `remove`
+    drops the consultation, `insert` / `reprioritize` (re)place `item` at `position`.
+    The stream ends when the client falls too far behind; the client reconnects and
+    receives a fresh snapshot. Requires a doctor or front-desk Authorization header,
+    so browsers need a fetch-based SSE client (EventSource cannot send headers).
+    """
+    return StreamingResponse(
+        queue_broker.stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,104 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import case
+from sqlmodel import Session, select, func
+from typing import Dict, Any, List
+from datetime import datetime, timedelta
+from app.api.deps import RoleChecker
+from app.core.db import get_pool_stats, get_session
+from app.models.base import ProcessingStage, UserRole
+from app.services.stt_service import transcript_cache
+from app.services.llm_service import soap_cache
+from app.services.transcript_poller import transcript_poller
+from app.services.queue_broker import queue_broker
+from app.services.triage_queue import dashboard_cache
+from app.services.executors import get_executor_stats
+from app.services.rate_limiter import get_rate_limit_stats
+
+# Operational data (pool, caches, provider limits, per-consultation stage timings): staff only
+router = APIRouter(dependencies=[Depends(RoleChecker([UserRole.DOCTOR, UserRole.FRONT_DESK]))])
+
+@router.get("/db-pool", response_model=Dict[str, Any])
+def get_db_pool_stats():
+    """
+    Returns live connection pool usage for the worker process that serves the request
+    (checked out, overflow, checkout wait-time histogram). Use it to size DB_POOL_SIZE /
+    DB_MAX_OVERFLOW against the number of uvicorn workers.
+    """
+    return get_pool_stats()
+
+@router.get("/caches", response_model=Dict[str, Any])
+def get_cache_stats():
+    """
+    Returns hit/miss/eviction counters of the provider and dashboard response caches (this process).
+    """
+    return {
+        "transcripts": transcript_cache.stats(),
+        "soap_notes": soap_cache.stats(),
+        "dashboard": dashboard_cache.stats(),
+    }
+
+@router.get("/executors", response_model=Dict[str, Any])
+def get_provider_executor_stats():
+    """
+    Returns queue depth, in-flight calls and queue wait time of the per-provider thread
+    pools (this process). Tune STT_MAX_CONCURRENCY / LLM_MAX_CONCURRENCY against these.
+    """
+    return get_executor_stats()
+
+@router.get("/rate-limits", response_model=Dict[str, Any])
+def get_provider_rate_limit_stats():
+    """
+    Returns per-provider quota pacing counters for this process (requests throttled,
+    total time spent waiting for tokens, 429 penalties applied).
+    """
+    return get_rate_limit_stats()
+
+@router.get("/stt-poller", response_model=Dict[str, Any])
+def get_stt_poller_stats():
+    """
+    Returns the in-flight count and poll/webhook counters of the async-mode transcript
+    poller (meaningful in processes that run consultations).
+    """
+    return transcript_poller.stats()
+
+@router.get("/queue-stream", response_model=Dict[str, Any])
+def get_queue_stream_stats():
+    """
+    Returns open dashboard queue streams and poll/event counters of this process's
+    queue broker.
+    """
+    return queue_broker.stats()
+
+@router.get("/stage-timings", response_model=List[Dict[str, Any]])
+def get_stage_timings(hours: float = Query(24, gt=0), session: Session = Depends(get_session)):
+    """
+    Aggregates recorded pipeline stage latencies over the last `hours`, per stage,
+    provider and model (all processes): count, failures, mean and max latency.
+    """
+    since = datetime.utcnow() - timedelta(hours=hours)
+    rows = session.exec(
+        select(
+            ProcessingStage.stage,
+            ProcessingStage.provider,
+            ProcessingStage.model_version,
+            func.count(),
+            func.sum(case((ProcessingStage.status == "FAIL", 1), else_=0)),
+            func.avg(ProcessingStage.latency_ms),
+            func.max(ProcessingStage.latency_ms)
+        )
+        .where(ProcessingStage.created_at >= since)
+        .group_by(ProcessingStage.stage, ProcessingStage.provider, ProcessingStage.model_version)
+        .order_by(ProcessingStage.stage)
+    ).all()
+    return [
+        {
+            "stage": stage,
+            "provider": provider,
+            "model_version": model_version,
+            "count": count,
+            "failures": failures or 0,
+            "mean_ms": round(mean_ms or 0.0, 1),
+            "max_ms": round(max_ms or 0.0, 1),
+        }
+        for stage, provider, model_version, count, failures, mean_ms, max_ms in rows
+    ]
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.db import get_async_session
+from app.core.config import settings
+from app.models.base import SttCallback
+from pydantic import BaseModel
+from typing import Optional
+import hmac
+
+router = APIRouter()
+
+class AssemblyAICallback(BaseModel):
+    transcript_id: str
+    status: str
+
+@router.post("/assemblyai", status_code=204)
+async def assemblyai_callback(
+    payload: AssemblyAICallback,
+    x_webhook_secret: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Completion webhook for transcripts submitted with STT_MODE="async". Records the
+    callback; the worker's transcript poller picks it up and fetches the result.
+    Refused unless STT_WEBHOOK_SECRET is set (without it transcripts are polled).
+    """
+    if not settings.STT_WEBHOOK_SECRET:
+        raise HTTPException(status_code=404, detail="Webhooks are not enabled")
+    if not hmac.compare_digest(x_webhook_secret or "", settings.STT_WEBHOOK_SECRET):
+        raise HTTPException(status_code=401, detail="Invalid webhook secret")
+
+    await session.merge(SttCallback(transcript_id=payload.transcript_id, status=payload.status))
+    await session.commit()
@@ -7,13 +7,111 @@ class Settings(BaseSettings):
     JWT_SECRET: str
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440
-    ASSEMBLYAI_API_KEY: str
+    ASSEMBLYAI_API_KEY: Optional[str] = None # Only needed with STT_PROVIDER="assemblyai"
     GOOGLE_API_KEY: Optional[str] = None
     GEMINI_API_KEY: Optional[str] = None
     UPLOAD_DIR: str = "uploads"
+    MAX_UPLOAD_BYTES: int = 500 * 1024 * 1024 # ~45 min of uncompressed 44.1kHz stereo WAV
+    UPLOAD_CHUNK_BYTES: int = 1024 * 1024
     CORS_ORIGINS: List[str] = ["*"]
     PORT: int = 8000
 
+    # Database Connection Pool (None = per-dialect default, see app/core/db.py)
+    DB_POOL_SIZE: Optional[int] = None
+    DB_MAX_OVERFLOW: Optional[int] = None
+    DB_POOL_TIMEOUT: Optional[float] = None # Seconds to wait for a free connection
+    DB_POOL_RECYCLE: Optional[int] = None # Seconds before a connection is replaced
+    DB_POOL_PRE_PING: Optional[bool] = None
+    DB_STATEMENT_TIMEOUT_MS: Optional[int] = None
+
+    # Provider Endpoints (None = production; point both at benchmarks/stub_providers.py to run offline)
+    ASSEMBLYAI_BASE_URL: Optional[str] = None
+    ASSEMBLYAI_POLLING_INTERVAL_SECONDS: Optional[float] = None # SDK polling in STT_MODE="blocking"
+    GEMINI_API_ENDPOINT: Optional[str] = None # Switches Gemini to the REST transport
+
+    # Provider Selection ("fake" runs the pipeline offline, see app/services/fake_providers.py)
+    STT_PROVIDER: str = "assemblyai"
+    LLM_PROVIDER: str = "gemini"
+    FAKE_FIXTURES_PATH: str = "fixtures/mock_soap_data.json"
+    FAKE_STT_LATENCY_SECONDS: float = 0.0 # Median latency
+    FAKE_LLM_LATENCY_SECONDS: float = 0.0
+    FAKE_LATENCY_SIGMA: float = 0.0 # Log-normal spread; 0 = fixed latency
+    FAKE_STT_FAILURE_RATE: float = 0.0
+    FAKE_LLM_FAILURE_RATE: float = 0.0
+    FAKE_PROVIDER_SEED: int = 0
+
+    # Provider Concurrency (threads per provider; each STT slot blocks for a full transcription)
+    STT_MAX_CONCURRENCY: int = 8
+    LLM_MAX_CONCURRENCY: int = 8
+
+    # Provider Rate Limits (None = unlimited). Buckets are shared across processes when
+    # RATE_LIMIT_BACKEND="database", or per process with "memory".
+    GEMINI_RPM: Optional[int] = None
+    GEMINI_TPM: Optional[int] = None
+    ASSEMBLYAI_RPM: Optional[int] = None
+    RATE_LIMIT_BACKEND: str = "database"
+    RATE_LIMIT_DEFAULT_PENALTY_SECONDS: float = 60.0 # Pause after a 429 that carries no Retry-After
+
+    # STT Mode: "blocking" holds an STT thread for the whole transcription; "async" submits
+    # the job and waits in one shared polling loop (optionally woken by webhooks).
+    STT_MODE: str = "blocking"
+    STT_POLL_MIN_INTERVAL_SECONDS: float = 1.0
+    STT_POLL_MAX_INTERVAL_SECONDS: float = 15.0
+    STT_POLL_TIMEOUT_SECONDS: float = 3600.0
+    # Webhooks are only requested (and accepted) with a secret; otherwise transcripts are polled
+    STT_WEBHOOK_URL: Optional[str] = None # Public URL of POST /api/v1/webhooks/assemblyai
+    STT_WEBHOOK_SECRET: Optional[str] = None
+
+    # Provider Clients (built once per process, see app/services/provider_clients.py)
+    ASSEMBLYAI_MAX_CONNECTIONS: int = 20
+    PROVIDER_KEEPALIVE_SECONDS: float = 60.0
+    PROVIDER_WARMUP_ON_STARTUP: bool = False # Open DNS/TLS to both providers when a process starts
+
+    # Listing Pagination (keyset; see app/api/pagination.py)
+    PAGE_SIZE_DEFAULT: int = 50
+    PAGE_SIZE_MAX: int = 200
+    DASHBOARD_MAX_OFFSET: int = 1000 # Dashboard queues page with limit/offset; deeper windows are refused
+
+    # Dashboard Response Cache (per process; invalidated by this process's queue changes,
+    # other processes' changes show up within the TTL)
+    DASHBOARD_CACHE_TTL_SECONDS: float = 2.0
+    DASHBOARD_CACHE_MAX_ENTRIES: int = 256
+
+    # Dashboard Queue Stream (GET /api/v1/dashboard/queue/stream; one poll per process, fanned out)
+    QUEUE_STREAM_LIMIT: int = 50 # Items of each queue covered by the stream
+    QUEUE_STREAM_POLL_SECONDS: float = 1.0
+    QUEUE_STREAM_HEARTBEAT_SECONDS: float = 15.0
+    QUEUE_STREAM_BUFFER: int = 256 # Events a slow subscriber may lag before it is disconnected
+
+    # Metrics: a directory shared by all API and worker processes on the host (emptied before
+    # they start) makes /metrics aggregate every process; unset = per-process metrics
+    PROMETHEUS_MULTIPROC_DIR: Optional[str] = None
+
+    # Transcript Cache (keyed by audio hash + STT config fingerprint)
+    TRANSCRIPT_CACHE_ENABLED: bool = True
+    TRANSCRIPT_CACHE_DIR: str = ".cache/transcripts"
+    TRANSCRIPT_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+    TRANSCRIPT_CACHE_MAX_AGE_SECONDS: int = 30 * 24 * 3600
+
+    # SOAP Response Cache (keyed by model + generation config + prompt)
+    SOAP_CACHE_ENABLED: bool = True
+    SOAP_CACHE_MAX_ENTRIES: int = 1024
+    SOAP_CACHE_TTL_SECONDS: int = 24 * 3600
+    SOAP_CACHE_DIR: Optional[str] = None # Set (e.g. ".cache/soap_notes") to enable the on-disk tier
+    SOAP_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+
+    # Processing Worker (python -m app.worker)
+    WORKER_CONCURRENCY: int = 4
+    JOB_LEASE_SECONDS: int = 120
+    JOB_HEARTBEAT_SECONDS: int = 30
+    JOB_POLL_INTERVAL_SECONDS: float = 2.0
+    JOB_MAX_ATTEMPTS: int = 3
+
+    # Manual-Review Reprocessing (POST /api/v1/dashboard/queue/failed/reprocess, python -m app.reprocess).
+    # Jobs are spread out so a large backlog doesn't take every worker slot or burst the provider quota.
+    REPROCESS_PER_MINUTE: float = 10.0
+    REPROCESS_MAX_BATCH: int = 500
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
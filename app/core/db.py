@@ -1,11 +1,208 @@
 from sqlmodel import create_engine, Session, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool, StaticPool
 from app.core.config import settings
+from app.core.metrics import DB_POOL_WAIT, DB_POOL_TIMEOUTS, DB_POOL_CHECKED_OUT
+from typing import Any, Dict, Optional
+import threading
+import time
 
-engine = create_engine(settings.DATABASE_URL, echo=False)
+# Per-dialect pool defaults; any DB_* setting that is not None overrides them.
+# Postgres: sized for a handful of uvicorn workers against the default max_connections=100.
+# SQLite: file DBs serialize writers anyway, so a small pool is enough.
+DIALECT_POOL_DEFAULTS: Dict[str, Dict[str, Any]] = {
+    "postgresql": {
+        "pool_size": 10,
+        "max_overflow": 20,
+        "pool_timeout": 30.0,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+        "statement_timeout_ms": 30000,
+    },
+    "sqlite": {
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_timeout": 30.0,
+        "pool_recycle": -1,
+        "pool_pre_ping": False,
+        "statement_timeout_ms": None, # Mapped to the sqlite3 busy timeout
+    },
+}
+
+class PoolStats:
+    """
+    Thread-safe counters for one pool class: checkouts, timeouts and a
+    histogram of how long callers waited for a connection.
+    """
+    WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+    def __init__(self, name: str):
+        self.name = name # Prometheus "pool" label
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_sum = 0.0
+        self.wait_max = 0.0
+        self.bucket_counts = [0] * (len(self.WAIT_BUCKETS) + 1) # Last bucket is +Inf
+
+    def observe_wait(self, seconds: float, timed_out: bool = False):
+        if timed_out:
+            DB_POOL_TIMEOUTS.labels(self.name).inc()
+        else:
+            DB_POOL_WAIT.labels(self.name).observe(seconds)
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_sum += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            for i, bound in enumerate(self.WAIT_BUCKETS):
+                if seconds <= bound:
+                    self.bucket_counts[i] += 1
+                    break
+            else:
+                self.bucket_counts[-1] += 1
+
+    def snapshot(self, pool) -> Dict[str, Any]:
+        with self._lock:
+            # Cumulative buckets, Prometheus style
+            cumulative, running = {}, 0
+            for bound, count in zip(list(self.WAIT_BUCKETS) + ["+Inf"], self.bucket_counts):
+                running += count
+                cumulative[str(bound)] = running
+            observed = self.checkouts + self.timeouts
+            stats = {
+                "checkouts_total": self.checkouts,
+                "timeouts_total": self.timeouts,
+                "wait_seconds_avg": (self.wait_sum / observed) if observed else 0.0,
+                "wait_seconds_max": self.wait_max,
+                "wait_seconds_histogram": cumulative,
+            }
+        stats.update({
+            "pool_class": type(pool).__name__,
+            "size": pool.size() if hasattr(pool, "size") else None,
+            "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+            "checked_in": pool.checkedin() if hasattr(pool, "checkedin") else None,
+            "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+        })
+        return stats
+
+class _WaitTimingMixin:
+    """
+    Records how long each checkout waited (including overflow connects) into `stats`,
+    and keeps the checked-out gauge current.
+    """
+    stats: PoolStats
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            entry = super()._do_get()
+        except sa_exc.TimeoutError:
+            self.stats.observe_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.observe_wait(time.perf_counter() - start)
+        DB_POOL_CHECKED_OUT.labels(self.stats.name).inc()
+        return entry
+
+    def _do_return_conn(self, record):
+        DB_POOL_CHECKED_OUT.labels(self.stats.name).dec()
+        super()._do_return_conn(record)
+
+class InstrumentedQueuePool(_WaitTimingMixin, QueuePool):
+    stats = PoolStats("sync")
+
+class InstrumentedAsyncQueuePool(_WaitTimingMixin, AsyncAdaptedQueuePool):
+    # Used by the AsyncEngine; counted separately from the sync pool
+    stats = PoolStats("async")
+
+def _setting(name: str, default: Any) -> Any:
+    value = getattr(settings, name)
+    return default if value is None else value
+
+def async_database_url(database_url: str) -> str:
+    """
+    Maps the sync DATABASE_URL onto its async driver (asyncpg / aiosqlite).
+    """
+    url = make_url(database_url)
+    dialect = url.get_backend_name()
+    if dialect == "postgresql":
+        url = url.set(drivername="postgresql+asyncpg")
+    elif dialect == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    return url.render_as_string(hide_password=False)
+
+def engine_options(database_url: str, pool_class=InstrumentedQueuePool, is_async: bool = False) -> Dict[str, Any]:
+    """
+    Builds create_engine() kwargs for the URL's dialect, applying DB_* settings over the defaults.
+    """
+    url = make_url(database_url)
+    dialect = url.get_backend_name()
+    defaults = DIALECT_POOL_DEFAULTS.get(dialect, DIALECT_POOL_DEFAULTS["postgresql"])
+    statement_timeout_ms: Optional[int] = _setting("DB_STATEMENT_TIMEOUT_MS", defaults["statement_timeout_ms"])
+
+    connect_args: Dict[str, Any] = {}
+    if dialect == "sqlite":
+        connect_args["check_same_thread"] = False
+        if statement_timeout_ms:
+            connect_args["timeout"] = statement_timeout_ms / 1000
+        if url.database in (None, "", ":memory:"):
+            # In-memory DBs live and die with a single connection
+            return {"connect_args": connect_args, "poolclass": StaticPool}
+    elif dialect == "postgresql" and statement_timeout_ms:
+        if is_async:
+            connect_args["server_settings"] = {"statement_timeout": str(statement_timeout_ms)} # asyncpg
+        else:
+            connect_args["options"] = f"-c statement_timeout={statement_timeout_ms}"
+
+    return {
+        "poolclass": pool_class,
+        "pool_size": _setting("DB_POOL_SIZE", defaults["pool_size"]),
+        "max_overflow": _setting("DB_MAX_OVERFLOW", defaults["max_overflow"]),
+        "pool_timeout": _setting("DB_POOL_TIMEOUT", defaults["pool_timeout"]),
+        "pool_recycle": _setting("DB_POOL_RECYCLE", defaults["pool_recycle"]),
+        "pool_pre_ping": _setting("DB_POOL_PRE_PING", defaults["pool_pre_ping"]),
+        "connect_args": connect_args,
+    }
+
+engine = create_engine(settings.DATABASE_URL, echo=False, **engine_options(settings.DATABASE_URL))
+
+# Async path for `async def` routes and the processor: DB round-trips no longer block the event loop.
+# Note: an in-memory SQLite URL gives the async engine its own, separate database.
+async_engine = create_async_engine(
+    async_database_url(settings.DATABASE_URL),
+    echo=False,
+    **engine_options(settings.DATABASE_URL, pool_class=InstrumentedAsyncQueuePool, is_async=True)
+)
+
+def get_pool_stats() -> Dict[str, Any]:
+    """
+    Live pool usage for this process (one uvicorn worker).
+    """
+    return {
+        "sync": InstrumentedQueuePool.stats.snapshot(engine.pool),
+        "async": InstrumentedAsyncQueuePool.stats.snapshot(async_engine.sync_engine.pool),
+    }
 
 def init_db():
     # SQLModel.metadata.create_all(engine)  # Disabled to protect existing schema
-    pass
+    # Only create tables that are new to the schema (create_all never alters existing ones)
+    from sqlalchemy import inspect
+    from app.models.base import ProcessingJob, RateLimitBucket, SttCallback, ProcessingStage, TriageQueueEntry
+    from app.services.triage_queue import TriageQueueService
+    new_projection = not inspect(engine).has_table(TriageQueueEntry.__tablename__)
+    SQLModel.metadata.create_all(engine, tables=[ProcessingJob.__table__, RateLimitBucket.__table__, SttCallback.__table__, ProcessingStage.__table__, TriageQueueEntry.__table__])
+    if new_projection:
+        # Fill the dashboard queue projection from existing consultations
+        with Session(engine) as session:
+            TriageQueueService.rebuild(session)
 
 def test_connection():
     from sqlalchemy import text
@@ -16,3 +213,8 @@ def test_connection():
 def get_session():
     with Session(engine) as session:
         yield session
+
+async def get_async_session():
+    # expire_on_commit=False: attribute access after commit must not trigger implicit (sync) IO
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
@@ -0,0 +1,135 @@
+import os
+import time
+from typing import Any, Dict, Optional
+from app.core.config import settings
+
+# prometheus_client picks its value storage when first imported, so the multiprocess
+# directory has to be in the environment before that (it may only be set in .env).
+if settings.PROMETHEUS_MULTIPROC_DIR:
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.PROMETHEUS_MULTIPROC_DIR)
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, CONTENT_TYPE_LATEST, generate_latest, multiprocess
+from prometheus_client.core import GaugeMetricFamily
+from starlette.routing import Match
+
+# Multiprocess mode: every uvicorn worker and app.worker process on the host writes its
+# samples to files in PROMETHEUS_MULTIPROC_DIR and /metrics (served by any one of them)
+# aggregates all of them. The directory must be emptied before the processes start.
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PROVIDER_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests by route template and status", ["method", "route", "status"])
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency by route template", ["method", "route"], buckets=LATENCY_BUCKETS)
+HTTP_IN_PROGRESS = Gauge("http_requests_in_progress", "HTTP requests being served", ["method", "route"], multiprocess_mode="livesum")
+
+PIPELINE_STAGE_LATENCY = Histogram("pipeline_stage_duration_seconds", "Consultation pipeline stage latency", ["stage", "outcome"], buckets=PROVIDER_BUCKETS)
+
+PROVIDER_CALL_LATENCY = Histogram("provider_call_duration_seconds", "Blocking provider SDK call latency by provider pool", ["pool", "outcome"], buckets=PROVIDER_BUCKETS)
+PROVIDER_QUEUE_WAIT = Histogram("provider_queue_wait_seconds", "Time provider calls waited for a pool thread", ["pool"], buckets=LATENCY_BUCKETS)
+PROVIDER_QUEUED = Gauge("provider_calls_queued", "Provider calls waiting for a pool thread", ["pool"], multiprocess_mode="livesum")
+PROVIDER_IN_FLIGHT = Gauge("provider_calls_in_flight", "Provider calls running", ["pool"], multiprocess_mode="livesum")
+
+DB_POOL_WAIT = Histogram("db_pool_checkout_wait_seconds", "Time spent waiting for a pooled DB connection", ["pool"],
+                         buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0))
+DB_POOL_TIMEOUTS = Counter("db_pool_checkout_timeouts_total", "DB connection checkouts that timed out", ["pool"])
+DB_POOL_CHECKED_OUT = Gauge("db_pool_connections_checked_out", "DB connections checked out of the pool", ["pool"], multiprocess_mode="livesum")
+
+QUEUE_STREAM_SUBSCRIBERS = Gauge("dashboard_queue_stream_subscribers", "Open dashboard queue event streams", multiprocess_mode="livesum")
+
+def observe_stage(stage: str, seconds: float, ok: bool) -> None:
+    # Signature of consultation_processor.stage_listeners
+    PIPELINE_STAGE_LATENCY.labels(stage, "success" if ok else "failure").observe(seconds)
+
+class PipelineStateCollector:
+    """
+    Queue and review backlog read from the database at scrape time. The tables are the
+    source of truth for every process, so this is correct however many workers run.
+    """
+
+    def collect(self):
+        from sqlmodel import Session, select, func
+        from app.core.db import engine
+        from app.models.base import ProcessingJob, JobStatus, Consultation
+
+        try:
+            with Session(engine) as session:
+                jobs = dict(session.exec(select(ProcessingJob.status, func.count()).group_by(ProcessingJob.status)).all())
+                review = session.exec(select(func.count()).select_from(Consultation).where(Consultation.requires_manual_review == True)).one()
+        except Exception as e:
+            print(f"Collecting pipeline metrics failed: {e}")
+            return
+
+        job_gauge = GaugeMetricFamily("pipeline_jobs", "Processing jobs by status", labels=["status"])
+        for status in JobStatus:
+            job_gauge.add_metric([status.value], jobs.get(status, 0))
+        yield job_gauge
+        yield GaugeMetricFamily("pipeline_manual_review_consultations", "Consultations flagged for manual review", value=review)
+
+_state_registry = CollectorRegistry()
+_state_registry.register(PipelineStateCollector())
+
+def render_latest() -> bytes:
+    """
+    Prometheus text exposition of this process's metrics (or of all processes in
+    multiprocess mode) plus the database-backed pipeline gauges.
+    """
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry) + generate_latest(_state_registry)
+
+def mark_process_dead(pid: Optional[int] = None) -> None:
+    """
+    Drops this process's live gauges (in-progress, in-flight, checked out) from the
+    multiprocess aggregate. Call on graceful shutdown.
+    """
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+def _route_template(scope: Dict[str, Any]) -> str:
+    # Label by route template ("/api/v1/consultations/{id}"), never the raw path,
+    # so label cardinality stays bounded
+    app = scope.get("app")
+    for route in getattr(app, "routes", []):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "<unmatched>"
+
+class PrometheusMiddleware:
+    """
+    Pure ASGI middleware (no response buffering, safe for streaming responses) that
+    records per-route request counts, latency and in-progress requests.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = _route_template(scope)
+        status = 500
+        in_progress = HTTP_IN_PROGRESS.labels(method, route)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_LATENCY.labels(method, route).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(method, route, str(status)).inc()
+            in_progress.dec()
@@ -1,7 +1,12 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.v1 import auth, users, appointments, consultations, dashboard
+from app.api.v1 import auth, users, appointments, consultations, dashboard, system, webhooks
 from app.core.db import init_db
+from app.core.config import settings
+from app.core.metrics import PrometheusMiddleware, CONTENT_TYPE_LATEST, render_latest, mark_process_dead
+from app.services.provider_clients import ProviderClients
+from app.services.queue_broker import queue_broker
+import asyncio
 
 app = FastAPI()
 
@@ -12,7 +17,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"], # Listing pagination cursor, dashboard revalidation
 )
+app.add_middleware(PrometheusMiddleware)
 
 # Routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Auth"])
@@ -20,7 +27,24 @@ app.include_router(users.router, prefix="/api/v1/users", tags=["Users"])
 app.include_router(appointments.router, prefix="/api/v1/appointments", tags=["Appointments"])
 app.include_router(consultations.router, prefix="/api/v1/consultations", tags=["Consultations"])
 app.include_router(dashboard.router, prefix="/api/v1/dashboard", tags=["Dashboard"])
+app.include_router(system.router, prefix="/api/v1/system", tags=["System"])
+app.include_router(webhooks.router, prefix="/api/v1/webhooks", tags=["Webhooks"])
 
 @app.on_event("startup")
-def startup():
+async def startup():
     init_db()
+    if settings.PROVIDER_WARMUP_ON_STARTUP:
+        # Fire and forget: don't delay readiness on provider round-trips
+        asyncio.get_event_loop().run_in_executor(None, ProviderClients.warm_up)
+
+@app.on_event("shutdown")
+async def shutdown():
+    await queue_broker.close()
+    mark_process_dead()
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """
+    Prometheus scrape endpoint (aggregated over all processes with PROMETHEUS_MULTIPROC_DIR).
+    """
+    return Response(render_latest(), media_type=CONTENT_TYPE_LATEST)
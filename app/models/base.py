@@ -2,6 +2,7 @@ from enum import Enum
 from datetime import datetime
 from typing import List, Optional
 from uuid import UUID, uuid4
+from sqlalchemy import Index, text
 from sqlmodel import Field, SQLModel, Relationship, JSON, Column
 
 class UserRole(str, Enum):
@@ -79,6 +80,12 @@ class DoctorProfile(SQLModel, table=True):
 
 class Appointment(SQLModel, table=True):
     __tablename__ = "appointments"
+    __table_args__ = (
+        # Listings, keyset-paginated on (scheduled_at, id): per doctor, per patient, front desk
+        Index("ix_appointments_doctor_scheduled", "doctor_id", "scheduled_at", "id"),
+        Index("ix_appointments_patient_scheduled", "patient_id", "scheduled_at", "id"),
+        Index("ix_appointments_scheduled", "scheduled_at", "id"),
+    )
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     patient_id: UUID = Field(foreign_key="users.id")
     doctor_id: UUID = Field(foreign_key="users.id")
@@ -115,6 +122,18 @@ class TriageCategory(str, Enum):
 
 class Consultation(SQLModel, table=True):
     __tablename__ = "consultations"
+    __table_args__ = (
+        # Failed queue: partial, so it only holds the few rows flagged for review
+        Index(
+            "ix_consultations_manual_review", "created_at",
+            sqlite_where=text("requires_manual_review = 1"),
+            postgresql_where=text("requires_manual_review")
+        ),
+        # Listings, keyset-paginated on (created_at, id): per doctor, per patient, front desk
+        Index("ix_consultations_doctor_created", "doctor_id", "created_at", "id"),
+        Index("ix_consultations_patient_created", "patient_id", "created_at", "id"),
+        Index("ix_consultations_created", "created_at", "id"),
+    )
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     appointment_id: UUID = Field(foreign_key="appointments.id", unique=True, index=True)
     patient_id: UUID = Field(foreign_key="users.id")
@@ -136,6 +155,26 @@ class Consultation(SQLModel, table=True):
     audio_file: Optional["AudioFile"] = Relationship(back_populates="consultation", sa_relationship_kwargs={"uselist": False})
     soap_note: Optional["SOAPNote"] = Relationship(back_populates="consultation", sa_relationship_kwargs={"uselist": False})
 
+class TriageQueueEntry(SQLModel, table=True):
+    """
+    Dashboard queue projection (see TriageQueueService): one row per COMPLETED
+    consultation, written in the transaction that moves it into or out of COMPLETED.
+    """
+    __tablename__ = "triage_queue_entries"
+    __table_args__ = (
+        # Queue order. Alembic can't compare the DESC element, so it's maintained by hand in migrations.
+        Index("ix_triage_queue_order", text("urgency_score DESC"), "created_at", info={"autogenerate": False}),
+        Index("ix_triage_queue_doctor", "doctor_id", text("urgency_score DESC"), "created_at", info={"autogenerate": False}),
+    )
+    consultation_id: UUID = Field(foreign_key="consultations.id", primary_key=True)
+    patient_id: UUID = Field(foreign_key="users.id")
+    doctor_id: UUID = Field(foreign_key="users.id")
+    urgency_score: int = Field(default=0)
+    triage_category: Optional[TriageCategory] = None
+    safety_warning_count: int = Field(default=0)
+    created_at: datetime # The consultation's, wait times count from it
+    queued_at: datetime = Field(default_factory=datetime.utcnow)
+
 class AudioUploaderType(str, Enum):
     PATIENT = "PATIENT"
     DOCTOR = "DOCTOR"
@@ -151,7 +190,11 @@ class AudioFile(SQLModel, table=True):
     file_size: Optional[int] = None
     duration: Optional[float] = None
     mime_type: Optional[str] = None
+    content_hash: Optional[str] = Field(default=None, index=True) # SHA-256 of the audio bytes (content-addressed storage key)
     transcription: Optional[str] = None # Text field
+    transcription_utterances: Optional[List[dict]] = Field(default=None, sa_column=Column(JSON))
+    transcription_confidence: Optional[float] = None
+    transcription_config: Optional[str] = None # STT config fingerprint the transcription was produced with
     uploaded_at: datetime = Field(default_factory=datetime.utcnow)
 
     consultation: Consultation = Relationship(back_populates="audio_file")
@@ -179,3 +222,53 @@ class AILog(SQLModel, table=True):
     latency_ms: Optional[float] = None
     error_message: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class JobStatus(str, Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    SUCCEEDED = "SUCCEEDED"
+    FAILED = "FAILED"
+
+class ProcessingJob(SQLModel, table=True):
+    __tablename__ = "processing_jobs"
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    consultation_id: UUID = Field(foreign_key="consultations.id", index=True)
+    status: JobStatus = Field(default=JobStatus.QUEUED, index=True)
+    attempts: int = Field(default=0)
+    max_attempts: int = Field(default=3)
+    available_at: datetime = Field(default_factory=datetime.utcnow, index=True) # Earliest time a worker may claim it (retry backoff)
+    lease_owner: Optional[str] = None # Worker id currently holding the job
+    lease_expires_at: Optional[datetime] = None # Job is reclaimable once the lease lapses without a heartbeat
+    heartbeat_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class RateLimitBucket(SQLModel, table=True):
+    __tablename__ = "rate_limit_buckets"
+    name: str = Field(primary_key=True) # e.g. "gemini:rpm"
+    tokens: float # May go negative: callers reserve ahead and sleep off the deficit
+    updated_at: float # Epoch seconds of the last refill
+    blocked_until: float = Field(default=0.0) # Epoch seconds; set from provider Retry-After hints
+    version: int = Field(default=0) # Optimistic concurrency: every write bumps it
+
+class SttCallback(SQLModel, table=True):
+    __tablename__ = "stt_callbacks"
+    transcript_id: str = Field(primary_key=True) # Provider transcript id from the webhook payload
+    status: str
+    received_at: datetime = Field(default_factory=datetime.utcnow)
+
+class ProcessingStage(SQLModel, table=True):
+    __tablename__ = "processing_stages"
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    consultation_id: UUID = Field(foreign_key="consultations.id", index=True)
+    run_id: UUID = Field(index=True) # One process_consultation_flow call (job attempt)
+    stage: str # queue_wait, start, stt, save_transcript, llm, triage_safety, complete, fail
+    status: str # SUCCESS, FAIL, REUSED
+    latency_ms: float
+    provider: Optional[str] = None # e.g. assemblyai, gemini, fake
+    model_version: Optional[str] = None
+    audio_duration_seconds: Optional[float] = None
+    audio_bytes: Optional[int] = None
+    error_message: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
@@ -0,0 +1,52 @@
+"""
+Re-queues consultations from the manual-review queue (e.g. after a provider quota outage).
+
+Usage:
+    python -m app.reprocess --all                      # every flagged consultation (up to REPROCESS_MAX_BATCH)
+    python -m app.reprocess <consultation_id> ...      # selected ones
+    python -m app.reprocess --all --per-minute 30 --dry-run
+
+Jobs go through the same `processing_jobs` queue as uploads and are run by the
+processing workers (python -m app.worker), paced at --per-minute so new uploads are
+not stuck behind the backlog. Stages that already succeeded (a stored transcription)
+are not repeated.
+"""
+import argparse
+from uuid import UUID
+from sqlmodel import Session
+from app.core.config import settings
+from app.core.db import engine
+from app.services.job_queue import JobQueueService
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-queue consultations flagged for manual review")
+    parser.add_argument("consultation_ids", nargs="*", type=UUID, help="Consultations to re-queue")
+    parser.add_argument("--all", action="store_true", help="Re-queue every flagged consultation")
+    parser.add_argument("--limit", type=int, default=None, help=f"At most this many (max {settings.REPROCESS_MAX_BATCH})")
+    parser.add_argument("--per-minute", type=float, default=settings.REPROCESS_PER_MINUTE, help="Jobs made claimable per minute")
+    parser.add_argument("--dry-run", action="store_true", help="List the consultations without queueing them")
+    args = parser.parse_args()
+    if not args.all and not args.consultation_ids:
+        parser.error("pass consultation ids or --all")
+    if args.per_minute <= 0:
+        parser.error("--per-minute must be positive")
+
+    consultation_ids = None if args.all else args.consultation_ids
+    with Session(engine) as session:
+        if args.dry_run:
+            consultations = session.exec(JobQueueService.reprocessable_query(consultation_ids, args.limit)).all()
+            for consultation in consultations:
+                print(f"{consultation.id}  created {consultation.created_at:%Y-%m-%d %H:%M}")
+            print(f"{len(consultations)} consultation(s) would be re-queued")
+            return
+
+        jobs = JobQueueService.reprocess(session, consultation_ids, args.limit, args.per_minute)
+        queued = [(job.consultation_id, job.available_at) for job in jobs]
+        session.commit()
+
+    for consultation_id, available_at in queued:
+        print(f"{consultation_id}  claimable from {available_at:%H:%M:%S} UTC")
+    print(f"Re-queued {len(queued)} consultation(s) at {args.per_minute:g}/min")
+
+if __name__ == "__main__":
+    main()
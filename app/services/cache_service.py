@@ -0,0 +1,312 @@
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+
+def cache_key(*parts: Any) -> str:
+    """
+    Stable SHA-256 key over JSON-serialisable parts.
+    """
+    canonical = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class DiskCache:
+    """
+    Persistent JSON cache on local disk, shared by every process pointed at `directory`.
+
+    - Entries live at `<directory>/<key[:2]>/<key>.json` and are written atomically.
+    - Age eviction: entries older than `max_age_seconds` (since written) are misses and get deleted.
+    - Size eviction: once the directory exceeds `max_bytes`, least recently used entries
+      (by mtime, refreshed on every hit) are removed first.
+    Methods do blocking file IO; call them from async code via an executor.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, max_age_seconds: int, name: str = "cache"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._approx_bytes: Optional[int] = None # Lazily measured, then tracked on writes
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        if time.time() - entry.get("created_at", 0) > self.max_age_seconds:
+            self._remove(path)
+            with self._lock:
+                self.misses += 1
+                self.evictions += 1
+            return None
+
+        try:
+            os.utime(path, None) # Mark as recently used
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return entry["value"]
+
+    def set(self, key: str, value: Any) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        payload = json.dumps({"created_at": time.time(), "value": value})
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._approx_bytes is None:
+                self._approx_bytes = self._measure()
+            else:
+                self._approx_bytes += len(payload)
+            over_limit = self._approx_bytes > self.max_bytes
+        if over_limit:
+            self.evict()
+
+    def _remove(self, path: str) -> int:
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            return size
+        except FileNotFoundError:
+            return 0
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for file_name in files:
+                if file_name.endswith(".json"):
+                    path = os.path.join(root, file_name)
+                    try:
+                        st = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    yield path, st.st_size, st.st_mtime
+
+    def _measure(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self) -> int:
+        """
+        Drops expired entries, then least recently used ones until under 90% of max_bytes.
+        Returns the number of entries removed.
+        """
+        entries = sorted(self._entries(), key=lambda e: e[2]) # Oldest access first
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        # mtime >= created_at, so an entry idle past the cutoff is certainly expired;
+        # recently-read expired entries are caught by get()
+        cutoff = time.time() - self.max_age_seconds
+        removed = 0
+        for path, size, mtime in entries:
+            if total <= target and mtime >= cutoff:
+                continue
+            total -= self._remove(path)
+            removed += 1
+
+        with self._lock:
+            self.evictions += removed
+            self._approx_bytes = total
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+                "evictions": self.evictions,
+                "approx_bytes": self._approx_bytes,
+            }
+
+class MemoryLRUCache:
+    """
+    In-process LRU cache with a per-entry TTL. Values are deep-copied on the way in
+    and out so callers can't mutate cached entries.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, name: str = "cache"):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict() # key -> (expires_at, value)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if time.monotonic() > expires_at:
+                del self._entries[key]
+                self.misses += 1
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+            }
+
+class TieredCache:
+    """
+    Memory tier in front of an optional DiskCache tier. Disk hits are promoted to memory.
+    """
+
+    def __init__(self, memory: MemoryLRUCache, disk: Optional[DiskCache] = None):
+        self.memory = memory
+        self.disk = disk
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is not None or self.disk is None:
+            return value
+        value = await asyncio.get_event_loop().run_in_executor(None, self.disk.get, key)
+        if value is not None:
+            self.memory.set(key, value)
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        self.memory.set(key, value)
+        if self.disk is not None:
+            await asyncio.get_event_loop().run_in_executor(None, self.disk.set, key, value)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "memory": self.memory.stats(),
+            "disk": self.disk.stats() if self.disk else None,
+        }
+
+class ResponseCache:
+    """
+    Short-TTL cache of rendered JSON responses with strong ETags (SHA-256 of the body).
+
+    Loads are single-flight: while one request loads a key, concurrent requests for the
+    same key await that load instead of running the query themselves. `invalidate()`
+    drops every entry, and a load that was already running when it was called is not
+    cached, so state changes made by this process show up on the next request. Changes
+    made by other processes show up within `ttl_seconds`.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, name: str = "responses"):
+        self.memory = MemoryLRUCache(max_entries, ttl_seconds, name=name)
+        self.loads = 0
+        self.coalesced = 0
+        self.invalidations = 0
+        self._generation = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _bind(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._inflight: Dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def render(value: Any) -> Tuple[str, bytes]:
+        body = json.dumps(value, default=str, separators=(",", ":")).encode("utf-8")
+        return f'"{hashlib.sha256(body).hexdigest()}"', body
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Tuple[str, bytes]:
+        """
+        Returns (etag, JSON body) for `key`, calling `loader` on a miss.
+        """
+        cached = self.memory.get(key)
+        if cached is not None:
+            return cached
+
+        self._bind()
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise # This request was cancelled, not the load
+                # The loading request went away; load for ourselves
+
+        future = self._loop.create_future()
+        self._inflight[key] = future
+        generation = self._generation
+        try:
+            self.loads += 1
+            entry = self.render(await loader())
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception() # Retrieved: followers re-raise it, no "never retrieved" warning
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+        if generation == self._generation:
+            self.memory.set(key, entry)
+        future.set_result(entry)
+        return entry
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self.invalidations += 1
+        self.memory.clear()
+        if self._loop is not None:
+            self._inflight.clear() # Later requests must not join a load that predates the change
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.memory.stats(),
+            "loads": self.loads,
+            "coalesced": self.coalesced,
+            "invalidations": self.invalidations,
+        }
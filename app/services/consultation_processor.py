@@ -1,142 +1,332 @@
-from sqlmodel import Session, select
-from app.core.db import engine
-from app.models.base import Consultation, ConsultationStatus, AudioFile, SOAPNote, PatientProfile, AILog
-from app.services.stt_service import AssemblyAIService
-from app.services.llm_service import GeminiService
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.db import async_engine
+from app.core.metrics import observe_stage
+from app.models.base import Consultation, ConsultationStatus, AudioFile, SOAPNote, PatientProfile, AILog, ProcessingStage
+from app.services.providers import get_stt_provider, get_llm_provider
 from app.services.triage_service import TriageService
 from app.services.safety_service import SafetyService
-from uuid import UUID
+from app.services.triage_queue import TriageQueueService
+from typing import Optional, Dict, Any, Callable, List
+from contextlib import asynccontextmanager
+from datetime import datetime
+from uuid import UUID, uuid4
 import asyncio
 import time
 
-async def process_consultation_flow(consultation_id: UUID):
+# Each stage below opens its own short-lived AsyncSession. No session (and therefore no pooled
+# connection) is held while awaiting the STT or LLM providers, which take minutes, and no
+# DB round-trip blocks the event loop.
+
+def _session() -> AsyncSession:
+    return AsyncSession(async_engine, expire_on_commit=False)
+
+# Called as listener(stage, seconds, ok) after each pipeline stage (benchmarks, metrics)
+stage_listeners: List[Callable[[str, float, bool], None]] = [observe_stage]
+
+@asynccontextmanager
+async def _stage(name: str, stages: Optional[List[Dict[str, Any]]] = None, **fields):
     """
-    Orchestrates the AI processing flow:
-    1. Transcribe Audio (AssemblyAI)
-    2. Generate SOAP Note (Gemini)
-    3. Update Database
+    Times a pipeline stage and notifies stage_listeners. With `stages`, also appends a
+    ProcessingStage record built from `fields`, the timing and the outcome; the body may
+    add fields (e.g. audio duration) to the yielded dict.
     """
-    print(f"Starting processing for consultation {consultation_id}")
-    
-    # We use a new session per background task execution
-    with Session(engine) as session:
-        consultation = session.get(Consultation, consultation_id)
+    record = dict(fields)
+    start = time.perf_counter()
+    ok = False
+    try:
+        yield record
+        ok = True
+    except Exception as e:
+        record["error_message"] = str(e)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        for listener in stage_listeners:
+            listener(name, elapsed, ok)
+        if stages is not None:
+            stages.append({"stage": name, "status": "SUCCESS" if ok else "FAIL", "latency_ms": elapsed * 1000, **record})
+
+def _build_patient_context(patient_profile: Optional[PatientProfile]) -> Dict[str, Any]:
+    if not patient_profile:
+        return {}
+
+    # Calculate Age (Rough approx is fine for now)
+    age = "N/A"
+    if patient_profile.date_of_birth:
+        today = datetime.now()
+        dob = patient_profile.date_of_birth
+        age = today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
+
+    return {
+        "first_name": patient_profile.first_name,
+        "last_name": patient_profile.last_name,
+        "age": age,
+        "gender": patient_profile.gender,
+        "notes": f"Address: {patient_profile.city}, {patient_profile.state}" # Add more history if available in DB
+    }
+
+async def _start_processing(consultation_id: UUID) -> Optional[Dict[str, Any]]:
+    """
+    Stage 1: Mark the consultation IN_PROGRESS and snapshot everything the
+    provider calls need as plain values.
+    """
+    async with _session() as session:
+        consultation = await session.get(Consultation, consultation_id)
         if not consultation:
             print(f"Consultation {consultation_id} not found.")
-            return
-        
-        # 1. Update Status: Transcribing
+            return None
+
+        await TriageQueueService.leave_async(session, consultation) # Reprocessing a completed consultation
         consultation.status = ConsultationStatus.IN_PROGRESS
         session.add(consultation)
-        session.commit()
-        
-        # 2. Get Audio File
-        audio_file = session.exec(select(AudioFile).where(AudioFile.consultation_id == consultation_id)).first()
+        await session.commit()
+
+        audio_file = (await session.exec(select(AudioFile).where(AudioFile.consultation_id == consultation_id))).first()
         if not audio_file:
             print("Audio file missing.")
             # We treat this as a failure state, but keep it in IN_PROGRESS or move to CANCELLED?
             # For now, let's leave it but log it.
-            return
+            return None
 
-        # Fetch Patient Context
-        patient_profile = session.exec(select(PatientProfile).where(PatientProfile.user_id == consultation.patient_id)).first()
-        patient_context = {}
-        if patient_profile:
-            # Calculate Age (Rough approx is fine for now)
-            age = "N/A"
-            if patient_profile.date_of_birth:
-                from datetime import datetime
-                today = datetime.now()
-                dob = patient_profile.date_of_birth
-                age = today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
-            
-            patient_context = {
-                "first_name": patient_profile.first_name,
-                "last_name": patient_profile.last_name,
-                "age": age,
-                "gender": patient_profile.gender,
-                "notes": f"Address: {patient_profile.city}, {patient_profile.state}" # Add more history if available in DB
-            }
+        patient_profile = (await session.exec(select(PatientProfile).where(PatientProfile.user_id == consultation.patient_id))).first()
+        stt_config = get_stt_provider().config_fingerprint()
+        return {
+            "audio_file_id": audio_file.id,
+            "file_url": audio_file.file_url,
+            "content_hash": audio_file.content_hash,
+            "audio_bytes": audio_file.file_size,
+            "stt_config": stt_config,
+            "stored_transcript": await _find_stored_transcript(session, audio_file, stt_config),
+            "patient_context": _build_patient_context(patient_profile)
+        }
 
-        try:
-            # 3. Transcribe (AssemblyAI)
-            print("Starting transcription...")
-            transcript_result = await AssemblyAIService.transcribe_audio_async(audio_file.file_url)
-            transcript_text = transcript_result["text"]
-            utterances = transcript_result.get("utterances", [])
-            
-            # Update AudioFile with transcription
-            audio_file.transcription = transcript_text
-            session.add(audio_file)
-            session.commit() # Commit intermediate progress
-            print("Transcription complete.")
-            
-            # 4. Generate SOAP (Gemini) - ENABLED
-            print("Generating SOAP note...")
-            start_time = time.time()
-            try:
-                soap_data = await GeminiService.generate_soap_note_async(transcript_text, utterances, patient_context)
-                latency = (time.time() - start_time) * 1000
-                
-                # Log Success
-                session.add(AILog(
-                    consultation_id=consultation.id,
-                    model_version="gemini-2.0-flash",
-                    status="SUCCESS",
-                    latency_ms=latency
-                ))
-            except Exception as llm_error:
-                # Log LLM Failure but allow flow to fail gracefully if needed (here we catch to log, then re-raise or handle)
-                session.add(AILog(
-                    consultation_id=consultation.id,
-                    model_version="gemini-2.0-flash",
-                    status="FAIL",
-                    error_message=str(llm_error)
-                ))
-                raise llm_error
-
-            soap_content = soap_data.get("soap_note", {})
-            risk_flags = soap_data.get("risk_flags", [])
-            
-            # 5. Create SOAP Note Record
-            soap_note = SOAPNote(
-                consultation_id=consultation.id,
-                soap_json=soap_content,
-                risk_flags={"flags": risk_flags}, # Wrap in dict as risk_flags is JSON type
-                confidence=transcript_result.get("confidence"), # Use STT confidence as proxy or from LLM if available
-                generated_by_ai=True
-            )
-            session.add(soap_note)
-            
-            # --- NEW: Phase 2 Logic ---
-            # 5a. Triage Analysis
+async def _find_stored_transcript(session: AsyncSession, audio_file: AudioFile, stt_config: str) -> Optional[Dict[str, Any]]:
+    """
+    Returns a transcript of identical audio produced with the same STT config, if one exists:
+    either this file's own (reprocessing) or another upload with the same content hash.
+    """
+    source = None
+    if audio_file.transcription is not None and audio_file.transcription_config == stt_config:
+        source = audio_file
+    elif audio_file.content_hash:
+        source = (await session.exec(
+            select(AudioFile)
+            .where(AudioFile.content_hash == audio_file.content_hash)
+            .where(AudioFile.transcription_config == stt_config)
+            .where(AudioFile.transcription != None)
+            .order_by(AudioFile.uploaded_at.desc())
+        )).first()
+    if source is None:
+        return None
+
+    return {
+        "text": source.transcription,
+        "utterances": source.transcription_utterances or [],
+        "confidence": source.transcription_confidence,
+        "audio_duration": source.duration,
+        "reused_from": source.id
+    }
+
+async def _save_transcription(audio_file_id: UUID, transcript_result: Dict[str, Any], stt_config: str) -> None:
+    """
+    Stage 2: Persist the transcription (with utterances, so it can be reused) as intermediate progress.
+    """
+    async with _session() as session:
+        audio_file = await session.get(AudioFile, audio_file_id)
+        audio_file.transcription = transcript_result["text"]
+        audio_file.transcription_utterances = transcript_result.get("utterances", [])
+        audio_file.transcription_confidence = transcript_result.get("confidence")
+        audio_file.transcription_config = stt_config
+        if transcript_result.get("audio_duration") is not None:
+            audio_file.duration = transcript_result["audio_duration"]
+        session.add(audio_file)
+        await session.commit()
+
+async def _complete_processing(
+    consultation_id: UUID,
+    soap_data: Dict[str, Any],
+    confidence: Optional[float],
+    latency: float,
+    model_version: str,
+    stages: List[Dict[str, Any]]
+) -> None:
+    """
+    Stage 3: Store the SOAP note, run Triage & Safety, mark the consultation COMPLETED and
+    add it to the dashboard queue in a single transaction. A note left by an earlier run
+    (reprocessing) is overwritten.
+    """
+    async with _session() as session:
+        consultation, soap_note = (await session.exec(
+            select(Consultation, SOAPNote)
+            .outerjoin(SOAPNote, SOAPNote.consultation_id == Consultation.id)
+            .where(Consultation.id == consultation_id)
+        )).one()
+        patient_profile = (await session.exec(select(PatientProfile).where(PatientProfile.user_id == consultation.patient_id))).first()
+
+        # Log Success
+        session.add(AILog(
+            consultation_id=consultation.id,
+            model_version=model_version,
+            status="SUCCESS",
+            latency_ms=latency
+        ))
+
+        soap_content = soap_data.get("soap_note", {})
+        risk_flags = soap_data.get("risk_flags", [])
+
+        # Create (or replace) the SOAP Note Record
+        if soap_note is None:
+            soap_note = SOAPNote(consultation_id=consultation.id)
+        soap_note.soap_json = soap_content
+        soap_note.risk_flags = {"flags": risk_flags} # Wrap in dict as risk_flags is JSON type
+        soap_note.confidence = confidence # Use STT confidence as proxy or from LLM if available
+        soap_note.generated_by_ai = True
+        soap_note.reviewed_by_doctor = False
+        soap_note.updated_at = datetime.utcnow()
+        session.add(soap_note)
+
+        # --- Phase 2 Logic ---
+        async with _stage("triage_safety", stages):
+            # Triage Analysis
             if patient_profile:
                 urgency, category = TriageService.calculate_urgency(soap_note, patient_profile)
                 consultation.urgency_score = urgency
                 consultation.triage_category = category
                 print(f"Triage Result: {category} (Score: {urgency})")
-            
-            # 5b. Safety Checks
+
+            # Safety Checks
             if patient_profile:
                 warnings = SafetyService.check_drug_interactions(soap_note, patient_profile)
                 consultation.safety_warnings = warnings
                 if warnings:
                     print(f"Safety Warnings Found: {len(warnings)}")
 
-            # 6. Update Final Status
-            consultation.status = ConsultationStatus.COMPLETED
-            session.add(consultation)
-            session.commit()
-            
-            print(f"Processing successfully completed for {consultation_id}")
-            
+        # Update Final Status
+        consultation.status = ConsultationStatus.COMPLETED
+        consultation.requires_manual_review = False # Off the failed queue if it was flagged meanwhile
+        session.add(consultation)
+        await TriageQueueService.enter_async(session, consultation)
+        await session.commit()
+
+async def _fail_processing(
+    consultation_id: UUID,
+    llm_error: Optional[Exception] = None,
+    model_version: Optional[str] = None,
+    flag_for_review: bool = True
+) -> None:
+    """
+    Logs an LLM failure and, with `flag_for_review`, marks the consultation FAILED for
+    manual review. Without it the consultation stays IN_PROGRESS for the job's retry.
+    """
+    if llm_error is None and not flag_for_review:
+        return
+    async with _session() as session:
+        if llm_error is not None:
+            # Log LLM Failure alongside the failed status
+            session.add(AILog(
+                consultation_id=consultation_id,
+                model_version=model_version,
+                status="FAIL",
+                error_message=str(llm_error)
+            ))
+        if not flag_for_review:
+            await session.commit()
+            return
+        # Set status to FAILED so we can track errors in DB
+        consultation = await session.get(Consultation, consultation_id)
+        await TriageQueueService.leave_async(session, consultation)
+        consultation.status = ConsultationStatus.FAILED
+        consultation.requires_manual_review = True # Flag for Manual Intervention
+        session.add(consultation)
+        await session.commit()
+
+async def _record_stages(consultation_id: UUID, run_id: UUID, stages: List[Dict[str, Any]]) -> None:
+    """
+    Persists the run's stage timings in one insert. Best effort: timing must never
+    change a consultation's outcome.
+    """
+    if not stages:
+        return
+    try:
+        async with _session() as session:
+            session.add_all([ProcessingStage(consultation_id=consultation_id, run_id=run_id, **stage) for stage in stages])
+            await session.commit()
+    except Exception as e:
+        print(f"Recording stage timings for {consultation_id} failed: {e}")
+
+async def process_consultation_flow(consultation_id: UUID, queued_at: Optional[datetime] = None, raise_errors: bool = False):
+    """
+    Orchestrates the AI processing flow:
+    1. Transcribe Audio (settings.STT_PROVIDER, AssemblyAI by default)
+    2. Generate SOAP Note (settings.LLM_PROVIDER, Gemini by default)
+    3. Update Database
+
+    Each stage's latency and outcome (with provider/model, audio duration and size) is
+    stored in `processing_stages` under one run id; `queued_at` (when the job became
+    claimable) adds the queue wait.
+
+    A failed run marks the consultation FAILED for manual review. With `raise_errors`
+    (the worker) the error is re-raised instead and the consultation stays IN_PROGRESS,
+    so JobQueueService.fail decides between a retry and the manual-review flag.
+    """
+    print(f"Starting processing for consultation {consultation_id}")
+    run_id = uuid4()
+    stages: List[Dict[str, Any]] = []
+    if queued_at is not None:
+        stages.append({"stage": "queue_wait", "status": "SUCCESS", "latency_ms": max(0.0, (datetime.utcnow() - queued_at).total_seconds() * 1000)})
+
+    async with _stage("start", stages):
+        context = await _start_processing(consultation_id)
+    if context is None:
+        return
+
+    llm_error = None
+    model_version = None
+    try:
+        # Transcribe, unless identical audio was already transcribed with this config
+        stt = get_stt_provider()
+        transcript_result = context["stored_transcript"]
+        if transcript_result is not None:
+            print(f"Reusing stored transcription from audio file {transcript_result['reused_from']}.")
+            stages.append({
+                "stage": "stt", "status": "REUSED", "latency_ms": 0.0, "provider": stt.name,
+                "audio_bytes": context["audio_bytes"], "audio_duration_seconds": transcript_result.get("audio_duration")
+            })
+        else:
+            print("Starting transcription...")
+            async with _stage("stt", stages, provider=stt.name, audio_bytes=context["audio_bytes"]) as record:
+                transcript_result = await stt.transcribe_audio_async(context["file_url"], audio_hash=context["content_hash"])
+                record["audio_duration_seconds"] = transcript_result.get("audio_duration")
+            print("Transcription complete.")
+
+        if transcript_result.get("reused_from") != context["audio_file_id"]:
+            async with _stage("save_transcript", stages):
+                await _save_transcription(context["audio_file_id"], transcript_result, context["stt_config"])
+        transcript_text = transcript_result["text"]
+        utterances = transcript_result.get("utterances", [])
+
+        # Generate SOAP
+        print("Generating SOAP note...")
+        llm = get_llm_provider()
+        model_version = llm.MODEL_NAME
+        try:
+            async with _stage("llm", stages, provider=llm.name, model_version=model_version):
+                soap_data = await llm.generate_soap_note_async(transcript_text, utterances, context["patient_context"])
         except Exception as e:
-            print(f"Processing failed: {e}")
-            # Set status to FAILED so we can track errors in DB
-            consultation.status = ConsultationStatus.FAILED
-            consultation.requires_manual_review = True # Flag for Manual Intervention
-            
-            # Log General Failure if not logged by LLM block
-            session.add(consultation)
-            session.commit()
+            llm_error = e
+            raise
+        latency = stages[-1]["latency_ms"]
+
+        async with _stage("complete", stages):
+            await _complete_processing(consultation_id, soap_data, transcript_result.get("confidence"), latency, model_version, stages)
+        print(f"Processing successfully completed for {consultation_id}")
 
+    except Exception as e:
+        print(f"Processing failed: {e}")
+        async with _stage("fail", stages):
+            await _fail_processing(consultation_id, llm_error, model_version, flag_for_review=not raise_errors)
+        if raise_errors:
+            raise
+    finally:
+        await _record_stages(consultation_id, run_id, stages)
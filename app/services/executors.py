@@ -0,0 +1,111 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+import asyncio
+import functools
+import threading
+import time
+from app.core.config import settings
+from app.core.metrics import PROVIDER_CALL_LATENCY, PROVIDER_QUEUE_WAIT, PROVIDER_QUEUED, PROVIDER_IN_FLIGHT
+
+class BoundedExecutor:
+    """
+    Named thread pool for blocking provider SDK calls.
+
+    `max_workers` is the provider concurrency cap: at most that many calls are in flight,
+    the rest wait in the pool's queue. Queue depth and queue wait time are tracked so the
+    cap can be tuned (a steadily growing wait means the provider capacity is the bottleneck).
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-provider")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.peak_queued = 0
+        self.wait_sum = 0.0
+        self.wait_max = 0.0
+
+    def _dequeue(self) -> None:
+        # Caller holds self._lock
+        self.queued -= 1
+        PROVIDER_QUEUED.labels(self.name).dec()
+
+    def _call(self, submitted_at: float, state: Dict[str, bool], fn: Callable[..., Any]) -> Any:
+        started = time.perf_counter()
+        waited = started - submitted_at
+        with self._lock:
+            if state["abandoned"]: # The caller was cancelled while this waited in the queue
+                return None
+            state["started"] = True
+            self._dequeue()
+            self.active += 1
+            self.wait_sum += waited
+            self.wait_max = max(self.wait_max, waited)
+        PROVIDER_IN_FLIGHT.labels(self.name).inc()
+        PROVIDER_QUEUE_WAIT.labels(self.name).observe(waited)
+        outcome = "failure"
+        try:
+            result = fn()
+            outcome = "success"
+        except BaseException:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+            PROVIDER_IN_FLIGHT.labels(self.name).dec()
+            PROVIDER_CALL_LATENCY.labels(self.name, outcome).observe(time.perf_counter() - started)
+        return result
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Runs `fn(*args, **kwargs)` on this pool and awaits the result.
+        """
+        with self._lock:
+            self.queued += 1
+            self.peak_queued = max(self.peak_queued, self.queued)
+        PROVIDER_QUEUED.labels(self.name).inc()
+        state = {"started": False, "abandoned": False}
+        call = functools.partial(self._call, time.perf_counter(), state, functools.partial(fn, *args, **kwargs))
+        try:
+            return await asyncio.get_event_loop().run_in_executor(self._pool, call)
+        finally:
+            # Cancelled before a thread picked the call up: it will never run, so it leaves the queue here
+            with self._lock:
+                if not state["started"] and not state["abandoned"]:
+                    state["abandoned"] = True
+                    self._dequeue()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "name": self.name,
+                "max_workers": self.max_workers,
+                "queued": self.queued,
+                "active": self.active,
+                "peak_queued": self.peak_queued,
+                "completed": self.completed,
+                "failed": self.failed,
+                "wait_avg_ms": (self.wait_sum / self.completed * 1000) if self.completed else 0.0,
+                "wait_max_ms": self.wait_max * 1000,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+# One pool per provider, so a burst of uploads can't exceed provider capacity or starve
+# the default loop executor used for file and DB work.
+stt_executor = BoundedExecutor("stt", settings.STT_MAX_CONCURRENCY)
+llm_executor = BoundedExecutor("llm", settings.LLM_MAX_CONCURRENCY)
+
+def get_executor_stats() -> Dict[str, Any]:
+    return {
+        "stt": stt_executor.stats(),
+        "llm": llm_executor.stats(),
+    }
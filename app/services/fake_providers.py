@@ -0,0 +1,130 @@
+from typing import Any, Dict, List, Optional
+import asyncio
+import copy
+import json
+import os
+import random
+from app.services.cache_service import cache_key
+
+# Settings are read lazily (from_settings) so benchmarks/stub_providers.py can reuse the
+# fakes without an app configuration.
+
+# Used when the fixtures file is missing, so the fakes always have something to return
+_DEFAULT_CASE = {
+    "filename": None,
+    "patient_profile": {},
+    "soap_note": {
+        "subjective": "Patient reports intermittent headaches for two weeks.",
+        "objective": "No focal neurological deficits noted.",
+        "assessment": "Tension-type headache.",
+        "plan": "Hydration, sleep hygiene, follow up in 4 weeks."
+    },
+    "risk_flags": []
+}
+
+def load_fixture_cases(path: str) -> List[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return [_DEFAULT_CASE]
+    with open(path, "r") as f:
+        return json.load(f) or [_DEFAULT_CASE]
+
+class _FakeBackend:
+    """
+    Shared behaviour of the fake providers: deterministic outputs picked from the
+    fixture cases, log-normal latency around `latency_seconds` (`latency_sigma=0` makes
+    it fixed) and injected failures at `failure_rate`. Latency is an asyncio sleep, so
+    fakes cost no threads and the pipeline can be load-tested offline.
+    """
+
+    def __init__(self, cases: List[Dict[str, Any]], latency_seconds: float = 0.0, latency_sigma: float = 0.0, failure_rate: float = 0.0, seed: int = 0):
+        self.cases = cases
+        self.latency_seconds = latency_seconds
+        self.latency_sigma = latency_sigma
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+        self.calls = 0
+        self.failures = 0
+
+    def _pick(self, key: str) -> Dict[str, Any]:
+        return self.cases[int(cache_key(key), 16) % len(self.cases)]
+
+    async def _simulate(self, what: str) -> None:
+        self.calls += 1
+        if self.latency_seconds > 0:
+            await asyncio.sleep(self.latency_seconds * self._rng.lognormvariate(0, self.latency_sigma))
+        if self._rng.random() < self.failure_rate:
+            self.failures += 1
+            raise Exception(f"503 Fake {what} failure (injected)")
+
+class FakeSTTProvider(_FakeBackend):
+    name = "fake"
+
+    @classmethod
+    def from_settings(cls) -> "FakeSTTProvider":
+        from app.core.config import settings
+        return cls(
+            load_fixture_cases(settings.FAKE_FIXTURES_PATH),
+            latency_seconds=settings.FAKE_STT_LATENCY_SECONDS,
+            latency_sigma=settings.FAKE_LATENCY_SIGMA,
+            failure_rate=settings.FAKE_STT_FAILURE_RATE,
+            seed=settings.FAKE_PROVIDER_SEED
+        )
+
+    def config_fingerprint(self, redact_pii: bool = True) -> str:
+        return cache_key("fake", redact_pii)
+
+    async def transcribe_audio_async(self, file_path: str, redact_pii: bool = True, audio_hash: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Returns a scripted doctor/patient exchange built from the fixture case whose
+        `filename` matches the audio file (else one picked by the audio's hash).
+        """
+        await self._simulate("STT")
+        file_name = os.path.basename(file_path)
+        case = next((c for c in self.cases if c.get("filename") == file_name), None) or self._pick(audio_hash or file_name)
+        soap = case["soap_note"]
+        utterances = [
+            {"speaker": "A", "text": "What brings you in today?", "start": 0, "end": 1500},
+            {"speaker": "B", "text": soap["subjective"], "start": 1600, "end": 9000},
+            {"speaker": "A", "text": soap["objective"], "start": 9100, "end": 14000},
+        ]
+        return {
+            "text": " ".join(u["text"] for u in utterances),
+            "utterances": utterances,
+            "confidence": 0.92,
+            "audio_duration": utterances[-1]["end"] / 1000,
+            "id": f"fake-{cache_key(audio_hash or file_name)[:16]}"
+        }
+
+class FakeLLMProvider(_FakeBackend):
+    name = "fake"
+    MODEL_NAME = "fake-soap-v1"
+
+    @classmethod
+    def from_settings(cls) -> "FakeLLMProvider":
+        from app.core.config import settings
+        return cls(
+            load_fixture_cases(settings.FAKE_FIXTURES_PATH),
+            latency_seconds=settings.FAKE_LLM_LATENCY_SECONDS,
+            latency_sigma=settings.FAKE_LATENCY_SIGMA,
+            failure_rate=settings.FAKE_LLM_FAILURE_RATE,
+            seed=settings.FAKE_PROVIDER_SEED
+        )
+
+    async def generate_soap_note_async(
+        self,
+        transcript_text: str,
+        speaker_labels: List[Dict[str, Any]] = None,
+        patient_context: Dict[str, Any] = None,
+        bypass_cache: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Returns the fixture SOAP note whose subjective text appears in the transcript
+        (as produced by FakeSTTProvider), else one picked by the transcript's hash.
+        """
+        await self._simulate("LLM")
+        case = next((c for c in self.cases if c["soap_note"]["subjective"] in transcript_text), None) or self._pick(transcript_text)
+        return {
+            "soap_note": copy.deepcopy(case["soap_note"]),
+            "low_confidence": [],
+            "risk_flags": list(case.get("risk_flags", []))
+        }
@@ -0,0 +1,263 @@
+from sqlalchemy import case, exists
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, select, update, or_, and_
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models.base import ProcessingJob, JobStatus, Consultation, ConsultationStatus, AudioFile
+from app.core.config import settings
+from app.services.rate_limiter import provider_blocked_until
+from app.services.triage_queue import TriageQueueService
+from datetime import datetime, timedelta
+from typing import List, Optional
+from uuid import UUID
+
+class JobQueueService:
+    """
+    Durable consultation processing queue backed by the `processing_jobs` table.
+    Workers claim jobs with a time-limited lease and keep it alive with heartbeats;
+    a job whose lease lapses (worker crash, deploy) becomes claimable again.
+    """
+
+    @staticmethod
+    def _pending_jobs_query(consultation_id: UUID):
+        return (
+            select(ProcessingJob)
+            .where(ProcessingJob.consultation_id == consultation_id)
+            .where(ProcessingJob.status.in_([JobStatus.QUEUED, JobStatus.RUNNING]))
+        )
+
+    @staticmethod
+    def _job_for(pending: List[ProcessingJob], consultation_id: UUID, max_attempts: Optional[int]) -> ProcessingJob:
+        # A QUEUED job hasn't read the audio yet, so it covers this upload too. A RUNNING
+        # one may already have: the new job waits for it (see _claimable) instead.
+        for job in pending:
+            if job.status == JobStatus.QUEUED:
+                return job
+        return ProcessingJob(
+            consultation_id=consultation_id,
+            max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS
+        )
+
+    @staticmethod
+    def enqueue(session: Session, consultation_id: UUID, max_attempts: Optional[int] = None) -> ProcessingJob:
+        """
+        Adds a job for the consultation to the session (caller commits).
+        Re-uses an existing QUEUED job so duplicate uploads don't double-process; with a
+        job already RUNNING, the new job becomes claimable once that one's lease ends.
+        """
+        pending = session.exec(JobQueueService._pending_jobs_query(consultation_id)).all()
+        job = JobQueueService._job_for(pending, consultation_id, max_attempts)
+        session.add(job)
+        return job
+
+    @staticmethod
+    async def enqueue_async(session: AsyncSession, consultation_id: UUID, max_attempts: Optional[int] = None) -> ProcessingJob:
+        """
+        AsyncSession variant of `enqueue` for async routes.
+        """
+        pending = (await session.exec(JobQueueService._pending_jobs_query(consultation_id))).all()
+        job = JobQueueService._job_for(pending, consultation_id, max_attempts)
+        session.add(job)
+        return job
+
+    @staticmethod
+    def _claimable(now: datetime):
+        # Fresh jobs whose backoff has elapsed and whose consultation isn't being processed
+        # (a re-upload queued behind a running job), or running jobs whose worker stopped heartbeating
+        running = aliased(ProcessingJob)
+        consultation_running = (
+            exists()
+            .where(running.consultation_id == ProcessingJob.consultation_id)
+            .where(running.status == JobStatus.RUNNING)
+        )
+        return or_(
+            and_(ProcessingJob.status == JobStatus.QUEUED, ProcessingJob.available_at <= now, ~consultation_running),
+            and_(
+                ProcessingJob.status == JobStatus.RUNNING,
+                ProcessingJob.lease_expires_at < now,
+                ProcessingJob.attempts < ProcessingJob.max_attempts
+            )
+        )
+
+    @staticmethod
+    def claim_next(session: Session, worker_id: str, lease_seconds: Optional[int] = None) -> Optional[ProcessingJob]:
+        """
+        Atomically claims the oldest available job for `worker_id`.
+        The claim is a conditional UPDATE, so two workers racing for the same row
+        cannot both win (works on SQLite and Postgres alike). On return `available_at`
+        is when the job last became claimable (for a reclaimed lease, when it lapsed),
+        so the queue wait never includes an earlier attempt's run.
+        """
+        now = datetime.utcnow()
+        lease = timedelta(seconds=lease_seconds or settings.JOB_LEASE_SECONDS)
+
+        candidate_ids = session.exec(
+            select(ProcessingJob.id)
+            .where(JobQueueService._claimable(now))
+            .order_by(ProcessingJob.available_at)
+            .limit(5)
+        ).all()
+
+        for job_id in candidate_ids:
+            result = session.exec(
+                update(ProcessingJob)
+                .where(ProcessingJob.id == job_id)
+                .where(JobQueueService._claimable(now))
+                .values(
+                    available_at=case((ProcessingJob.status == JobStatus.RUNNING, ProcessingJob.lease_expires_at), else_=ProcessingJob.available_at),
+                    status=JobStatus.RUNNING,
+                    lease_owner=worker_id,
+                    lease_expires_at=now + lease,
+                    heartbeat_at=now,
+                    attempts=ProcessingJob.attempts + 1,
+                    updated_at=now
+                )
+            )
+            session.commit()
+            if result.rowcount == 1:
+                return session.get(ProcessingJob, job_id)
+        return None
+
+    @staticmethod
+    def heartbeat(session: Session, job_id: UUID, worker_id: str, lease_seconds: Optional[int] = None) -> bool:
+        """
+        Extends the lease. Returns False if the job was reclaimed by another worker.
+        """
+        now = datetime.utcnow()
+        lease = timedelta(seconds=lease_seconds or settings.JOB_LEASE_SECONDS)
+        result = session.exec(
+            update(ProcessingJob)
+            .where(ProcessingJob.id == job_id)
+            .where(ProcessingJob.lease_owner == worker_id)
+            .where(ProcessingJob.status == JobStatus.RUNNING)
+            .values(lease_expires_at=now + lease, heartbeat_at=now, updated_at=now)
+        )
+        session.commit()
+        return result.rowcount == 1
+
+    @staticmethod
+    def complete(session: Session, job_id: UUID, worker_id: str) -> None:
+        now = datetime.utcnow()
+        session.exec(
+            update(ProcessingJob)
+            .where(ProcessingJob.id == job_id)
+            .where(ProcessingJob.lease_owner == worker_id)
+            .values(status=JobStatus.SUCCEEDED, lease_expires_at=None, updated_at=now)
+        )
+        session.commit()
+
+    @staticmethod
+    def fail(session: Session, job_id: UUID, worker_id: str, error: str) -> None:
+        """
+        Re-queues the job with exponential backoff, or marks it FAILED and flags the
+        consultation for manual review once attempts are exhausted.
+        """
+        job = session.get(ProcessingJob, job_id)
+        if not job or job.lease_owner != worker_id:
+            return
+
+        now = datetime.utcnow()
+        job.last_error = error
+        job.lease_expires_at = None
+        job.updated_at = now
+        if job.attempts < job.max_attempts:
+            job.status = JobStatus.QUEUED
+            job.available_at = now + timedelta(seconds=30 * (2 ** (job.attempts - 1))) # 30s, 60s, 120s...
+        else:
+            job.status = JobStatus.FAILED
+            JobQueueService._flag_for_review(session, job.consultation_id)
+        session.add(job)
+        session.commit()
+
+    @staticmethod
+    def fail_expired(session: Session) -> int:
+        """
+        Marks RUNNING jobs whose lease lapsed on their final attempt as FAILED.
+        Returns the number of jobs failed.
+        """
+        now = datetime.utcnow()
+        expired = session.exec(
+            select(ProcessingJob)
+            .where(ProcessingJob.status == JobStatus.RUNNING)
+            .where(ProcessingJob.lease_expires_at < now)
+            .where(ProcessingJob.attempts >= ProcessingJob.max_attempts)
+        ).all()
+        for job in expired:
+            job.status = JobStatus.FAILED
+            job.last_error = job.last_error or "Lease expired (worker lost)"
+            job.updated_at = now
+            session.add(job)
+            JobQueueService._flag_for_review(session, job.consultation_id)
+        session.commit()
+        return len(expired)
+
+    @staticmethod
+    def _flag_for_review(session: Session, consultation_id: UUID) -> None:
+        consultation = session.get(Consultation, consultation_id)
+        if consultation:
+            TriageQueueService.leave(session, consultation)
+            consultation.status = ConsultationStatus.FAILED
+            consultation.requires_manual_review = True
+            session.add(consultation)
+
+    @staticmethod
+    def reprocessable_query(consultation_ids: Optional[List[UUID]] = None, limit: Optional[int] = None):
+        """
+        Consultations flagged for manual review that can be re-run (oldest first): they
+        have audio and no QUEUED/RUNNING job. At most REPROCESS_MAX_BATCH per call.
+        """
+        pending = (
+            exists()
+            .where(ProcessingJob.consultation_id == Consultation.id)
+            .where(ProcessingJob.status.in_([JobStatus.QUEUED, JobStatus.RUNNING]))
+        )
+        query = (
+            select(Consultation)
+            .where(Consultation.requires_manual_review == True)
+            .where(exists().where(AudioFile.consultation_id == Consultation.id))
+            .where(~pending)
+        )
+        if consultation_ids is not None:
+            query = query.where(Consultation.id.in_(consultation_ids))
+        return query.order_by(Consultation.created_at).limit(min(limit or settings.REPROCESS_MAX_BATCH, settings.REPROCESS_MAX_BATCH))
+
+    @staticmethod
+    def reprocess(
+        session: Session,
+        consultation_ids: Optional[List[UUID]] = None,
+        limit: Optional[int] = None,
+        per_minute: Optional[float] = None
+    ) -> List[ProcessingJob]:
+        """
+        Re-enqueues consultations flagged for manual review (the given ones, or all of
+        them up to `limit`) and clears the flag (caller commits). The jobs become
+        claimable one every 60 / `per_minute` seconds, starting once any provider
+        Retry-After block has passed, so workers take the backlog alongside new uploads
+        instead of spending every slot (and the quota) on it. Each job gets the usual
+        JOB_MAX_ATTEMPTS with backoff. Stages that already succeeded are skipped by the
+        pipeline (stored transcriptions are reused).
+        """
+        candidates = session.exec(JobQueueService.reprocessable_query(consultation_ids, limit).with_only_columns(Consultation.id)).all()
+        if not candidates:
+            return []
+        # Claim the rows with a conditional UPDATE, so concurrent calls can't both enqueue one.
+        # A flagged consultation may still be COMPLETED (a run that finished after its lease
+        # was failed), so the claimed ones leave the dashboard queue in the same transaction.
+        claimed = set(session.exec(
+            update(Consultation)
+            .where(Consultation.id.in_(candidates))
+            .where(Consultation.requires_manual_review == True)
+            .values(status=ConsultationStatus.IN_PROGRESS, requires_manual_review=False)
+            .returning(Consultation.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all())
+        TriageQueueService.leave_many(session, list(claimed))
+
+        now = datetime.utcnow()
+        start = max(now, datetime.utcfromtimestamp(provider_blocked_until()))
+        interval = timedelta(seconds=60.0 / (per_minute or settings.REPROCESS_PER_MINUTE))
+        jobs = [
+            ProcessingJob(consultation_id=consultation_id, max_attempts=settings.JOB_MAX_ATTEMPTS, available_at=start + position * interval)
+            for position, consultation_id in enumerate(c for c in candidates if c in claimed)
+        ]
+        session.add_all(jobs)
+        return jobs
@@ -3,28 +3,41 @@ import json
 import asyncio
 from typing import List, Dict, Any
 from app.core.config import settings
+from app.services.cache_service import MemoryLRUCache, DiskCache, TieredCache, cache_key
+from app.services.provider_clients import ProviderClients
+from app.services.executors import llm_executor
+from app.services.rate_limiter import gemini_rpm, gemini_tpm, is_rate_limited, retry_after_seconds
 
 # Configure global API key
-genai.configure(api_key=settings.GOOGLE_API_KEY)
+if settings.GEMINI_API_ENDPOINT:
+    genai.configure(api_key=settings.GOOGLE_API_KEY, transport="rest", client_options={"api_endpoint": settings.GEMINI_API_ENDPOINT})
+else:
+    genai.configure(api_key=settings.GOOGLE_API_KEY)
 
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type, before_sleep_log
 import logging
 
 logger = logging.getLogger(__name__)
 
+# SOAP response cache: reprocessing a consultation or re-running a batch over the same
+# transcript returns the stored note instead of calling Gemini again.
+soap_cache = TieredCache(
+    MemoryLRUCache(settings.SOAP_CACHE_MAX_ENTRIES, settings.SOAP_CACHE_TTL_SECONDS, name="soap_notes"),
+    DiskCache(
+        settings.SOAP_CACHE_DIR,
+        max_bytes=settings.SOAP_CACHE_MAX_BYTES,
+        max_age_seconds=settings.SOAP_CACHE_TTL_SECONDS,
+        name="soap_notes_disk"
+    ) if settings.SOAP_CACHE_DIR else None
+)
+
 class GeminiService:
+    name = "gemini"
+    MODEL_NAME = "gemini-2.5-flash" # Available and efficient
+    GENERATION_CONFIG = {"response_mime_type": "application/json"}
+
     @staticmethod
-    @retry(
-        stop=stop_after_attempt(5), # Increased attempts for quota
-        wait=wait_exponential(multiplier=2, min=4, max=60), # Exponential backoff: 4s, 8s, 16s, 32s, 60s
-        reraise=True
-    )
-    async def generate_soap_note_async(transcript_text: str, speaker_labels: List[Dict[str, Any]] = None, patient_context: Dict[str, Any] = None) -> Dict[str, Any]:
-        """
-        Generates a structured SOAP note from the transcript using Gemini.
-        Returns a dictionary matching the SOAP note schema.
-        Includes robust retry logic for 429 Quota errors.
-        """
+    def build_prompt(transcript_text: str, speaker_labels: List[Dict[str, Any]] = None, patient_context: Dict[str, Any] = None) -> str:
         # Construct a speaker-aware transcript if labels are provided
         formatted_transcript = transcript_text
         if speaker_labels:
@@ -35,7 +48,7 @@ class GeminiService:
                  text = utter.get('text', '')
                  formatted_lines.append(f"Speaker {speaker}: {text}")
             formatted_transcript = "\n".join(formatted_lines)
-            
+
         # Format Patient Context for Prompt
         context_str = "Unknown"
         if patient_context:
@@ -45,22 +58,16 @@ class GeminiService:
                 f"Gender: {patient_context.get('gender', 'N/A')}\n"
                 f"Medical History/Notes: {patient_context.get('notes', 'None provided')}"
             )
-            
-        # Initialize Model (gemini-2.5-flash is available and efficient)
-        model = genai.GenerativeModel(
-            'gemini-2.5-flash',
-            generation_config={"response_mime_type": "application/json"}
-        )
-        
-        prompt = f"""
+
+        return f"""
         You are an expert medical scribe. Your task is to analyze the following Doctor-Patient consultation transcript and generate a professional, structured SOAP note encoded as JSON.
-        
+
         Patient Context:
         {context_str}
-        
+
         Transcript:
         {formatted_transcript}
-        
+
         Instructions:
         1. Analyze the transcript in the context of the patient's demographics and history.
         2. Extrapolate the Subjective, Objective, Assessment, and Plan sections.
@@ -68,7 +75,7 @@ class GeminiService:
         4. **UNCERTAINTY**: If a term is ambiguous (e.g., "measure" vs "mention") or if the speaker is unclear, flag it in the "low_confidence" list.
         5. Identify any Risk Flags (e.g., Suicide risk, Severe allergies, Abuse).
         6. Return STRICTLY valid JSON. No markdown formatting.
-        
+
         Required JSON Structure:
         {{
             "soap_note": {{
@@ -78,25 +85,82 @@ class GeminiService:
                 "plan": "Treatment plan, medications, follow-up..."
             }},
             "low_confidence": ["list", "of", "ambiguous", "terms"],
-            "risk_flags": ["Risk 1", "Risk 2"] 
+            "risk_flags": ["Risk 1", "Risk 2"]
         }}
         """
-        
-        # Offload the blocking API call to a thread
-        loop = asyncio.get_event_loop()
-        
+
+    @staticmethod
+    def estimate_tokens(prompt: str) -> int:
+        # ~4 characters per token; corrected from usage_metadata once the response arrives
+        return len(prompt) // 4 + 1
+
+    @staticmethod
+    def prompt_fingerprint(prompt: str) -> str:
+        return cache_key(GeminiService.MODEL_NAME, GeminiService.GENERATION_CONFIG, prompt)
+
+    @staticmethod
+    async def generate_soap_note_async(
+        transcript_text: str,
+        speaker_labels: List[Dict[str, Any]] = None,
+        patient_context: Dict[str, Any] = None,
+        bypass_cache: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Generates a structured SOAP note from the transcript using Gemini.
+        Returns a dictionary matching the SOAP note schema.
+        Includes robust retry logic for 429 Quota errors.
+        Responses are cached by (model, generation config, prompt); set `bypass_cache`
+        to force regeneration (the fresh result still replaces the cached one).
+        """
+        prompt = GeminiService.build_prompt(transcript_text, speaker_labels, patient_context)
+        key = GeminiService.prompt_fingerprint(prompt)
+
+        if settings.SOAP_CACHE_ENABLED and not bypass_cache:
+            cached = await soap_cache.get(key)
+            if cached is not None:
+                print("   (Gemini) Served from SOAP cache.")
+                return cached
+
+        result_json = await GeminiService._generate(prompt)
+        if settings.SOAP_CACHE_ENABLED:
+            await soap_cache.set(key, result_json)
+        return result_json
+
+    @staticmethod
+    @retry(
+        stop=stop_after_attempt(5), # Increased attempts for quota
+        wait=wait_exponential(multiplier=2, min=4, max=60), # Exponential backoff: 4s, 8s, 16s, 32s, 60s
+        reraise=True
+    )
+    async def _generate(prompt: str) -> Dict[str, Any]:
+        model = ProviderClients.gemini_model(GeminiService.MODEL_NAME, GeminiService.GENERATION_CONFIG)
+
+        # Pace requests to the quota up front (shared across processes) instead of hitting 429s
+        estimated_tokens = GeminiService.estimate_tokens(prompt)
+        if gemini_rpm:
+            await gemini_rpm.acquire()
+        if gemini_tpm:
+            await gemini_tpm.acquire(estimated_tokens)
+
         try:
             print("   (Gemini) Sending request...")
-            response = await loop.run_in_executor(
-                None, 
-                lambda: model.generate_content(prompt)
-            )
+            # Offload the blocking API call to the bounded LLM pool
+            response = await llm_executor.run(model.generate_content, prompt)
         except Exception as e:
             # Check for quota errors to print explicit warning (Tenacity handles the retry)
-            if "429" in str(e) or "quota" in str(e).lower() or "resource exhausted" in str(e).lower():
+            if is_rate_limited(e):
                 print(f"   ⚠️ Quota Limit Hit (429). Retrying in background...")
+                # Pause every caller until the provider's Retry-After hint has passed
+                retry_after = retry_after_seconds(e)
+                for limiter in (gemini_rpm, gemini_tpm):
+                    if limiter:
+                        await limiter.penalize(retry_after)
             raise e
-        
+
+        usage = getattr(response, "usage_metadata", None)
+        if gemini_tpm and usage is not None and usage.total_token_count:
+            await gemini_tpm.adjust(usage.total_token_count - estimated_tokens)
+
         try:
             # Parse JSON result
             result_json = json.loads(response.text)
@@ -0,0 +1,113 @@
+import assemblyai as aai
+import google.generativeai as genai
+import httpx
+import json
+import threading
+import time
+from typing import Any, Dict, Optional
+from app.core.config import settings
+
+class ProviderClients:
+    """
+    Process-wide registry of provider SDK clients.
+
+    Each client is built once and reused, so every consultation after the first skips
+    client construction and reuses warm keep-alive connections:
+    - AssemblyAI: one `aai.Client` with a pooled httpx.Client, and one `aai.Transcriber`
+      (each Transcriber() otherwise spawns its own thread pool).
+    - Gemini: one `GenerativeModel` per (model name, generation config); they share the
+      SDK's default channel.
+    """
+    _lock = threading.Lock()
+    _assemblyai_client: Optional[aai.Client] = None
+    _transcriber: Optional[aai.Transcriber] = None
+    _gemini_models: Dict[str, genai.GenerativeModel] = {}
+
+    @classmethod
+    def assemblyai_client(cls) -> aai.Client:
+        if cls._assemblyai_client is None:
+            with cls._lock:
+                if cls._assemblyai_client is None:
+                    client = aai.Client(settings=aai.settings)
+                    # Swap in a pooled client sized for our STT concurrency (SDK default pool is untuned)
+                    client._http_client.close()
+                    client._http_client = httpx.Client(
+                        base_url=client.settings.base_url,
+                        headers={"authorization": client.settings.api_key},
+                        timeout=client.settings.http_timeout,
+                        limits=httpx.Limits(
+                            max_connections=settings.ASSEMBLYAI_MAX_CONNECTIONS,
+                            max_keepalive_connections=settings.ASSEMBLYAI_MAX_CONNECTIONS,
+                            keepalive_expiry=settings.PROVIDER_KEEPALIVE_SECONDS
+                        )
+                    )
+                    cls._assemblyai_client = client
+        return cls._assemblyai_client
+
+    @classmethod
+    def transcriber(cls) -> aai.Transcriber:
+        if cls._transcriber is None:
+            client = cls.assemblyai_client()
+            with cls._lock:
+                if cls._transcriber is None:
+                    # max_workers only sizes the SDK's own *_async helpers, which we don't use
+                    cls._transcriber = aai.Transcriber(client=client, max_workers=1)
+        return cls._transcriber
+
+    @classmethod
+    def gemini_model(cls, model_name: str, generation_config: Dict[str, Any]) -> genai.GenerativeModel:
+        key = json.dumps([model_name, generation_config], sort_keys=True)
+        model = cls._gemini_models.get(key)
+        if model is None:
+            with cls._lock:
+                model = cls._gemini_models.get(key)
+                if model is None:
+                    model = genai.GenerativeModel(model_name, generation_config=generation_config)
+                    cls._gemini_models[key] = model
+        return model
+
+    @classmethod
+    def warm_up(cls) -> Dict[str, Any]:
+        """
+        Builds the clients and opens one connection to each provider (DNS + TLS) so the
+        first consultation after a deploy doesn't pay that latency. Blocking; errors are
+        reported, not raised.
+        """
+        from app.services.llm_service import GeminiService
+
+        report: Dict[str, Any] = {}
+
+        if settings.STT_PROVIDER == "assemblyai":
+            start = time.perf_counter()
+            try:
+                cls.transcriber()
+                cls.assemblyai_client().http_client.get("/v2/transcript", params={"limit": 1})
+                report["assemblyai"] = {"ok": True}
+            except Exception as e:
+                report["assemblyai"] = {"ok": False, "error": str(e)}
+            report["assemblyai"]["ms"] = (time.perf_counter() - start) * 1000
+
+        if settings.LLM_PROVIDER == "gemini":
+            start = time.perf_counter()
+            try:
+                cls.gemini_model(GeminiService.MODEL_NAME, GeminiService.GENERATION_CONFIG)
+                genai.get_model(f"models/{GeminiService.MODEL_NAME}") # Cheap metadata call, opens the channel
+                report["gemini"] = {"ok": True}
+            except Exception as e:
+                report["gemini"] = {"ok": False, "error": str(e)}
+            report["gemini"]["ms"] = (time.perf_counter() - start) * 1000
+
+        print(f"Provider warm-up: {report}")
+        return report
+
+    @classmethod
+    def reset(cls) -> None:
+        """
+        Drops all clients (tests, or after changing API keys at runtime).
+        """
+        with cls._lock:
+            if cls._assemblyai_client is not None:
+                cls._assemblyai_client.http_client.close()
+            cls._assemblyai_client = None
+            cls._transcriber = None
+            cls._gemini_models = {}
@@ -0,0 +1,86 @@
+from typing import Any, Callable, Dict, List, Optional, Protocol
+from app.core.config import settings
+
+class STTProvider(Protocol):
+    """
+    Speech-to-text backend used by the consultation pipeline.
+    """
+    name: str
+
+    def config_fingerprint(self, redact_pii: bool = True) -> str:
+        ...
+
+    async def transcribe_audio_async(self, file_path: str, redact_pii: bool = True, audio_hash: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Returns {"text", "utterances": [{"speaker", "text", "start", "end"}], "confidence", "audio_duration", "id"}.
+        """
+        ...
+
+class LLMProvider(Protocol):
+    """
+    SOAP note generation backend used by the consultation pipeline.
+    """
+    name: str
+    MODEL_NAME: str
+
+    async def generate_soap_note_async(
+        self,
+        transcript_text: str,
+        speaker_labels: List[Dict[str, Any]] = None,
+        patient_context: Dict[str, Any] = None,
+        bypass_cache: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Returns {"soap_note": {"subjective", "objective", "assessment", "plan"}, "low_confidence", "risk_flags"}.
+        """
+        ...
+
+def _assemblyai() -> STTProvider:
+    from app.services.stt_service import AssemblyAIService
+    return AssemblyAIService
+
+def _gemini() -> LLMProvider:
+    from app.services.llm_service import GeminiService
+    return GeminiService
+
+def _fake_stt() -> STTProvider:
+    from app.services.fake_providers import FakeSTTProvider
+    return FakeSTTProvider.from_settings()
+
+def _fake_llm() -> LLMProvider:
+    from app.services.fake_providers import FakeLLMProvider
+    return FakeLLMProvider.from_settings()
+
+# Factories are imported lazily so selecting the fakes never imports (or configures) a provider SDK
+STT_PROVIDERS: Dict[str, Callable[[], STTProvider]] = {"assemblyai": _assemblyai, "fake": _fake_stt}
+LLM_PROVIDERS: Dict[str, Callable[[], LLMProvider]] = {"gemini": _gemini, "fake": _fake_llm}
+
+_instances: Dict[str, Any] = {}
+
+def _get(kind: str, registry: Dict[str, Callable[[], Any]], name: str) -> Any:
+    key = f"{kind}:{name}"
+    if key not in _instances:
+        if name not in registry:
+            raise ValueError(f"Unknown {kind} provider '{name}'. Available: {', '.join(sorted(registry))}")
+        _instances[key] = registry[name]()
+    return _instances[key]
+
+def get_stt_provider(name: Optional[str] = None) -> STTProvider:
+    """
+    Returns the STT backend selected by settings.STT_PROVIDER (or `name`).
+    """
+    return _get("stt", STT_PROVIDERS, name or settings.STT_PROVIDER)
+
+def get_llm_provider(name: Optional[str] = None) -> LLMProvider:
+    """
+    Returns the LLM backend selected by settings.LLM_PROVIDER (or `name`).
+    """
+    return _get("llm", LLM_PROVIDERS, name or settings.LLM_PROVIDER)
+
+def register_stt_provider(name: str, factory: Callable[[], STTProvider]) -> None:
+    STT_PROVIDERS[name] = factory
+    _instances.pop(f"stt:{name}", None)
+
+def register_llm_provider(name: str, factory: Callable[[], LLMProvider]) -> None:
+    LLM_PROVIDERS[name] = factory
+    _instances.pop(f"llm:{name}", None)
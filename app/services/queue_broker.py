@@ -0,0 +1,177 @@
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+import asyncio
+import json
+from app.core.config import settings
+from app.core.db import async_engine
+from app.core.metrics import QUEUE_STREAM_SUBSCRIBERS
+from app.services.triage_queue import TriageQueueService
+
+Snapshot = Dict[str, List[Dict[str, Any]]]
+
+# Change every minute by themselves; not a reason to send an event
+WAIT_FIELDS = ("wait_time_minutes", "wait_time")
+
+def _comparable(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in item.items() if key not in WAIT_FIELDS}
+
+def diff_snapshots(old: Snapshot, new: Snapshot) -> List[Dict[str, Any]]:
+    """
+    Events that turn `old` into `new` when applied in order: `remove` drops a consultation,
+    `insert` and `reprioritize` (re)place an item at `position` of the new list.
+    """
+    events = []
+    for name, items in new.items():
+        previous = {item["consultation_id"]: item for item in old.get(name, [])}
+        current = {item["consultation_id"] for item in items}
+        for consultation_id in previous:
+            if consultation_id not in current:
+                events.append({"type": "remove", "queue": name, "consultation_id": consultation_id})
+        for position, item in enumerate(items):
+            before = previous.get(item["consultation_id"])
+            if before is None:
+                events.append({"type": "insert", "queue": name, "position": position, "item": item})
+            elif _comparable(before) != _comparable(item):
+                events.append({"type": "reprioritize", "queue": name, "position": position, "item": item})
+    return events
+
+async def fetch_dashboard_queues() -> Snapshot:
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        return await TriageQueueService.snapshot_async(session, settings.QUEUE_STREAM_LIMIT)
+
+class QueueBroker:
+    """
+    Fans dashboard queue changes out to every open stream in this process.
+
+    While anyone is subscribed, one task reads the top of both queues (a bounded index
+    read) every `interval` seconds, diffs it against the previous read and pushes the
+    events into each subscriber's buffer, so N open screens cost one query per interval
+    instead of N pollers. Changes made by any process (API or app.worker) are picked up,
+    since the database is the source. The task starts with the first subscriber and stops
+    after the last one leaves.
+    """
+
+    def __init__(self, fetch: Callable[[], Awaitable[Snapshot]], interval: float, heartbeat: float, buffer_size: int):
+        self.fetch = fetch
+        self.interval = interval
+        self.heartbeat = heartbeat
+        self.buffer_size = buffer_size
+        self.polls = 0
+        self.events = 0
+        self.dropped = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _bind(self) -> None:
+        # State is tied to the event loop it was created on (one per uvicorn worker)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._subscribers: Set[asyncio.Queue] = set()
+            self._snapshot: Snapshot = {}
+            self._sequence = 0
+            self._task: Optional[asyncio.Task] = None
+            self._start_lock = asyncio.Lock()
+
+    async def subscribe(self) -> asyncio.Queue:
+        """
+        Returns a buffer that receives a `snapshot` event followed by change events. A
+        `None` in the buffer means the subscriber was dropped (it fell behind, or the broker
+        closed). Call `unsubscribe` when done.
+        """
+        self._bind()
+        async with self._start_lock:
+            if self._task is None or self._task.done():
+                self._snapshot = await self.fetch()
+                self.polls += 1
+                self._task = asyncio.create_task(self._run())
+            buffer = asyncio.Queue(maxsize=self.buffer_size)
+            buffer.put_nowait({"type": "snapshot", "id": self._sequence, **self._snapshot})
+            self._subscribers.add(buffer)
+        QUEUE_STREAM_SUBSCRIBERS.inc()
+        return buffer
+
+    def unsubscribe(self, buffer: asyncio.Queue) -> None:
+        if buffer in self._subscribers:
+            self._subscribers.discard(buffer)
+            QUEUE_STREAM_SUBSCRIBERS.dec()
+
+    def _drop(self, buffer: asyncio.Queue) -> None:
+        # Tell the subscriber to go away; it resyncs from a fresh snapshot on reconnect
+        self.unsubscribe(buffer)
+        self.dropped += 1
+        while not buffer.empty():
+            buffer.get_nowait()
+        buffer.put_nowait(None)
+
+    def _publish(self, event: Dict[str, Any]) -> None:
+        self._sequence += 1
+        self.events += 1
+        event = {"id": self._sequence, **event}
+        for buffer in list(self._subscribers):
+            try:
+                buffer.put_nowait(event)
+            except asyncio.QueueFull:
+                self._drop(buffer)
+
+    async def _run(self) -> None:
+        while self._subscribers:
+            await asyncio.sleep(self.interval)
+            if not self._subscribers:
+                break
+            try:
+                snapshot = await self.fetch()
+            except Exception as e:
+                print(f"Reading dashboard queues failed: {e}")
+                continue
+            self.polls += 1
+            for event in diff_snapshots(self._snapshot, snapshot):
+                self._publish(event)
+            self._snapshot = snapshot
+
+    async def stream(self) -> AsyncIterator[str]:
+        """
+        Server-Sent Events for one client, with a comment line as heartbeat so proxies
+        keep the connection open.
+        """
+        buffer = await self.subscribe()
+        try:
+            yield f"retry: {int(self.interval * 2000)}\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(buffer.get(), timeout=self.heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event is None:
+                    return
+                event = dict(event)
+                event_id, event_type = event.pop("id"), event.pop("type")
+                yield f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(event, default=str)}\n\n"
+        finally:
+            self.unsubscribe(buffer)
+
+    async def close(self) -> None:
+        """
+        Ends every open stream and stops the polling task (on shutdown).
+        """
+        if self._loop is None:
+            return
+        for buffer in list(self._subscribers):
+            self._drop(buffer)
+        if self._task is not None:
+            self._task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self._subscribers) if self._loop is not None else 0,
+            "polls": self.polls,
+            "events": self.events,
+            "dropped_subscribers": self.dropped,
+        }
+
+queue_broker = QueueBroker(
+    fetch_dashboard_queues,
+    settings.QUEUE_STREAM_POLL_SECONDS,
+    settings.QUEUE_STREAM_HEARTBEAT_SECONDS,
+    settings.QUEUE_STREAM_BUFFER
+)
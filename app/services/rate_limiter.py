@@ -0,0 +1,226 @@
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select, update
+from typing import Any, Dict, Optional
+import asyncio
+import re
+import threading
+import time
+from app.core.config import settings
+from app.core.db import engine
+from app.models.base import RateLimitBucket
+
+def _take(tokens: float, updated_at: float, capacity: float, rate: float, cost: float, now: float) -> float:
+    """
+    Refills a bucket up to `now` and takes `cost` tokens from it (the balance may go negative).
+    """
+    refilled = min(capacity, tokens + max(0.0, now - updated_at) * rate)
+    return min(capacity, refilled - cost)
+
+def _wait_for(tokens: float, rate: float, blocked_until: float, now: float) -> float:
+    # A negative balance is paid back by refill; a Retry-After block overrides it
+    return max(0.0, -tokens / rate, blocked_until - now)
+
+class MemoryBucketStore:
+    """
+    Buckets in process memory (shared by every coroutine and thread of this process).
+    """
+    blocking = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Dict[str, float]] = {}
+
+    def reserve(self, name: str, capacity: float, rate: float, cost: float, now: float) -> float:
+        with self._lock:
+            bucket = self._buckets.setdefault(name, {"tokens": capacity, "updated_at": now, "blocked_until": 0.0})
+            bucket["tokens"] = _take(bucket["tokens"], bucket["updated_at"], capacity, rate, cost, now)
+            bucket["updated_at"] = now
+            return _wait_for(bucket["tokens"], rate, bucket["blocked_until"], now)
+
+    def block(self, name: str, until: float, capacity: float, now: float) -> None:
+        with self._lock:
+            bucket = self._buckets.setdefault(name, {"tokens": capacity, "updated_at": now, "blocked_until": 0.0})
+            bucket["blocked_until"] = max(bucket["blocked_until"], until)
+
+    def blocked_until(self, name: str) -> float:
+        with self._lock:
+            bucket = self._buckets.get(name)
+            return bucket["blocked_until"] if bucket else 0.0
+
+class DbBucketStore:
+    """
+    Buckets in the `rate_limit_buckets` table, shared by every API and worker process.
+    Each reservation is a read followed by a compare-and-swap on `version`; a lost race
+    just re-reads and tries again.
+    """
+    blocking = True
+    MAX_RETRIES = 20
+
+    def __init__(self, db_engine):
+        self.engine = db_engine
+
+    def reserve(self, name: str, capacity: float, rate: float, cost: float, now: float) -> float:
+        for _ in range(self.MAX_RETRIES):
+            with Session(self.engine) as session:
+                bucket = session.get(RateLimitBucket, name)
+                if bucket is None:
+                    tokens = capacity - cost
+                    session.add(RateLimitBucket(name=name, tokens=tokens, updated_at=now))
+                    try:
+                        session.commit()
+                    except IntegrityError: # Another process created it first
+                        session.rollback()
+                        continue
+                    return _wait_for(tokens, rate, 0.0, now)
+
+                tokens = _take(bucket.tokens, bucket.updated_at, capacity, rate, cost, now)
+                result = session.exec(
+                    update(RateLimitBucket)
+                    .where(RateLimitBucket.name == name)
+                    .where(RateLimitBucket.version == bucket.version)
+                    .values(tokens=tokens, updated_at=max(now, bucket.updated_at), version=bucket.version + 1)
+                )
+                session.commit()
+                if result.rowcount == 1:
+                    return _wait_for(tokens, rate, bucket.blocked_until, now)
+        raise RuntimeError(f"Rate limit bucket {name} is too contended")
+
+    def block(self, name: str, until: float, capacity: float, now: float) -> None:
+        for _ in range(self.MAX_RETRIES):
+            with Session(self.engine) as session:
+                result = session.exec(
+                    update(RateLimitBucket)
+                    .where(RateLimitBucket.name == name)
+                    .where(RateLimitBucket.blocked_until < until)
+                    .values(blocked_until=until)
+                )
+                session.commit()
+                if result.rowcount == 1 or session.get(RateLimitBucket, name) is not None:
+                    return
+                # A 429 before the first reservation: create the bucket so the block sticks
+                session.add(RateLimitBucket(name=name, tokens=capacity, updated_at=now, blocked_until=until))
+                try:
+                    session.commit()
+                    return
+                except IntegrityError: # Another process created it first
+                    session.rollback()
+        raise RuntimeError(f"Rate limit bucket {name} is too contended")
+
+    def blocked_until(self, name: str) -> float:
+        with Session(self.engine) as session:
+            value = session.exec(select(RateLimitBucket.blocked_until).where(RateLimitBucket.name == name)).first()
+            return value or 0.0
+
+class RateLimiter:
+    """
+    Token bucket refilled at `per_minute / 60` tokens per second.
+
+    `acquire(cost)` reserves tokens up front and sleeps off any deficit, so concurrent
+    callers are paced at exactly the quota instead of bursting into 429s and backing off.
+    The bucket holds at most `burst_seconds` worth of tokens, which bounds how far any
+    60s window can overshoot the quota after an idle period.
+    """
+
+    def __init__(self, name: str, per_minute: float, store, burst_seconds: float = 6.0):
+        self.name = name
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.store = store
+        self.acquired = 0
+        self.throttled = 0
+        self.wait_sum = 0.0
+        self.penalties = 0
+
+    async def _call(self, fn, *args):
+        if self.store.blocking:
+            return await asyncio.get_event_loop().run_in_executor(None, fn, *args)
+        return fn(*args)
+
+    async def acquire(self, cost: float = 1.0) -> float:
+        """
+        Waits until `cost` tokens are available. Returns the seconds spent waiting.
+        """
+        start = time.monotonic()
+        wait = await self._call(self.store.reserve, self.name, self.capacity, self.rate, cost, time.time())
+        if wait > 0:
+            await asyncio.sleep(wait)
+        # Honour a Retry-After block set (possibly by another process) while we waited
+        while True:
+            remaining = await self._call(self.store.blocked_until, self.name) - time.time()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(remaining)
+
+        waited = time.monotonic() - start
+        self.acquired += 1
+        if waited > 0.001:
+            self.throttled += 1
+            self.wait_sum += waited
+        return waited
+
+    async def adjust(self, delta: float) -> None:
+        """
+        Corrects an estimated cost once the real one is known (negative refunds).
+        """
+        if delta:
+            await self._call(self.store.reserve, self.name, self.capacity, self.rate, delta, time.time())
+
+    async def penalize(self, retry_after: Optional[float] = None) -> None:
+        """
+        Blocks the bucket for every caller after the provider rejected a request.
+        """
+        self.penalties += 1
+        delay = retry_after if retry_after is not None else settings.RATE_LIMIT_DEFAULT_PENALTY_SECONDS
+        now = time.time()
+        await self._call(self.store.block, self.name, now + delay, self.capacity, now)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "per_minute": self.rate * 60,
+            "acquired": self.acquired,
+            "throttled": self.throttled,
+            "wait_total_s": self.wait_sum,
+            "penalties": self.penalties,
+        }
+
+def is_rate_limited(error: Exception) -> bool:
+    message = str(error).lower()
+    return "429" in message or "quota" in message or "resource exhausted" in message or "too many requests" in message
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """
+    Extracts the provider's retry hint from an HTTP Retry-After header or, for Gemini,
+    the RetryInfo delay embedded in the error message.
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if headers is not None and headers.get("retry-after"):
+        try:
+            return float(headers.get("retry-after"))
+        except ValueError:
+            pass
+    match = re.search(r"retry in ([\d.]+)\s*s|retry_delay\s*\{\s*seconds:\s*(\d+)", str(error), re.IGNORECASE)
+    if match:
+        return float(match.group(1) or match.group(2))
+    return None
+
+_store = DbBucketStore(engine) if settings.RATE_LIMIT_BACKEND == "database" else MemoryBucketStore()
+
+gemini_rpm = RateLimiter("gemini:rpm", settings.GEMINI_RPM, _store) if settings.GEMINI_RPM else None
+gemini_tpm = RateLimiter("gemini:tpm", settings.GEMINI_TPM, _store) if settings.GEMINI_TPM else None
+assemblyai_rpm = RateLimiter("assemblyai:rpm", settings.ASSEMBLYAI_RPM, _store) if settings.ASSEMBLYAI_RPM else None
+
+def get_rate_limit_stats() -> Dict[str, Any]:
+    return {
+        limiter.name: limiter.stats()
+        for limiter in (gemini_rpm, gemini_tpm, assemblyai_rpm) if limiter is not None
+    }
+
+def provider_blocked_until() -> float:
+    """
+    Latest Retry-After block (epoch seconds) on any provider bucket, 0 when none is blocked.
+    """
+    return max(
+        [limiter.store.blocked_until(limiter.name) for limiter in (gemini_rpm, gemini_tpm, assemblyai_rpm) if limiter is not None],
+        default=0.0
+    )
@@ -0,0 +1,117 @@
+from fastapi import UploadFile
+from app.core.config import settings
+from typing import Dict, Any, Optional, Tuple
+from uuid import uuid4
+import asyncio
+import hashlib
+import os
+import shutil
+
+class UploadTooLargeError(Exception):
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Upload exceeds the {max_bytes} byte limit")
+        self.max_bytes = max_bytes
+
+class StorageService:
+    """
+    Audio is stored content-addressed: `<dest_dir>/<sha256[:2]>/<sha256><ext>`.
+    Identical bytes therefore land on the same path and are stored once.
+    """
+
+    @staticmethod
+    def content_path(dest_dir: str, sha256: str, file_ext: str) -> str:
+        return os.path.join(dest_dir, sha256[:2], f"{sha256}{file_ext.lower()}")
+
+    @staticmethod
+    def _place(part_path: str, final_path: str) -> bool:
+        """
+        Moves a completed temp file into place. Returns True if the content already existed.
+        """
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        if os.path.exists(final_path):
+            os.remove(part_path)
+            return True
+        os.replace(part_path, final_path)
+        return False
+
+    @staticmethod
+    async def save_upload_async(
+        upload: UploadFile,
+        dest_dir: str,
+        file_ext: str,
+        max_bytes: Optional[int] = None,
+        chunk_size: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Streams an upload into content-addressed storage in chunks without blocking the event loop.
+        SHA-256 and byte count are computed in the same pass; the size cap is enforced
+        while streaming and a partial file is never left behind.
+        Returns {"path", "file_size", "sha256", "deduplicated"}.
+        """
+        max_bytes = max_bytes or settings.MAX_UPLOAD_BYTES
+        chunk_size = chunk_size or settings.UPLOAD_CHUNK_BYTES
+        os.makedirs(dest_dir, exist_ok=True)
+
+        part_path = os.path.join(dest_dir, f".{uuid4()}.part") # Renamed into place only when complete
+        hasher = hashlib.sha256()
+        size = 0
+
+        loop = asyncio.get_event_loop()
+        out = await loop.run_in_executor(None, open, part_path, "wb")
+        try:
+            while True:
+                chunk = await upload.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(max_bytes)
+
+                def _write(data=chunk):
+                    hasher.update(data)
+                    out.write(data)
+                await loop.run_in_executor(None, _write)
+
+            await loop.run_in_executor(None, out.close)
+            sha256 = hasher.hexdigest()
+            final_path = StorageService.content_path(dest_dir, sha256, file_ext)
+            deduplicated = await loop.run_in_executor(None, StorageService._place, part_path, final_path)
+        except BaseException:
+            out.close()
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+
+        return {"path": final_path, "file_size": size, "sha256": sha256, "deduplicated": deduplicated}
+
+    @staticmethod
+    def hash_file(path: str, chunk_size: Optional[int] = None) -> Tuple[str, int]:
+        """
+        Returns (sha256, byte count) of a local file, read in chunks.
+        """
+        chunk_size = chunk_size or settings.UPLOAD_CHUNK_BYTES
+        hasher = hashlib.sha256()
+        size = 0
+        with open(path, "rb") as f:
+            while chunk := f.read(chunk_size):
+                hasher.update(chunk)
+                size += len(chunk)
+        return hasher.hexdigest(), size
+
+    @staticmethod
+    def store_local_file(src_path: str, dest_dir: Optional[str] = None, chunk_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Synchronous counterpart for scripts: copies a local file into content-addressed
+        storage (skipping the copy if the content is already stored).
+        """
+        dest_dir = dest_dir or settings.UPLOAD_DIR
+        sha256, size = StorageService.hash_file(src_path, chunk_size)
+        final_path = StorageService.content_path(dest_dir, sha256, os.path.splitext(src_path)[1])
+        deduplicated = os.path.exists(final_path)
+        if not deduplicated:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            part_path = f"{final_path}.{uuid4()}.part"
+            shutil.copyfile(src_path, part_path)
+            os.replace(part_path, final_path)
+
+        return {"path": final_path, "file_size": size, "sha256": sha256, "deduplicated": deduplicated}
@@ -1,56 +1,145 @@
 import assemblyai as aai
 import asyncio
+import hashlib
+import json
+from typing import Dict, Any, Optional
 from app.core.config import settings
+from app.services.cache_service import DiskCache, cache_key
+from app.services.storage_service import StorageService
+from app.services.provider_clients import ProviderClients
+from app.services.executors import stt_executor
+from app.services.transcript_poller import transcript_poller
+from app.services.rate_limiter import assemblyai_rpm, is_rate_limited, retry_after_seconds
 
 # Configure global API key
 aai.settings.api_key = settings.ASSEMBLYAI_API_KEY
+if settings.ASSEMBLYAI_BASE_URL:
+    aai.settings.base_url = settings.ASSEMBLYAI_BASE_URL
+if settings.ASSEMBLYAI_POLLING_INTERVAL_SECONDS:
+    aai.settings.polling_interval = settings.ASSEMBLYAI_POLLING_INTERVAL_SECONDS
+
+# Persistent transcript cache: re-running the accuracy scripts or reprocessing after an
+# LLM failure costs no STT latency or quota.
+transcript_cache = DiskCache(
+    settings.TRANSCRIPT_CACHE_DIR,
+    max_bytes=settings.TRANSCRIPT_CACHE_MAX_BYTES,
+    max_age_seconds=settings.TRANSCRIPT_CACHE_MAX_AGE_SECONDS,
+    name="transcripts"
+)
 
 class AssemblyAIService:
+    name = "assemblyai"
+
     @staticmethod
-    async def transcribe_audio_async(file_path: str, redact_pii: bool = True) -> dict:
+    def _config_params(redact_pii: bool = True) -> Dict[str, Any]:
         """
-        Asynchronously transcibes audio using AssemblyAI with polling.
-        Enables Speaker Diarization and PII Redaction (optional).
+        Single source of truth for the transcription settings, used both to build the
+        TranscriptionConfig and to fingerprint it (see `config_fingerprint`).
         """
-        transcriber = aai.Transcriber()
-        
         # Configure for Medical domain requirements
-        config = aai.TranscriptionConfig(
-            speaker_labels=True,  # Speaker Diarization
-            speakers_expected=2,  # Hint for Doctor + Patient
-            redact_pii=redact_pii,      # PII Redaction (Toggleable)
-            redact_pii_policies=[
+        return {
+            "speaker_labels": True,  # Speaker Diarization
+            "speakers_expected": 2,  # Hint for Doctor + Patient
+            "redact_pii": redact_pii,      # PII Redaction (Toggleable)
+            "redact_pii_policies": [
                 aai.PIIRedactionPolicy.person_name,
                 aai.PIIRedactionPolicy.phone_number,
             ],
-            language_code="en_us",
-            punctuate=True,
-            format_text=True,
+            "language_code": "en_us",
+            "punctuate": True,
+            "format_text": True,
             # Word Boost for Neurology (Accent Adaptation)
-            word_boost=[
-                "Levetiracetam", 
-                "Donepezil", 
-                "Carbamazepine", 
-                "Sumatriptan", 
-                "Topiramate", 
+            "word_boost": [
+                "Levetiracetam",
+                "Donepezil",
+                "Carbamazepine",
+                "Sumatriptan",
+                "Topiramate",
                 "Valproate",
                 "Gabapentin",
                 "Memantine"
             ],
-            boost_param="high"
-        )
+            "boost_param": "high"
+        }
 
-        # 1. Transcribe (Blocking call offloaded to thread)
-        # transcriber.transcribe() handles polling internally.
+    @staticmethod
+    def config_fingerprint(redact_pii: bool = True) -> str:
+        """
+        Stable hash of the transcription settings. Two transcripts of the same audio are
+        interchangeable only if their fingerprints match.
+        """
+        params = AssemblyAIService._config_params(redact_pii)
+        params["redact_pii_policies"] = [p.value for p in params["redact_pii_policies"]]
+        canonical = json.dumps({"provider": "assemblyai", **params}, sort_keys=True)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    async def transcribe_audio_async(file_path: str, redact_pii: bool = True, audio_hash: Optional[str] = None) -> dict:
+        """
+        Asynchronously transcibes audio using AssemblyAI with polling.
+        Enables Speaker Diarization and PII Redaction (optional).
+        Results are cached by (audio SHA-256, config fingerprint); pass `audio_hash` when
+        already known to skip re-hashing the file.
+        """
         loop = asyncio.get_event_loop()
-        transcript = await loop.run_in_executor(
-            None,
-            lambda: transcriber.transcribe(file_path, config=config)
-        )
-            
+        key = None
+        if settings.TRANSCRIPT_CACHE_ENABLED:
+            if audio_hash is None:
+                audio_hash, _ = await loop.run_in_executor(None, StorageService.hash_file, file_path)
+            key = cache_key(audio_hash, AssemblyAIService.config_fingerprint(redact_pii))
+            cached = await loop.run_in_executor(None, transcript_cache.get, key)
+            if cached is not None:
+                return cached
+
+        result = await AssemblyAIService._transcribe(file_path, redact_pii)
+        if key is not None:
+            await loop.run_in_executor(None, transcript_cache.set, key, result)
+        return result
+
+    @staticmethod
+    async def _transcribe(file_path: str, redact_pii: bool) -> dict:
+        transcriber = ProviderClients.transcriber()
+        config = aai.TranscriptionConfig(**AssemblyAIService._config_params(redact_pii))
+        submit_only = settings.STT_MODE == "async"
+        if submit_only and settings.STT_WEBHOOK_URL and settings.STT_WEBHOOK_SECRET:
+            config.set_webhook(settings.STT_WEBHOOK_URL, "X-Webhook-Secret", settings.STT_WEBHOOK_SECRET)
+
+        # 1. Transcribe (Blocking call offloaded to the bounded STT pool)
+        # transcriber.transcribe() handles polling internally; in async mode the thread is
+        # only held for upload + submit and the shared poller waits for completion.
+        if assemblyai_rpm:
+            await assemblyai_rpm.acquire()
+        try:
+            transcript = await stt_executor.run(
+                transcriber.submit if submit_only else transcriber.transcribe,
+                file_path,
+                config=config
+            )
+        except Exception as e:
+            if assemblyai_rpm and is_rate_limited(e):
+                await assemblyai_rpm.penalize(retry_after_seconds(e))
+            raise
+
         if transcript.status == aai.TranscriptStatus.error:
             raise Exception(f"Transcription failed: {transcript.error}")
-            
+
+        if submit_only:
+            data = await transcript_poller.wait(transcript.id)
+            return {
+                "text": data.get("text"),
+                "utterances": [
+                    {
+                        "speaker": u["speaker"],
+                        "text": u["text"],
+                        "start": u["start"],
+                        "end": u["end"]
+                    } for u in data.get("utterances") or []
+                ],
+                "confidence": data.get("confidence"),
+                "audio_duration": data.get("audio_duration"),
+                "id": data["id"]
+            }
+
         return {
             "text": transcript.text,
             "utterances": [
@@ -62,5 +151,6 @@ class AssemblyAIService:
                 } for u in transcript.utterances
             ] if transcript.utterances else [],
             "confidence": transcript.confidence,
+            "audio_duration": transcript.audio_duration,
             "id": transcript.id
         }
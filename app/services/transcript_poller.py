@@ -0,0 +1,192 @@
+from datetime import datetime, timedelta
+from sqlmodel import select, delete
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Any, Dict, Optional
+import assemblyai as aai
+import asyncio
+import httpx
+import time
+from app.core.config import settings
+from app.core.db import async_engine
+from app.models.base import SttCallback
+
+class TranscriptPoller:
+    """
+    Waits for submitted AssemblyAI transcripts from a single asyncio loop.
+
+    Every outstanding transcript id shares one polling task and one keep-alive
+    httpx.AsyncClient, so hundreds of in-flight transcriptions cost one coroutine each
+    (the awaiting caller) instead of one blocked thread each. Each transcript is polled
+    at an interval that grows from STT_POLL_MIN_INTERVAL_SECONDS to
+    STT_POLL_MAX_INTERVAL_SECONDS. With webhooks configured, completions recorded by
+    POST /api/v1/webhooks/assemblyai (in any process) are picked up with one query per
+    tick, and HTTP polling only acts as a slow fallback.
+    """
+    POLL_CONCURRENCY = 16
+    CALLBACK_RETENTION = timedelta(days=1)
+
+    def __init__(self, min_interval: float, max_interval: float, timeout: float, use_callbacks: bool):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.timeout = timeout
+        self.use_callbacks = use_callbacks
+        self.polls = 0
+        self.completed = 0
+        self.failed = 0
+        self.callbacks = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Dict[str, Dict[str, Any]] = {}
+
+    def _bind(self) -> None:
+        # State is tied to the event loop it was created on (one per worker process)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._pending = {}
+            self._task: Optional[asyncio.Task] = None
+            self._wake = asyncio.Event()
+            self._http: Optional[httpx.AsyncClient] = None
+
+    def _client(self) -> httpx.AsyncClient:
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=aai.settings.base_url,
+                headers={"authorization": aai.settings.api_key},
+                timeout=aai.settings.http_timeout
+            )
+        return self._http
+
+    async def wait(self, transcript_id: str) -> Dict[str, Any]:
+        """
+        Waits until the transcript completes and returns its JSON body.
+        Raises if the transcript errors or takes longer than STT_POLL_TIMEOUT_SECONDS.
+        """
+        self._bind()
+        now = time.monotonic()
+        interval = self.max_interval if self.use_callbacks else self.min_interval
+        future = self._loop.create_future()
+        self._pending[transcript_id] = {
+            "future": future,
+            "interval": interval,
+            "due": now + interval,
+            "deadline": now + self.timeout,
+        }
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        self._wake.set()
+        try:
+            return await future
+        finally:
+            self._pending.pop(transcript_id, None)
+
+    def _resolve(self, transcript_id: str, result: Any = None, error: Optional[Exception] = None) -> None:
+        pending = self._pending.pop(transcript_id, None)
+        if pending is None or pending["future"].done():
+            return
+        if error is not None:
+            self.failed += 1
+            pending["future"].set_exception(error)
+        else:
+            self.completed += 1
+            pending["future"].set_result(result)
+
+    def _backoff(self, transcript_id: str, delay: Optional[float] = None) -> None:
+        pending = self._pending.get(transcript_id)
+        if pending is None:
+            return
+        now = time.monotonic()
+        if now > pending["deadline"]:
+            self._resolve(transcript_id, error=TimeoutError(f"Transcript {transcript_id} not ready after {self.timeout}s"))
+            return
+        pending["interval"] = min(self.max_interval, pending["interval"] * 1.5)
+        pending["due"] = now + max(pending["interval"], delay or 0.0)
+
+    async def _poll(self, transcript_id: str, semaphore: asyncio.Semaphore) -> None:
+        async with semaphore:
+            try:
+                response = await self._client().get(f"/v2/transcript/{transcript_id}")
+            except httpx.HTTPError as e:
+                print(f"   (AssemblyAI) Poll of {transcript_id} failed: {e}. Retrying...")
+                self._backoff(transcript_id)
+                return
+        self.polls += 1
+
+        if response.status_code == 429 or response.status_code >= 500:
+            try:
+                retry_after = float(response.headers.get("retry-after", 0))
+            except ValueError:
+                retry_after = None
+            self._backoff(transcript_id, retry_after)
+            return
+        if response.status_code != 200:
+            self._resolve(transcript_id, error=Exception(f"Polling transcript {transcript_id} failed: HTTP {response.status_code}"))
+            return
+
+        data = response.json()
+        if data.get("status") == "completed":
+            self._resolve(transcript_id, result=data)
+        elif data.get("status") == "error":
+            self._resolve(transcript_id, error=Exception(f"Transcription failed: {data.get('error')}"))
+        else:
+            self._backoff(transcript_id)
+
+    async def _apply_callbacks(self) -> None:
+        try:
+            async with AsyncSession(async_engine, expire_on_commit=False) as session:
+                ids = list(self._pending)
+                rows = (await session.exec(select(SttCallback).where(SttCallback.transcript_id.in_(ids)))).all()
+                for row in rows:
+                    self.callbacks += 1
+                    pending = self._pending.get(row.transcript_id)
+                    if pending is not None:
+                        pending["due"] = 0.0 # Fetch the result on this tick
+                    await session.delete(row)
+                # Drop callbacks for transcripts that finished via fallback polling
+                await session.exec(delete(SttCallback).where(SttCallback.received_at < datetime.utcnow() - self.CALLBACK_RETENTION))
+                await session.commit()
+        except Exception as e:
+            print(f"   (AssemblyAI) Reading webhook callbacks failed: {e}")
+
+    async def _run(self) -> None:
+        semaphore = asyncio.Semaphore(self.POLL_CONCURRENCY)
+        next_callback_check = 0.0
+        try:
+            while self._pending:
+                now = time.monotonic()
+                if self.use_callbacks and now >= next_callback_check:
+                    await self._apply_callbacks()
+                    next_callback_check = now + self.min_interval
+
+                due = [tid for tid, pending in self._pending.items() if pending["due"] <= now]
+                if due:
+                    await asyncio.gather(*(self._poll(tid, semaphore) for tid in due))
+                    continue
+
+                wake_at = min(pending["due"] for pending in self._pending.values())
+                if self.use_callbacks:
+                    wake_at = min(wake_at, next_callback_check)
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=max(0.0, wake_at - now))
+                except asyncio.TimeoutError:
+                    pass
+        except Exception as e:
+            # Never leave callers waiting on a dead loop
+            for transcript_id in list(self._pending):
+                self._resolve(transcript_id, error=e)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._pending),
+            "polls": self.polls,
+            "completed": self.completed,
+            "failed": self.failed,
+            "webhook_callbacks": self.callbacks,
+        }
+
+transcript_poller = TranscriptPoller(
+    settings.STT_POLL_MIN_INTERVAL_SECONDS,
+    settings.STT_POLL_MAX_INTERVAL_SECONDS,
+    settings.STT_POLL_TIMEOUT_SECONDS,
+    use_callbacks=bool(settings.STT_WEBHOOK_URL and settings.STT_WEBHOOK_SECRET)
+)
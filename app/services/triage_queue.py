@@ -0,0 +1,224 @@
+from sqlalchemy import Integer, delete, event, insert
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session as OrmSession
+from sqlalchemy.sql.functions import FunctionElement
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+from app.core.config import settings
+from app.services.cache_service import ResponseCache
+from app.models.base import Consultation, ConsultationStatus, PatientProfile, TriageCategory, TriageQueueEntry
+
+class minutes_since(FunctionElement):
+    """
+    Whole minutes from a (naive UTC) timestamp column to the database's current time, so
+    wait times are computed by the query instead of per row in Python.
+    """
+    type = Integer()
+    inherit_cache = True
+
+@compiles(minutes_since)
+def _minutes_since_postgresql(element, compiler, **kw):
+    return "CAST(FLOOR(EXTRACT(EPOCH FROM (TIMEZONE('utc', NOW()) - %s)) / 60) AS INTEGER)" % compiler.process(element.clauses, **kw)
+
+@compiles(minutes_since, "sqlite")
+def _minutes_since_sqlite(element, compiler, **kw):
+    return "CAST((julianday('now') - julianday(%s)) * 1440 AS INTEGER)" % compiler.process(element.clauses, **kw)
+
+# Rendered /dashboard/queue and /queue/failed responses; every queue change invalidates it
+dashboard_cache = ResponseCache(settings.DASHBOARD_CACHE_MAX_ENTRIES, settings.DASHBOARD_CACHE_TTL_SECONDS, name="dashboard")
+
+_QUEUE_CHANGED = "dashboard_queue_changed"
+
+# Invalidate once the change is visible: a request that reads between an earlier
+# invalidation and the commit would cache the old queue for the whole TTL
+@event.listens_for(OrmSession, "after_commit")
+def _invalidate_after_commit(session) -> None:
+    if session.info.pop(_QUEUE_CHANGED, False):
+        dashboard_cache.invalidate()
+
+@event.listens_for(OrmSession, "after_rollback")
+def _forget_rolled_back_change(session) -> None:
+    session.info.pop(_QUEUE_CHANGED, None)
+
+class TriageQueueService:
+    """
+    Maintains `triage_queue_entries`, the dashboard queue projection: one row per COMPLETED
+    consultation with its sort keys. Entries are added/removed in the same transaction as
+    the status change, so the dashboard reads the top K rows off ix_triage_queue_order
+    instead of scanning and sorting every completed consultation.
+
+    Every code path that moves a consultation into COMPLETED must call `enter` (or
+    `enter_async`), and every path that moves one out must call `leave` (or `leave_async`)
+    first. Both are idempotent and invalidate dashboard_cache when the caller's
+    transaction commits.
+    """
+
+    @staticmethod
+    def changed(session) -> None:
+        """
+        Invalidates dashboard_cache when `session` (sync or async) commits. For changes to
+        the failed queue that don't go through `enter` / `leave`.
+        """
+        session.info[_QUEUE_CHANGED] = True
+
+    @staticmethod
+    def entry_for(consultation: Consultation) -> TriageQueueEntry:
+        return TriageQueueEntry(
+            consultation_id=consultation.id,
+            patient_id=consultation.patient_id,
+            doctor_id=consultation.doctor_id,
+            urgency_score=consultation.urgency_score or 0,
+            triage_category=consultation.triage_category,
+            safety_warning_count=len(consultation.safety_warnings or []),
+            created_at=consultation.created_at
+        )
+
+    @staticmethod
+    def _remove_statement(consultation_id: UUID):
+        return delete(TriageQueueEntry).where(TriageQueueEntry.consultation_id == consultation_id)
+
+    @staticmethod
+    def _insert_statement(consultation: Consultation):
+        return insert(TriageQueueEntry).values(**TriageQueueService.entry_for(consultation).dict())
+
+    @staticmethod
+    def enter(session: Session, consultation: Consultation) -> None:
+        """
+        Writes the consultation's entry (caller commits). Replaces any existing one, so
+        entering twice (e.g. a run that completes after being reclaimed) can't trip the key.
+        """
+        session.execute(TriageQueueService._remove_statement(consultation.id))
+        session.execute(TriageQueueService._insert_statement(consultation))
+        TriageQueueService.changed(session)
+
+    @staticmethod
+    async def enter_async(session: AsyncSession, consultation: Consultation) -> None:
+        """
+        AsyncSession variant of `enter`.
+        """
+        await session.execute(TriageQueueService._remove_statement(consultation.id))
+        await session.execute(TriageQueueService._insert_statement(consultation))
+        TriageQueueService.changed(session)
+
+    @staticmethod
+    def leave(session: Session, consultation: Consultation) -> None:
+        """
+        Removes the consultation from the queue before its status changes (caller commits).
+        Deletes by id whatever the current status, so an entry left behind by an earlier
+        ordering slip is cleaned up too.
+        """
+        TriageQueueService.changed(session) # The failed queue may change too
+        session.execute(TriageQueueService._remove_statement(consultation.id))
+
+    @staticmethod
+    async def leave_async(session: AsyncSession, consultation: Consultation) -> None:
+        """
+        AsyncSession variant of `leave`.
+        """
+        TriageQueueService.changed(session)
+        await session.execute(TriageQueueService._remove_statement(consultation.id))
+
+    @staticmethod
+    def leave_many(session: Session, consultation_ids: List[UUID]) -> None:
+        """
+        `leave` for consultations whose status is changed by a bulk UPDATE (caller commits).
+        """
+        TriageQueueService.changed(session)
+        if consultation_ids:
+            session.execute(delete(TriageQueueEntry).where(TriageQueueEntry.consultation_id.in_(consultation_ids)))
+
+    @staticmethod
+    def top_query(limit: int, offset: int = 0, doctor_id: Optional[UUID] = None, triage_category: Optional[TriageCategory] = None):
+        """
+        Rows `offset` to `offset + limit` of the queue in order (urgency DESC, then longest
+        waiting), optionally for one doctor / triage category, with the patient's name and
+        the wait time. Cost depends on `offset + limit`, not on the history size.
+        """
+        query = (
+            select(
+                TriageQueueEntry.consultation_id, PatientProfile.first_name, PatientProfile.last_name,
+                TriageQueueEntry.urgency_score, TriageQueueEntry.triage_category, TriageQueueEntry.safety_warning_count,
+                minutes_since(TriageQueueEntry.created_at).label("wait_time_minutes")
+            )
+            .join(PatientProfile, TriageQueueEntry.patient_id == PatientProfile.user_id)
+        )
+        if doctor_id is not None:
+            query = query.where(TriageQueueEntry.doctor_id == doctor_id)
+        if triage_category is not None:
+            query = query.where(TriageQueueEntry.triage_category == triage_category)
+        return query.order_by(TriageQueueEntry.urgency_score.desc(), TriageQueueEntry.created_at.asc()).offset(offset).limit(limit)
+
+    @staticmethod
+    def failed_query(limit: int, offset: int = 0, doctor_id: Optional[UUID] = None, triage_category: Optional[TriageCategory] = None):
+        """
+        Consultations flagged for manual review, newest first, with the patient's name and
+        the wait time. Served by the partial index ix_consultations_manual_review.
+        """
+        query = (
+            select(
+                Consultation.id, PatientProfile.first_name, PatientProfile.last_name,
+                minutes_since(Consultation.created_at).label("wait_time_minutes")
+            )
+            .join(PatientProfile, Consultation.patient_id == PatientProfile.user_id)
+            .where(Consultation.requires_manual_review == True)
+        )
+        if doctor_id is not None:
+            query = query.where(Consultation.doctor_id == doctor_id)
+        if triage_category is not None:
+            query = query.where(Consultation.triage_category == triage_category)
+        return query.order_by(Consultation.created_at.desc()).offset(offset).limit(limit)
+
+    @staticmethod
+    def queue_item(row) -> Dict[str, Any]:
+        return {
+            "consultation_id": str(row.consultation_id),
+            "patient_name": f"{row.first_name} {row.last_name}",
+            "urgency_score": row.urgency_score,
+            "triage_category": row.triage_category,
+            "wait_time_minutes": row.wait_time_minutes,
+            "safety_warnings": row.safety_warning_count
+        }
+
+    @staticmethod
+    def failed_item(row) -> Dict[str, Any]:
+        return {
+            "patient_name": f"{row.first_name} {row.last_name}",
+            "consultation_id": str(row.id),
+            "reason": "AI Processing Failed (Quota/Error)",
+            "wait_time": f"{row.wait_time_minutes} min",
+            "status": "REQUIRES_REVIEW"
+        }
+
+    @staticmethod
+    async def snapshot_async(session: AsyncSession, limit: int) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        The top `limit` items of the triage queue and of the failed queue, as served by
+        the dashboard endpoints.
+        """
+        queue = (await session.exec(TriageQueueService.top_query(limit))).all()
+        failed = (await session.exec(TriageQueueService.failed_query(limit))).all()
+        return {
+            "queue": [TriageQueueService.queue_item(row) for row in queue],
+            "failed": [TriageQueueService.failed_item(row) for row in failed],
+        }
+
+    @staticmethod
+    def rebuild(session: Session, batch_size: int = 1000) -> int:
+        """
+        Recomputes the projection from the consultations table (initial fill, repair) in
+        batched inserts. Commits; returns the number of entries.
+        """
+        session.execute(delete(TriageQueueEntry))
+        completed = session.exec(
+            select(Consultation.id, Consultation.patient_id, Consultation.doctor_id, Consultation.urgency_score, Consultation.triage_category,
+                   Consultation.safety_warnings, Consultation.created_at)
+            .where(Consultation.status == ConsultationStatus.COMPLETED)
+        ).all()
+        for start in range(0, len(completed), batch_size):
+            rows = [TriageQueueService.entry_for(row).dict() for row in completed[start:start + batch_size]]
+            session.execute(insert(TriageQueueEntry), rows)
+        TriageQueueService.changed(session)
+        session.commit()
+        return len(completed)
@@ -0,0 +1,131 @@
+"""
+Standalone consultation processing worker.
+
+Usage:
+    python -m app.worker                # settings.WORKER_CONCURRENCY concurrent jobs
+    python -m app.worker --concurrency 8
+
+Runs independently of the API (uvicorn) processes: claims jobs from the
+`processing_jobs` table with leases, heartbeats while the STT + LLM pipeline runs,
+and re-queues or fails jobs on error. Killing a worker mid-job is safe; its lease
+lapses and another worker picks the job up.
+"""
+import argparse
+import asyncio
+import os
+import signal
+import socket
+from sqlmodel import Session
+from app.core.config import settings
+from app.core.db import engine, init_db
+from app.core.metrics import mark_process_dead
+from app.services.job_queue import JobQueueService
+from app.services.consultation_processor import process_consultation_flow
+from app.services.provider_clients import ProviderClients
+
+def _db_call(fn, *args):
+    # Queue bookkeeping is a short synchronous transaction; keep it off the event loop
+    def _run():
+        with Session(engine) as session:
+            return fn(session, *args)
+    return asyncio.get_event_loop().run_in_executor(None, _run)
+
+async def _heartbeat(job_id, worker_id: str, lost: asyncio.Event, flow: asyncio.Task):
+    """
+    Renews the lease every JOB_HEARTBEAT_SECONDS. Once the lease is gone (reclaimed, or
+    renewals kept failing until it may have lapsed) the flow is cancelled, so two workers
+    never run the same consultation.
+    """
+    loop = asyncio.get_event_loop()
+    renewed_at = loop.time()
+    while True:
+        await asyncio.sleep(settings.JOB_HEARTBEAT_SECONDS)
+        try:
+            still_ours = await _db_call(JobQueueService.heartbeat, job_id, worker_id)
+        except Exception as e: # Transient DB error, "database is locked"...
+            print(f"[{worker_id}] Heartbeat for job {job_id} failed: {e}")
+            # Retry on the next beat only while that still lands inside the lease
+            still_ours = loop.time() - renewed_at + settings.JOB_HEARTBEAT_SECONDS < settings.JOB_LEASE_SECONDS
+            if still_ours:
+                continue
+        if not still_ours:
+            print(f"[{worker_id}] Lost lease on job {job_id}")
+            lost.set()
+            flow.cancel()
+            return
+        renewed_at = loop.time()
+
+async def _run_job(job, worker_id: str):
+    lost = asyncio.Event()
+    print(f"[{worker_id}] Running job {job.id} (consultation {job.consultation_id}, attempt {job.attempts})")
+    flow = asyncio.create_task(process_consultation_flow(job.consultation_id, queued_at=job.available_at, raise_errors=True))
+    heartbeat = asyncio.create_task(_heartbeat(job.id, worker_id, lost, flow))
+    try:
+        await flow
+    except asyncio.CancelledError:
+        if not lost.is_set():
+            raise # The worker itself is being cancelled
+        print(f"[{worker_id}] Abandoned job {job.id}: its lease is gone")
+        return
+    except Exception as e:
+        print(f"[{worker_id}] Job {job.id} failed: {e}")
+        if not lost.is_set():
+            await _db_call(JobQueueService.fail, job.id, worker_id, str(e))
+        return
+    finally:
+        heartbeat.cancel()
+
+    if not lost.is_set():
+        await _db_call(JobQueueService.complete, job.id, worker_id)
+
+async def _slot_loop(worker_id: str, stop: asyncio.Event):
+    while not stop.is_set():
+        job = await _db_call(JobQueueService.claim_next, worker_id)
+        if job is None:
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=settings.JOB_POLL_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        await _run_job(job, worker_id)
+
+async def _sweep_loop(stop: asyncio.Event):
+    while not stop.is_set():
+        failed = await _db_call(JobQueueService.fail_expired)
+        if failed:
+            print(f"Marked {failed} expired job(s) as FAILED")
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=settings.JOB_LEASE_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+async def run_worker(concurrency: int):
+    init_db()
+    if settings.PROVIDER_WARMUP_ON_STARTUP:
+        await asyncio.get_event_loop().run_in_executor(None, ProviderClients.warm_up)
+    stop = asyncio.Event()
+    loop = asyncio.get_event_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError: # Windows
+            pass
+
+    base_id = f"{socket.gethostname()}:{os.getpid()}"
+    print(f"Worker {base_id} started with {concurrency} slot(s)")
+    tasks = [asyncio.create_task(_slot_loop(f"{base_id}:{i}", stop)) for i in range(concurrency)]
+    tasks.append(asyncio.create_task(_sweep_loop(stop)))
+
+    # Slots finish their current job before exiting (graceful drain on SIGTERM)
+    await asyncio.gather(*tasks)
+    mark_process_dead()
+    print(f"Worker {base_id} stopped")
+
+def main():
+    parser = argparse.ArgumentParser(description="NeuroAssist consultation processing worker")
+    parser.add_argument("--concurrency", type=int, default=settings.WORKER_CONCURRENCY, help="Number of jobs processed concurrently")
+    args = parser.parse_args()
+    asyncio.run(run_worker(args.concurrency))
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,5 @@
 import asyncio
 import os
-import shutil
 import csv
 import glob
 from uuid import uuid4
@@ -8,6 +7,8 @@ from datetime import datetime, timezone
 from sqlmodel import Session, select, create_engine, SQLModel
 from app.models.base import Consultation, AudioFile, PatientProfile, User, SOAPNote, ConsultationStatus, AudioUploaderType, UserRole, Appointment, AppointmentStatus
 from app.services.consultation_processor import process_consultation_flow
+from app.services.storage_service import StorageService
+from app.services.rate_limiter import gemini_rpm
 from app.core.config import settings
 
 # Setup DB for Batch Run
@@ -22,12 +23,9 @@ async def process_single_file(file_path):
     filename = os.path.basename(file_path)
     print(f"Processing: {filename}...")
     
-    # 1. Simulate Upload
-    upload_dir = "uploads"
-    os.makedirs(upload_dir, exist_ok=True)
-    unique_name = f"{uuid4()}_{filename}"
-    dest_path = os.path.join(upload_dir, unique_name)
-    shutil.copy(file_path, dest_path)
+    # 1. Simulate Upload (content-addressed: re-runs reuse the stored file and its transcription)
+    stored = StorageService.store_local_file(file_path)
+    dest_path = stored["path"]
     
     cid = None
     
@@ -64,6 +62,8 @@ async def process_single_file(file_path):
             audio_file = AudioFile(
                 consultation_id=consultation.id,
                 file_url=dest_path,
+                file_size=stored["file_size"],
+                content_hash=stored["sha256"],
                 uploaded_by=AudioUploaderType.PATIENT,
                 file_name=filename
             )
@@ -144,10 +144,12 @@ async def main():
                     dict_writer.writeheader()
                     dict_writer.writerows(results)
                 print(f"Progress saved to {REPORT_FILE}")
-        
-        # RATE LIMIT THROTTLE: Sleep 10s between files to respect Free Tier Limits
-        print("Sleeping 10s to avoid rate limits...")
-        time.sleep(10)
+
+        # RATE LIMIT THROTTLE: without GEMINI_RPM nothing paces the calls, so sleep 10s
+        # between files to respect Free Tier Limits
+        if gemini_rpm is None:
+            print("Sleeping 10s to avoid rate limits (set GEMINI_RPM to pace calls instead)...")
+            await asyncio.sleep(10)
 
     print(f"\nBatch processing complete. Report saved to {REPORT_FILE}")
 
@@ -0,0 +1,161 @@
+"""
+Read-path load driver for the hottest dashboard/portal endpoints.
+
+Runs each endpoint for --duration seconds at --concurrency in-flight requests (one phase
+per endpoint, so percentiles are not mixed) against a running API seeded with
+benchmarks/seed_dataset.py, and reports RPS, p50/p95/p99, errors and response size.
+
+Usage:
+    python -m benchmarks.seed_dataset --scale 100k --manifest seed_manifest.json
+    uvicorn app.main:app --workers 4 &
+    python -m benchmarks.api_load --manifest seed_manifest.json --concurrency 32 --duration 30 --output read_path.json
+
+Tokens are minted locally with the API's JWT_SECRET (no login round-trips), so run the
+driver with the same .env / JWT_SECRET as the server.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.stats import summarize
+
+# name -> (path, role whose tokens are used)
+ENDPOINTS = {
+    "dashboard_queue": ("/api/v1/dashboard/queue", "DOCTOR"),
+    "appointments_me_patient": ("/api/v1/appointments/me", "PATIENT"),
+    "appointments_me_doctor": ("/api/v1/appointments/me", "DOCTOR"),
+    "consultations_me_patient": ("/api/v1/consultations/me", "PATIENT"),
+    "consultations_me_doctor": ("/api/v1/consultations/me", "DOCTOR"),
+}
+
+def mint_tokens(users: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    from app.core.security import create_access_token
+    return {role: [create_access_token(user_id, role) for user_id in ids] for role, ids in users.items()}
+
+async def run_endpoint(
+    client: httpx.AsyncClient,
+    path: str,
+    tokens: List[str],
+    concurrency: int,
+    duration: float,
+    warmup: float = 0.0,
+    seed: int = 0,
+    clock: Callable[[], float] = time.perf_counter
+) -> Dict[str, Any]:
+    """
+    Keeps `concurrency` requests to `path` in flight for `duration` seconds (after an
+    unmeasured `warmup`), each with a random token, and summarizes the measured ones.
+    """
+    rng = random.Random(seed)
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    response_bytes = 0
+    measuring = False
+
+    async def worker(deadline: float) -> None:
+        nonlocal response_bytes
+        while clock() < deadline:
+            headers = {"Authorization": f"Bearer {rng.choice(tokens)}"} if tokens else {}
+            start = clock()
+            try:
+                response = await client.get(path, headers=headers)
+                status = str(response.status_code)
+                size = len(response.content)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+                size = 0
+            if not measuring:
+                continue
+            latencies.append(clock() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+            response_bytes += size
+
+    if warmup > 0:
+        await asyncio.gather(*(worker(clock() + warmup) for _ in range(concurrency)))
+    measuring = True
+    started = clock()
+    await asyncio.gather(*(worker(started + duration) for _ in range(concurrency)))
+    elapsed = clock() - started
+
+    errors = sum(count for status, count in statuses.items() if not status.startswith("2"))
+    return {
+        "path": path,
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "errors": errors,
+        "statuses": statuses,
+        "mean_response_kb": response_bytes / len(latencies) / 1024 if latencies else 0.0,
+        "latency": summarize(latencies),
+    }
+
+async def run(
+    base_url: str,
+    endpoints: List[str],
+    tokens: Dict[str, List[str]],
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    timeout: float,
+    transport: Optional[httpx.AsyncBaseTransport] = None
+) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    results = {}
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout, transport=transport) as client:
+        for name in endpoints:
+            path, role = ENDPOINTS[name]
+            print(f"{name}: {concurrency} concurrent for {duration}s...")
+            results[name] = await run_endpoint(client, path, tokens.get(role, []), concurrency, duration, warmup)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Read-path API load benchmark")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--manifest", default="seed_manifest.json", help="Written by benchmarks.seed_dataset")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help=f"Comma-separated subset of: {', '.join(ENDPOINTS)}")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds per endpoint")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds per endpoint")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout (s)")
+    parser.add_argument("--output", default=None, help="Write results JSON here")
+    args = parser.parse_args()
+
+    endpoints = [name.strip() for name in args.endpoints.split(",") if name.strip()]
+    unknown = [name for name in endpoints if name not in ENDPOINTS]
+    if unknown:
+        parser.error(f"Unknown endpoints: {', '.join(unknown)}")
+
+    with open(args.manifest) as f:
+        manifest = json.load(f)
+    # Settings need a DATABASE_URL to import; only JWT_SECRET matters for minting tokens
+    os.environ.setdefault("DATABASE_URL", "sqlite://")
+    tokens = mint_tokens(manifest["users"])
+
+    results = asyncio.run(run(args.base_url, endpoints, tokens, args.concurrency, args.duration, args.warmup, args.timeout))
+
+    print(f"\n{'endpoint':<28}{'requests':>9}{'rps':>9}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'KB/resp':>10}")
+    for name, result in results.items():
+        latency = result["latency"]
+        print(f"{name:<28}{result['requests']:>9}{result['rps']:>9.1f}{result['errors']:>8}"
+              f"{latency['p50_ms']:>10.1f}{latency['p95_ms']:>10.1f}{latency['p99_ms']:>10.1f}{result['mean_response_kb']:>10.1f}")
+
+    if args.output:
+        report = {
+            "endpoints": results,
+            "config": {key: getattr(args, key) for key in ("base_url", "concurrency", "duration", "warmup")},
+            "dataset": {"shape": manifest.get("shape"), "seed": manifest.get("seed")},
+            "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        }
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Checks that the hot read queries (dashboard queues and the keyset-paginated listings)
+are planned as index scans on the indexes added by migrations 0003 and 0004.
+
+Each query is built by the same function the endpoint uses and EXPLAINed against the
+configured database (EXPLAIN QUERY PLAN on SQLite, EXPLAIN (FORMAT JSON) on PostgreSQL).
+On PostgreSQL sequential scans are disabled for the check, so a small or empty database
+still shows whether the index is usable; run it against a seeded database
+(benchmarks/seed_dataset.py) to see the plans the planner actually picks.
+
+Usage:
+    alembic upgrade head
+    python -m benchmarks.explain_queries [--database-url ...] [--verbose]
+
+Exits non-zero when a query does not use its expected index.
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+from uuid import uuid4
+
+from sqlalchemy import event
+
+def _page(cursor: bool):
+    from app.api.pagination import PageParams, encode_cursor
+    return PageParams(
+        limit=50,
+        cursor=encode_cursor(datetime(2030, 1, 1), uuid4()) if cursor else None,
+        date_from=None,
+        date_to=None,
+        order="desc"
+    )
+
+def hot_queries() -> Dict[str, Tuple[Any, str]]:
+    """
+    name -> (statement, index it must use). Listings are checked on a deep page (with a
+    cursor), which is the case OFFSET pagination used to get wrong.
+    """
+    from sqlmodel import select
+    from app.api.pagination import keyset_statement
+    from app.models.base import Appointment, Consultation
+    from app.services.triage_queue import TriageQueueService
+
+    user_id = uuid4()
+    page = _page(cursor=True)
+
+    def appointments(*where):
+        return keyset_statement(select(Appointment).where(*where), Appointment.scheduled_at, Appointment.id, page)
+
+    def consultations(*where):
+        return keyset_statement(select(Consultation).where(*where), Consultation.created_at, Consultation.id, page)
+
+    return {
+        "dashboard_queue": (TriageQueueService.top_query(page.limit), "ix_triage_queue_order"),
+        "dashboard_queue_doctor": (TriageQueueService.top_query(page.limit, doctor_id=user_id), "ix_triage_queue_doctor"),
+        "dashboard_failed_queue": (TriageQueueService.failed_query(page.limit), "ix_consultations_manual_review"),
+        "appointments_me_patient": (appointments(Appointment.patient_id == user_id), "ix_appointments_patient_scheduled"),
+        "appointments_me_doctor": (appointments(Appointment.doctor_id == user_id), "ix_appointments_doctor_scheduled"),
+        "appointments_me_front_desk": (appointments(), "ix_appointments_scheduled"),
+        "consultations_me_patient": (consultations(Consultation.patient_id == user_id), "ix_consultations_patient_created"),
+        "consultations_me_doctor": (consultations(Consultation.doctor_id == user_id), "ix_consultations_doctor_created"),
+        "consultations_me_front_desk": (consultations(), "ix_consultations_created"),
+    }
+
+def _json_plan_indexes(node: Dict[str, Any]) -> List[str]:
+    names = [node["Index Name"]] if "Index Name" in node else []
+    for child in node.get("Plans", []):
+        names += _json_plan_indexes(child)
+    return names
+
+def explain(conn, statement) -> Tuple[List[str], str]:
+    """
+    Returns (indexes used, readable plan) for `statement`. The EXPLAIN prefix is added
+    to the compiled SQL at cursor level, so bind parameters are processed exactly as
+    when the endpoint runs the query.
+    """
+    sqlite = conn.dialect.name == "sqlite"
+    prefix = "EXPLAIN QUERY PLAN " if sqlite else "EXPLAIN (FORMAT JSON) "
+
+    def add_prefix(conn, cursor, sql, parameters, context, executemany):
+        return prefix + sql, parameters
+
+    event.listen(conn, "before_cursor_execute", add_prefix, retval=True)
+    try:
+        cursor_result = conn.execute(statement)
+        raw = cursor_result.cursor.fetchall()
+    finally:
+        event.remove(conn, "before_cursor_execute", add_prefix)
+
+    if sqlite:
+        # (id, parent, notused, detail), e.g. "SEARCH consultations USING INDEX ix_... (status=?)"
+        details = [row[3] for row in raw]
+        used = [word for detail in details for word in detail.replace("(", " ").split() if word.startswith("ix_")]
+        return used, "\n".join(details)
+    plan = raw[0][0]
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    return _json_plan_indexes(plan[0]["Plan"]), json.dumps(plan[0]["Plan"], indent=2)
+
+def check(engine) -> Dict[str, Dict[str, Any]]:
+    """
+    EXPLAINs every hot query; returns name -> {"expected", "used", "ok", "plan"}.
+    """
+    results = {}
+    with engine.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.exec_driver_sql("SET enable_seqscan = off")
+        for name, (statement, expected) in hot_queries().items():
+            used, plan = explain(conn, statement)
+            results[name] = {"expected": expected, "used": used, "ok": expected in used, "plan": plan}
+        conn.rollback()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that hot read queries use their indexes")
+    parser.add_argument("--database-url", default=None, help="Defaults to DATABASE_URL")
+    parser.add_argument("--verbose", action="store_true", help="Print every plan")
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("JWT_SECRET", "benchmark")
+    from app.core.db import engine
+
+    results = check(engine)
+    for name, result in results.items():
+        print(f"{'ok' if result['ok'] else 'MISS':<6}{name:<30}{result['expected']:<36}used: {', '.join(result['used']) or '-'}")
+        if args.verbose or not result["ok"]:
+            print("      " + result["plan"].replace("\n", "\n      "))
+
+    missing = [name for name, result in results.items() if not result["ok"]]
+    if missing:
+        print(f"\n{len(missing)} queries not using their index: {', '.join(missing)} (is the database at `alembic upgrade head`?)")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+End-to-end consultation pipeline benchmark (offline, fake providers).
+
+Seeds N synthetic consultations, drives them through `process_consultation_flow` at a
+given concurrency (like one worker process) and reports throughput, per-stage
+p50/p95/p99, DB round-trips per consultation and peak RSS.
+
+Usage:
+    python -m benchmarks.pipeline_throughput --consultations 500 --concurrency 8 --output results.json
+    python -m benchmarks.pipeline_throughput --baseline benchmarks/baselines/pipeline_throughput.json
+    python -m benchmarks.pipeline_throughput --save-baseline benchmarks/baselines/pipeline_throughput.json
+
+With --baseline, exits non-zero when throughput drops or p95 / round-trips / RSS grow by
+more than --tolerance (default 20%) relative to the baseline. A baseline recorded with a
+different configuration (consultations, concurrency, latencies, ...) is not compared:
+the run exits with status 2 and lists the differences.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from benchmarks.stats import summarize
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def configure_environment(args) -> None:
+    """
+    Must run before any `app` import: Settings are read once at import time.
+    """
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("JWT_SECRET", "benchmark")
+    os.environ["STT_PROVIDER"] = "fake"
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["FAKE_STT_LATENCY_SECONDS"] = str(args.stt_latency)
+    os.environ["FAKE_LLM_LATENCY_SECONDS"] = str(args.llm_latency)
+    os.environ["FAKE_LATENCY_SIGMA"] = str(args.latency_sigma)
+    os.environ["FAKE_STT_FAILURE_RATE"] = str(args.stt_failure_rate)
+    os.environ["FAKE_LLM_FAILURE_RATE"] = str(args.llm_failure_rate)
+    os.environ["FAKE_PROVIDER_SEED"] = str(args.seed)
+
+def seed_consultations(count: int) -> List[Any]:
+    from datetime import datetime
+    from uuid import uuid4
+    from sqlmodel import Session, SQLModel
+    from app.core.db import engine
+    from app.models.base import User, UserRole, PatientProfile, Appointment, Consultation, AudioFile, AudioUploaderType
+    from app.services.fake_providers import load_fixture_cases
+    from app.core.config import settings
+
+    SQLModel.metadata.create_all(engine)
+    cases = load_fixture_cases(settings.FAKE_FIXTURES_PATH)
+    run_id = uuid4().hex[:8]
+
+    with Session(engine) as session:
+        doctor = User(email=f"bench_doctor_{run_id}@example.com", password_hash="x", role=UserRole.DOCTOR)
+        session.add(doctor)
+        session.commit()
+
+        consultation_ids = []
+        for i in range(count):
+            case = cases[i % len(cases)]
+            patient = User(email=f"bench_patient_{run_id}_{i}@example.com", password_hash="x", role=UserRole.PATIENT)
+            session.add(patient)
+            session.flush()
+            profile = case.get("patient_profile", {})
+            session.add(PatientProfile(
+                user_id=patient.id,
+                first_name=profile.get("first_name", "Bench"),
+                last_name=profile.get("last_name", str(i)),
+                medical_history=profile.get("medical_history")
+            ))
+            appointment = Appointment(patient_id=patient.id, doctor_id=doctor.id, scheduled_at=datetime.utcnow())
+            session.add(appointment)
+            session.flush()
+            consultation = Consultation(appointment_id=appointment.id, patient_id=patient.id, doctor_id=doctor.id)
+            session.add(consultation)
+            session.flush()
+            session.add(AudioFile(
+                consultation_id=consultation.id,
+                uploaded_by=AudioUploaderType.PATIENT,
+                file_name=case.get("filename") or f"bench_{i}.wav",
+                file_url=os.path.join("uploads", case.get("filename") or f"bench_{i}.wav"),
+                content_hash=f"{run_id}{i:056x}" # Unique per consultation: no transcript reuse
+            ))
+            consultation_ids.append(consultation.id)
+        session.commit()
+    return consultation_ids
+
+async def drive(consultation_ids: List[Any], concurrency: int, verbose: bool) -> Dict[str, Any]:
+    from sqlalchemy import event, select, func
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    import app.services.consultation_processor as processor
+    from app.core.db import async_engine
+    from app.models.base import Consultation, ConsultationStatus
+
+    stages: Dict[str, List[float]] = {}
+    def on_stage(name: str, seconds: float, ok: bool) -> None:
+        stages.setdefault(name, []).append(seconds)
+    processor.stage_listeners.append(on_stage)
+
+    round_trips = 0
+    def on_execute(*args):
+        nonlocal round_trips
+        round_trips += 1
+    event.listen(async_engine.sync_engine, "before_cursor_execute", on_execute)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    totals: List[float] = []
+
+    async def run_one(consultation_id):
+        async with semaphore:
+            start = time.perf_counter()
+            await processor.process_consultation_flow(consultation_id)
+            totals.append(time.perf_counter() - start)
+
+    output = None if verbose else io.StringIO()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(output) if output else contextlib.nullcontext():
+        await asyncio.gather(*(run_one(cid) for cid in consultation_ids))
+    wall = time.perf_counter() - started
+
+    event.remove(async_engine.sync_engine, "before_cursor_execute", on_execute)
+    processor.stage_listeners.remove(on_stage)
+
+    async with AsyncSession(async_engine) as session:
+        rows = (await session.exec(
+            select(Consultation.status, func.count()).where(Consultation.id.in_(consultation_ids)).group_by(Consultation.status)
+        )).all()
+    outcomes = {str(status.value if hasattr(status, "value") else status): count for status, count in rows}
+
+    return {
+        "wall_seconds": wall,
+        "throughput_per_minute": len(consultation_ids) / wall * 60 if wall else 0.0,
+        "outcomes": outcomes,
+        "completed": outcomes.get(ConsultationStatus.COMPLETED.value, 0),
+        "stages": {name: summarize(values) for name, values in sorted(stages.items())},
+        "end_to_end": summarize(totals),
+        "db_roundtrips_per_consultation": round_trips / len(consultation_ids),
+    }
+
+def config_differences(results: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """
+    Settings that differ between the two runs; their numbers are only comparable when empty.
+    """
+    current, previous = results.get("config", {}), baseline.get("config", {})
+    return [
+        f"{key}: baseline {previous.get(key)!r}, this run {current.get(key)!r}"
+        for key in sorted(set(current) | set(previous)) if current.get(key) != previous.get(key)
+    ]
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float, noise_floor_ms: float = 25.0) -> List[str]:
+    """
+    Returns human-readable regressions (empty if none). Latency changes smaller than
+    `noise_floor_ms` are never reported, since millisecond-scale DB stages are jittery.
+    """
+    regressions = []
+    def check(label: str, current: float, previous: float, higher_is_better: bool = False, floor: float = 0.0) -> None:
+        if not previous:
+            return
+        change = (current - previous) / previous
+        worse = -change if higher_is_better else change
+        regressed = worse > tolerance and abs(current - previous) >= floor
+        marker = "REGRESSION" if regressed else "ok"
+        print(f"  {label:<40} {previous:>12.2f} -> {current:>12.2f} ({change:+.1%}) {marker}")
+        if regressed:
+            regressions.append(f"{label}: {previous:.2f} -> {current:.2f} ({change:+.1%})")
+
+    print(f"\nComparison against baseline (tolerance {tolerance:.0%}):")
+    check("throughput_per_minute", results["throughput_per_minute"], baseline.get("throughput_per_minute", 0), higher_is_better=True)
+    check("db_roundtrips_per_consultation", results["db_roundtrips_per_consultation"], baseline.get("db_roundtrips_per_consultation", 0))
+    check("peak_rss_mb", results["peak_rss_mb"], baseline.get("peak_rss_mb", 0))
+    check("end_to_end.p95_ms", results["end_to_end"]["p95_ms"], baseline.get("end_to_end", {}).get("p95_ms", 0), floor=noise_floor_ms)
+    for name, summary in results["stages"].items():
+        check(f"stages.{name}.p95_ms", summary["p95_ms"], baseline.get("stages", {}).get(name, {}).get("p95_ms", 0), floor=noise_floor_ms)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Consultation pipeline throughput benchmark (fake providers)")
+    parser.add_argument("--consultations", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent consultations (worker slots)")
+    parser.add_argument("--stt-latency", type=float, default=0.2, help="Median fake STT latency (s)")
+    parser.add_argument("--llm-latency", type=float, default=0.1, help="Median fake LLM latency (s)")
+    parser.add_argument("--latency-sigma", type=float, default=0.25, help="Log-normal latency spread")
+    parser.add_argument("--stt-failure-rate", type=float, default=0.0)
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database-url", default=None, help="Defaults to a fresh SQLite file in a temp dir")
+    parser.add_argument("--output", default=None, help="Write results JSON here")
+    parser.add_argument("--baseline", default=None, help="Compare against this results JSON")
+    parser.add_argument("--save-baseline", default=None, help="Write results JSON as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--noise-floor-ms", type=float, default=25.0, help="Ignore latency changes smaller than this")
+    parser.add_argument("--verbose", action="store_true", help="Keep the pipeline's own log output")
+    args = parser.parse_args()
+
+    temp_dir = None
+    if args.database_url is None:
+        temp_dir = tempfile.mkdtemp(prefix="pipeline_bench_")
+        args.database_url = f"sqlite:///{os.path.join(temp_dir, 'bench.db')}"
+    configure_environment(args)
+
+    print(f"Seeding {args.consultations} consultations...")
+    consultation_ids = seed_consultations(args.consultations)
+    print(f"Processing with concurrency {args.concurrency}...")
+    results = asyncio.run(drive(consultation_ids, args.concurrency, args.verbose))
+    results["peak_rss_mb"] = peak_rss_mb()
+    results["config"] = {
+        key: getattr(args, key) for key in (
+            "consultations", "concurrency", "stt_latency", "llm_latency", "latency_sigma",
+            "stt_failure_rate", "llm_failure_rate", "seed"
+        )
+    }
+    results["config"]["database"] = args.database_url.split(":", 1)[0]
+    results["environment"] = {"python": platform.python_version(), "platform": platform.platform()}
+
+    print(f"\nThroughput: {results['throughput_per_minute']:.1f} consultations/min ({results['wall_seconds']:.2f}s wall)")
+    print(f"Outcomes: {results['outcomes']}")
+    print(f"DB round-trips per consultation: {results['db_roundtrips_per_consultation']:.1f}")
+    print(f"Peak RSS: {results['peak_rss_mb']:.1f} MB")
+    print(f"{'stage':<16}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, summary in list(results["stages"].items()) + [("end_to_end", results["end_to_end"])]:
+        print(f"{name:<16}{summary['count']:>8}{summary['p50_ms']:>10.1f}{summary['p95_ms']:>10.1f}{summary['p99_ms']:>10.1f}")
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+            print(f"Results written to {path}")
+
+    if temp_dir:
+        import shutil
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        differences = config_differences(results, baseline)
+        if differences:
+            print("\nNot compared: the baseline was recorded with a different configuration:\n  " + "\n  ".join(differences))
+            print("Re-run with the baseline's settings, or record a new baseline with --save-baseline.")
+            sys.exit(2)
+        regressions = compare(results, baseline, args.tolerance, args.noise_floor_ms)
+        if regressions:
+            print("\nRegressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+Bulk-loads a synthetic clinic dataset for read-path benchmarks (benchmarks/api_load.py).
+
+Rows are generated from a seeded RNG and inserted with SQLAlchemy Core executemany in
+batches, so 1M consultations load in minutes with flat memory. Per consultation there is
+one appointment; ~70% are COMPLETED (SOAP note, triage, safety warnings, queue entry, SUCCESS AI log),
+~5% FAILED (manual review, FAIL AI log), ~5% IN_PROGRESS and ~20% SCHEDULED. Doctors and
+patients scale with the consultation count (N/1000 and N/5).
+
+Usage:
+    python -m benchmarks.seed_dataset --scale 100k --database-url postgresql://... --manifest seed_manifest.json
+    python -m benchmarks.seed_dataset --consultations 2500 --database-url sqlite:///./bench_read.db
+
+The manifest lists sample doctor/patient/front-desk ids for the load driver. Every seeded
+user's password is SEED_PASSWORD.
+"""
+import argparse
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+from uuid import UUID
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+SEED_PASSWORD = "Password123!"
+# bcrypt hash of SEED_PASSWORD, computed once: hashing per user would dominate the load time
+SEED_PASSWORD_HASH = "$2b$12$ZTVMR0lbUqA.uwdSXhBSEOy0QcPnMd7.4wx8g1iaXvMAMjYwAWizu"
+
+STATUS_WEIGHTS = (("COMPLETED", 70), ("FAILED", 5), ("IN_PROGRESS", 5), ("SCHEDULED", 20))
+FRONT_DESK_USERS = 2
+MANIFEST_SAMPLE = 200
+
+def dataset_shape(consultations: int) -> Dict[str, int]:
+    return {
+        "consultations": consultations,
+        "doctors": max(5, consultations // 1000),
+        "patients": max(10, consultations // 5),
+        "front_desk": FRONT_DESK_USERS,
+    }
+
+def _batches(rows: Iterator[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _uuid(rng: random.Random) -> UUID:
+    return UUID(int=rng.getrandbits(128), version=4)
+
+class DatasetSeeder:
+    """
+    Generates and inserts the dataset. The same seed and shape always produce the same
+    rows (ids included), so runs against different databases are comparable.
+    """
+
+    def __init__(self, engine, consultations: int, seed: int = 0, batch_size: int = 5000, now: Optional[datetime] = None):
+        self.engine = engine
+        self.shape = dataset_shape(consultations)
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.batch_size = batch_size
+        self.now = now or datetime.utcnow()
+        self.cases = self._load_cases()
+        self.counts: Dict[str, int] = {}
+
+    @staticmethod
+    def _load_cases() -> List[Dict[str, Any]]:
+        from app.services.fake_providers import load_fixture_cases
+        return load_fixture_cases("fixtures/mock_soap_data.json")
+
+    def _insert(self, model, rows: Iterator[Dict[str, Any]]) -> None:
+        table = model.__table__
+        count = 0
+        for batch in _batches(rows, self.batch_size):
+            with self.engine.begin() as conn:
+                conn.execute(table.insert(), batch)
+            count += len(batch)
+        self.counts[table.name] = self.counts.get(table.name, 0) + count
+
+    def _users(self, role: str, count: int, prefix: str) -> List[UUID]:
+        ids = [_uuid(self.rng) for _ in range(count)]
+        created = self.now - timedelta(days=400)
+        from app.models.base import User
+        self._insert(User, ({
+            "id": user_id,
+            "email": f"{prefix}{i}@seed.example.com",
+            "password_hash": SEED_PASSWORD_HASH,
+            "role": role,
+            "created_at": created,
+            "updated_at": created,
+        } for i, user_id in enumerate(ids)))
+        return ids
+
+    def _profiles(self, model, user_ids: List[UUID], extra) -> None:
+        self._insert(model, ({
+            "id": _uuid(self.rng),
+            "user_id": user_id,
+            "first_name": f"First{i}",
+            "last_name": f"Last{i}",
+            "created_at": self.now,
+            "updated_at": self.now,
+            **extra(i),
+        } for i, user_id in enumerate(user_ids)))
+
+    def _consultation_rows(self, doctors: List[UUID], patients: List[UUID]) -> Iterator[Dict[str, Dict[str, Any]]]:
+        """
+        Yields {"appointment", "consultation", "triage_queue_entry"?, "soap_note"?, "ai_log"?} per consultation.
+        """
+        statuses = [status for status, _ in STATUS_WEIGHTS]
+        weights = [weight for _, weight in STATUS_WEIGHTS]
+        rng = self.rng
+        for i in range(self.shape["consultations"]):
+            status = rng.choices(statuses, weights)[0]
+            doctor_id = rng.choice(doctors)
+            patient_id = rng.choice(patients)
+            # Past year for processed consultations, next month for scheduled ones
+            if status == "SCHEDULED":
+                scheduled_at = self.now + timedelta(minutes=rng.randint(10, 30 * 24 * 60))
+                created_at = self.now - timedelta(minutes=rng.randint(0, 14 * 24 * 60))
+            else:
+                scheduled_at = self.now - timedelta(minutes=rng.randint(10, 365 * 24 * 60))
+                created_at = scheduled_at - timedelta(minutes=rng.randint(0, 60))
+            appointment_id = _uuid(rng)
+            consultation_id = _uuid(rng)
+            rows = {
+                "appointment": {
+                    "id": appointment_id,
+                    "patient_id": patient_id,
+                    "doctor_id": doctor_id,
+                    "doctor_name": None,
+                    "scheduled_at": scheduled_at,
+                    "reason": "Follow-up visit",
+                    "status": "SCHEDULED" if status == "SCHEDULED" else "IN_PROGRESS" if status == "IN_PROGRESS" else "COMPLETED",
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                },
+                "consultation": {
+                    "id": consultation_id,
+                    "appointment_id": appointment_id,
+                    "patient_id": patient_id,
+                    "doctor_id": doctor_id,
+                    "status": status,
+                    "start_time": None if status == "SCHEDULED" else scheduled_at,
+                    "end_time": scheduled_at + timedelta(minutes=20) if status in ("COMPLETED", "FAILED") else None,
+                    "urgency_score": None,
+                    "triage_category": None,
+                    "safety_warnings": None,
+                    "requires_manual_review": status == "FAILED",
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                },
+            }
+            if status == "COMPLETED":
+                case = self.cases[i % len(self.cases)]
+                urgency = rng.randint(0, 100)
+                rows["consultation"].update({
+                    "urgency_score": urgency,
+                    "triage_category": "CRITICAL" if urgency >= 80 else "HIGH" if urgency >= 60 else "MODERATE" if urgency >= 30 else "LOW",
+                    "safety_warnings": [{"drug": "Warfarin", "interaction": "Aspirin", "severity": "HIGH"}] if rng.random() < 0.1 else [],
+                })
+                rows["triage_queue_entry"] = {
+                    "consultation_id": consultation_id,
+                    "patient_id": patient_id,
+                    "doctor_id": doctor_id,
+                    "urgency_score": urgency,
+                    "triage_category": rows["consultation"]["triage_category"],
+                    "safety_warning_count": len(rows["consultation"]["safety_warnings"]),
+                    "created_at": created_at,
+                    "queued_at": scheduled_at + timedelta(minutes=20),
+                }
+                rows["soap_note"] = {
+                    "id": _uuid(rng),
+                    "consultation_id": consultation_id,
+                    "soap_json": case["soap_note"],
+                    "risk_flags": {"flags": case.get("risk_flags", [])},
+                    "confidence": round(rng.uniform(0.8, 0.99), 3),
+                    "generated_by_ai": True,
+                    "reviewed_by_doctor": rng.random() < 0.5,
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                }
+            if status in ("COMPLETED", "FAILED"):
+                rows["ai_log"] = {
+                    "id": _uuid(rng),
+                    "consultation_id": consultation_id,
+                    "model_version": "gemini-2.0-flash",
+                    "status": "SUCCESS" if status == "COMPLETED" else "FAIL",
+                    "latency_ms": round(rng.lognormvariate(8, 0.3), 1),
+                    "error_message": None if status == "COMPLETED" else "429 Resource has been exhausted",
+                    "created_at": created_at,
+                }
+            yield rows
+
+    def run(self) -> Dict[str, Any]:
+        from sqlmodel import SQLModel
+        from app.models.base import UserRole, PatientProfile, DoctorProfile, Appointment, Consultation, SOAPNote, AILog, TriageQueueEntry
+
+        SQLModel.metadata.create_all(self.engine)
+        started = time.perf_counter()
+        doctors = self._users(UserRole.DOCTOR.value, self.shape["doctors"], "seed_doctor_")
+        patients = self._users(UserRole.PATIENT.value, self.shape["patients"], "seed_patient_")
+        front_desk = self._users(UserRole.FRONT_DESK.value, self.shape["front_desk"], "seed_front_desk_")
+        self._profiles(DoctorProfile, doctors, lambda i: {"specialization": "Neurology", "is_available": True})
+        self._profiles(PatientProfile, patients, lambda i: {
+            "medical_history": self.cases[i % len(self.cases)].get("patient_profile", {}).get("medical_history")
+        })
+
+        # Parents before children in each batch, so FK-enforcing databases accept every commit
+        for chunk in _batches(self._consultation_rows(doctors, patients), self.batch_size):
+            for key, model in (("appointment", Appointment), ("consultation", Consultation), ("triage_queue_entry", TriageQueueEntry),
+                               ("soap_note", SOAPNote), ("ai_log", AILog)):
+                rows = [row[key] for row in chunk if key in row]
+                if rows:
+                    self._insert(model, iter(rows))
+
+        return {
+            "seed": self.seed,
+            "shape": self.shape,
+            "rows": dict(self.counts),
+            "seconds": time.perf_counter() - started,
+            "password": SEED_PASSWORD,
+            "users": {
+                "DOCTOR": [str(user_id) for user_id in doctors[:MANIFEST_SAMPLE]],
+                "PATIENT": [str(user_id) for user_id in random.Random(self.seed).sample(patients, min(MANIFEST_SAMPLE, len(patients)))],
+                "FRONT_DESK": [str(user_id) for user_id in front_desk],
+            },
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed a synthetic dataset for read-path benchmarks")
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument("--scale", choices=sorted(SCALES), help="Preset consultation count")
+    size.add_argument("--consultations", type=int, help="Exact consultation count")
+    parser.add_argument("--database-url", default=None, help="Defaults to DATABASE_URL")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--manifest", default="seed_manifest.json", help="Where to write sample user ids for the load driver")
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("JWT_SECRET", "benchmark")
+    from app.core.db import engine
+
+    consultations = args.consultations or SCALES[args.scale or "10k"]
+    print(f"Seeding {consultations} consultations into {engine.url.render_as_string(hide_password=True)}...")
+    manifest = DatasetSeeder(engine, consultations, seed=args.seed, batch_size=args.batch_size).run()
+    manifest["database_url"] = engine.url.render_as_string(hide_password=True)
+    for table, count in sorted(manifest["rows"].items()):
+        print(f"  {table:<20}{count:>10}")
+    print(f"Done in {manifest['seconds']:.1f}s")
+
+    with open(args.manifest, "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Manifest written to {args.manifest}")
+
+if __name__ == "__main__":
+    main()
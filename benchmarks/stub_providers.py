@@ -0,0 +1,217 @@
+"""
+Local stand-in for the subset of the AssemblyAI and Gemini APIs the app uses, with
+fault injection, so the real SDK code paths (upload, submit, polling, retries, JSON
+parsing in GeminiService) can be exercised under load without the network.
+
+Usage:
+    python -m benchmarks.stub_providers --port 8765 --stt-processing-seconds 5 --llm-latency-ms 800 \\
+        --rate-5xx 0.02 --burst-429-every 50 --burst-429-length 5 --malformed-json-rate 0.05
+
+Point the app (API, worker or benchmark) at it:
+    ASSEMBLYAI_BASE_URL=http://127.0.0.1:8765 GEMINI_API_ENDPOINT=http://127.0.0.1:8765 \\
+    ASSEMBLYAI_API_KEY=stub GOOGLE_API_KEY=stub ASSEMBLYAI_POLLING_INTERVAL_SECONDS=0.5
+
+Endpoints:
+    POST /v2/upload, POST /v2/transcript, GET /v2/transcript/{id}     (AssemblyAI)
+    POST /v1beta/models/{model}:generateContent, GET /v1beta/models/{model}  (Gemini REST)
+    GET /_stub/stats            request counts by endpoint and status code
+    GET|PUT /_stub/faults       read or change the fault knobs while running
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+from uuid import uuid4
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.services.fake_providers import FakeSTTProvider, FakeLLMProvider, load_fixture_cases
+
+class FaultConfig(BaseModel):
+    stt_upload_latency_ms: float = 50.0
+    stt_processing_seconds: float = 5.0 # Submit -> completed
+    stt_error_rate: float = 0.0 # Transcripts that finish with status "error"
+    llm_latency_ms: float = 800.0
+    latency_jitter: float = 0.2 # Uniform +/- fraction applied to every latency
+    rate_5xx: float = 0.0
+    rate_429: float = 0.0
+    burst_429_every: int = 0 # Every N provider requests start a burst of 429s...
+    burst_429_length: int = 0 # ...this many requests long
+    retry_after_seconds: float = 1.0
+    malformed_json_rate: float = 0.0 # Gemini replies wrapped in markdown (half) or truncated (half)
+    seed: int = 0
+
+class StubState:
+    def __init__(self, faults: FaultConfig, fixtures_path: str):
+        self.faults = faults
+        self.rng = random.Random(faults.seed)
+        cases = load_fixture_cases(fixtures_path)
+        self.stt = FakeSTTProvider(cases)
+        self.llm = FakeLLMProvider(cases)
+        self.requests = 0
+        self.burst_left = 0
+        self.stats: Counter = Counter()
+        self.transcripts: Dict[str, Dict[str, Any]] = {}
+
+    def latency(self, seconds: float) -> float:
+        jitter = self.faults.latency_jitter
+        return max(0.0, seconds * self.rng.uniform(1 - jitter, 1 + jitter))
+
+    def inject(self, endpoint: str) -> Optional[JSONResponse]:
+        """
+        Returns an error response if a fault fires for this request.
+        """
+        faults = self.faults
+        self.requests += 1
+        if faults.burst_429_every and self.requests % faults.burst_429_every == 0:
+            self.burst_left = faults.burst_429_length
+        if self.burst_left > 0 or self.rng.random() < faults.rate_429:
+            self.burst_left = max(0, self.burst_left - 1)
+            return self.respond(endpoint, 429, {"error": {"code": 429, "message": "Resource has been exhausted (e.g. check quota).", "status": "RESOURCE_EXHAUSTED"}},
+                                headers={"Retry-After": str(faults.retry_after_seconds)})
+        if self.rng.random() < faults.rate_5xx:
+            return self.respond(endpoint, 503, {"error": {"code": 503, "message": "The service is currently unavailable.", "status": "UNAVAILABLE"}})
+        return None
+
+    def respond(self, endpoint: str, status_code: int, body: Any, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+        self.stats[f"{endpoint} {status_code}"] += 1
+        return JSONResponse(body, status_code=status_code, headers=headers)
+
+def create_app(faults: FaultConfig, fixtures_path: str = "fixtures/mock_soap_data.json") -> FastAPI:
+    app = FastAPI(title="Provider stub")
+    state = StubState(faults, fixtures_path)
+    app.state.stub = state
+
+    # AssemblyAI
+
+    @app.post("/v2/upload")
+    async def upload(request: Request):
+        sha = hashlib.sha256()
+        async for chunk in request.stream():
+            sha.update(chunk)
+        failure = state.inject("upload")
+        if failure:
+            return failure
+        await asyncio.sleep(state.latency(state.faults.stt_upload_latency_ms / 1000))
+        return state.respond("upload", 200, {"upload_url": f"{request.base_url}_stub/audio/{sha.hexdigest()}"})
+
+    async def _notify(transcript: Dict[str, Any]) -> None:
+        await asyncio.sleep(max(0.0, transcript["ready_at"] - time.monotonic()))
+        request = transcript["request"]
+        headers = {}
+        if request.get("webhook_auth_header_name"):
+            headers[request["webhook_auth_header_name"]] = request.get("webhook_auth_header_value") or ""
+        try:
+            async with httpx.AsyncClient() as client:
+                await client.post(request["webhook_url"], json={"transcript_id": transcript["id"], "status": transcript["final_status"]}, headers=headers)
+        except httpx.HTTPError as e:
+            print(f"Webhook to {request['webhook_url']} failed: {e}")
+
+    @app.post("/v2/transcript")
+    async def create_transcript(request: Request):
+        body = await request.json()
+        failure = state.inject("transcript.create")
+        if failure:
+            return failure
+        transcript_id = str(uuid4())
+        transcript = {
+            "id": transcript_id,
+            "request": body,
+            "ready_at": time.monotonic() + state.latency(state.faults.stt_processing_seconds),
+            "final_status": "error" if state.rng.random() < state.faults.stt_error_rate else "completed",
+        }
+        state.transcripts[transcript_id] = transcript
+        if body.get("webhook_url"):
+            asyncio.create_task(_notify(transcript))
+        return state.respond("transcript.create", 200, {"id": transcript_id, "status": "queued", "audio_url": body["audio_url"]})
+
+    @app.get("/v2/transcript/{transcript_id}")
+    async def get_transcript(transcript_id: str):
+        failure = state.inject("transcript.get")
+        if failure:
+            return failure
+        transcript = state.transcripts.get(transcript_id)
+        if transcript is None:
+            return state.respond("transcript.get", 404, {"error": "Transcript not found"})
+
+        body = {"id": transcript_id, "audio_url": transcript["request"]["audio_url"]}
+        if time.monotonic() < transcript["ready_at"]:
+            return state.respond("transcript.get", 200, {**body, "status": "processing"})
+        if transcript["final_status"] == "error":
+            return state.respond("transcript.get", 200, {**body, "status": "error", "error": "Stub: audio could not be decoded"})
+
+        audio_hash = transcript["request"]["audio_url"].rsplit("/", 1)[-1]
+        result = await state.stt.transcribe_audio_async(transcript["request"]["audio_url"], audio_hash=audio_hash)
+        utterances = [
+            {**u, "confidence": result["confidence"], "words": [{"text": w, "start": u["start"], "end": u["end"], "confidence": result["confidence"]} for w in u["text"].split()]}
+            for u in result["utterances"]
+        ]
+        return state.respond("transcript.get", 200, {**body, "status": "completed", "text": result["text"], "utterances": utterances, "confidence": result["confidence"], "audio_duration": result["audio_duration"]})
+
+    # Gemini (REST transport)
+
+    @app.get("/v1beta/models/{model}")
+    async def get_model(model: str):
+        return state.respond("models.get", 200, {"name": f"models/{model}", "displayName": model, "inputTokenLimit": 1048576, "outputTokenLimit": 8192, "supportedGenerationMethods": ["generateContent"]})
+
+    @app.post("/v1beta/models/{model}:generateContent")
+    async def generate_content(model: str, request: Request):
+        body = await request.json()
+        failure = state.inject("generateContent")
+        if failure:
+            return failure
+        await asyncio.sleep(state.latency(state.faults.llm_latency_ms / 1000))
+
+        prompt = "".join(part.get("text", "") for content in body.get("contents", []) for part in content.get("parts", []))
+        text = json.dumps(await state.llm.generate_soap_note_async(prompt))
+        if state.rng.random() < state.faults.malformed_json_rate:
+            text = f"```json\n{text}\n```" if state.rng.random() < 0.5 else text[: len(text) // 2]
+
+        prompt_tokens = len(prompt) // 4 + 1
+        output_tokens = len(text) // 4 + 1
+        return state.respond("generateContent", 200, {
+            "candidates": [{"content": {"parts": [{"text": text}], "role": "model"}, "finishReason": "STOP", "index": 0}],
+            "usageMetadata": {"promptTokenCount": prompt_tokens, "candidatesTokenCount": output_tokens, "totalTokenCount": prompt_tokens + output_tokens}
+        })
+
+    # Control
+
+    @app.get("/_stub/stats")
+    def get_stats():
+        return {"requests": dict(state.stats), "transcripts": len(state.transcripts)}
+
+    @app.get("/_stub/faults", response_model=FaultConfig)
+    def get_faults():
+        return state.faults
+
+    @app.put("/_stub/faults", response_model=FaultConfig)
+    def set_faults(faults: FaultConfig):
+        state.faults = faults
+        state.rng = random.Random(faults.seed)
+        state.burst_left = 0
+        return state.faults
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Local AssemblyAI/Gemini stand-in with fault injection")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixtures", default="fixtures/mock_soap_data.json")
+    for name, field in FaultConfig.__fields__.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", dest=name, type=field.type_, default=field.default)
+    args = parser.parse_args()
+
+    import uvicorn
+    faults = FaultConfig(**{name: getattr(args, name) for name in FaultConfig.__fields__})
+    uvicorn.run(create_app(faults, args.fixtures), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
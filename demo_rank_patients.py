@@ -1,13 +1,13 @@
 import asyncio
 import os
-import shutil
 import glob
 from uuid import uuid4
 from datetime import datetime
 from sqlmodel import Session, select, create_engine, SQLModel
 from app.models.base import Consultation, AudioFile, PatientProfile, User, SOAPNote, ConsultationStatus, AudioUploaderType, UserRole, Appointment, AppointmentStatus, TriageCategory
 from app.services.consultation_processor import process_consultation_flow
-import time
+from app.services.storage_service import StorageService
+from app.services.rate_limiter import gemini_rpm
 
 # Setup DB
 DATABASE_URL = "sqlite:///demo_ranking.db"
@@ -31,12 +31,9 @@ async def process_demo_file(filename):
 
     print(f"--- Processing {filename} ---")
     
-    # 1. Simulate Upload
-    upload_dir = "uploads"
-    os.makedirs(upload_dir, exist_ok=True)
-    unique_name = f"{uuid4()}_{filename}"
-    dest_path = os.path.join(upload_dir, unique_name)
-    shutil.copy(file_path, dest_path)
+    # 1. Simulate Upload (content-addressed: re-runs reuse the stored file and its transcription)
+    stored = StorageService.store_local_file(file_path)
+    dest_path = stored["path"]
     
     cid = None
     
@@ -71,6 +68,8 @@ async def process_demo_file(filename):
         audio_file = AudioFile(
             consultation_id=consultation.id,
             file_url=dest_path,
+            file_size=stored["file_size"],
+            content_hash=stored["sha256"],
             uploaded_by=AudioUploaderType.PATIENT,
             file_name=filename
         )
@@ -168,9 +167,10 @@ async def main():
         res = await process_demo_file(filename)
         if res:
             results.append(res)
-        # Throttle for Free Tier (Aggressive)
-        print("Sleeping 5s...")
-        time.sleep(5)
+        # Throttle for Free Tier (Aggressive), unless GEMINI_RPM paces the calls
+        if gemini_rpm is None:
+            print("Sleeping 5s...")
+            await asyncio.sleep(5)
         
     # RANKING LOGIC
     print("\n\n" + "="*80)
@@ -67,9 +67,14 @@ def verify_appointment_flow():
         print(f"Appointment created successfully! ID: {appointment['id']}")
         print(f"Stored Doctor Name: {appointment.get('doctor_name')}")
         
-        # Verify it's retrieved
-        r = client.get("/appointments/me", headers=headers)
-        appointments = r.json()
+        # Verify it's retrieved (the listing is paginated: follow X-Next-Cursor)
+        appointments, params = [], {}
+        while True:
+            r = client.get("/appointments/me", params=params, headers=headers)
+            appointments += r.json()
+            if not r.headers.get("X-Next-Cursor"):
+                break
+            params = {"cursor": r.headers["X-Next-Cursor"]}
         if any(a["id"] == appointment["id"] and a["doctor_name"] == appointment_payload["doctor_name"] for a in appointments):
             print("SUCCESS: Appointment retrieved with correct doctor_name.")
         else:
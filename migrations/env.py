@@ -0,0 +1,48 @@
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy import engine_from_config, pool
+from sqlmodel import SQLModel
+from app.core.config import settings
+import app.models.base # Registers every table on SQLModel.metadata
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+# An explicit sqlalchemy.url (e.g. set by tests) wins over settings
+if not config.get_main_option("sqlalchemy.url"):
+    config.set_main_option("sqlalchemy.url", settings.DATABASE_URL.replace("%", "%%"))
+
+target_metadata = SQLModel.metadata
+
+def _include_object(obj, name, type_, reflected, compare_to) -> bool:
+    # Indexes Alembic can't compare (e.g. with DESC elements) opt out with info={"autogenerate": False}
+    model_obj = compare_to if reflected else obj
+    return model_obj is None or model_obj.info.get("autogenerate", True)
+
+def _configure(**kwargs) -> None:
+    url = config.get_main_option("sqlalchemy.url")
+    context.configure(
+        target_metadata=target_metadata,
+        # SQLite can't ALTER most things in place; batch mode recreates the table instead
+        render_as_batch=url.startswith("sqlite"),
+        include_object=_include_object,
+        **kwargs
+    )
+
+def run_migrations_offline() -> None:
+    _configure(url=config.get_main_option("sqlalchemy.url"), literal_binds=True, dialect_opts={"paramstyle": "named"})
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online() -> None:
+    connectable = engine_from_config(config.get_section(config.config_ini_section, {}), prefix="sqlalchemy.", poolclass=pool.NullPool)
+    with connectable.connect() as connection:
+        _configure(connection=connection)
+        with context.begin_transaction():
+            context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
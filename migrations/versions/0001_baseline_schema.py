@@ -0,0 +1,183 @@
+"""baseline schema
+
+The tables as they existed before migrations were introduced. Databases created
+earlier (by create_all) should be stamped at this revision: `alembic stamp 0001`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 09:15:54.238356
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('users',
+    sa.Column('id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+    sa.Column('email', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('password_hash', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('role', sa.Enum('PATIENT', 'DOCTOR', 'FRONT_DESK', name='userrole'), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_email'), ['email'], unique=True)
+        batch_op.create_index(batch_op.f('ix_users_id'), ['id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_users_role'), ['role'], unique=False)
+
+    op.create_table('appointments',
+    sa.Column('id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+    sa.Column('patient_id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+    sa.Column('doctor_id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+    sa.Column('doctor_name', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('scheduled_at', sa.DateTime(), nullable=False),
+    sa.Column('reason', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('status', sa.Enum('SCHEDULED', 'CHECKED_IN', 'IN_PROGRESS', 'COMPLETED', 'CANCELLED', 'NO_SHOW', name='appointmentstatus'), nullable=False),
+    sa.Column('notes', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['doctor_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['patient_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_appointments_scheduled_at'), ['scheduled_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_appointments_status'), ['status'], unique=False)
+
+    op.create_table('doctor_profiles',
+    sa.Column('id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+    sa.Column('user_id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+    sa.Column('first_name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('last_name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('specialization', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('license_number', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('years_of_experience', sa.Integer(), nullable=True),
+    sa.Column('qualification', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('phone_number', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('clinic_address', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('consultation_fee', sa.Float(), nullable=True),
+    sa.Column('bio', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('is_available', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id')
+    )
+    op.create_table('patient_profiles',
+    sa.Column('id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+    sa.Column('user_id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+    sa.Column('first_name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('last_name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('date_of_birth', sa.DateTime(), nullable=True),
+    sa.Column('gender', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('phone_number', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('address', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('city', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('state', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('zip_code', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('medical_history', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id')
+    )
+    op.create_table('consultations',
+    sa.Column('id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+    sa.Column('appointment_id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+    sa.Column('patient_id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+    sa.Column('doctor_id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+    sa.Column('status', sa.Enum('SCHEDULED', 'IN_PROGRESS', 'COMPLETED', 'CANCELLED', 'FAILED', name='consultationstatus'), nullable=False),
+    sa.Column('start_time', sa.DateTime(), nullable=True),
+    sa.Column('end_time', sa.DateTime(), nullable=True),
+    sa.Column('notes', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('diagnosis', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('prescription', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('urgency_score', sa.Integer(), nullable=True),
+    sa.Column('triage_category', sa.Enum('CRITICAL', 'HIGH', 'MODERATE', 'LOW', name='triagecategory'), nullable=True),
+    sa.Column('safety_warnings', sa.JSON(), nullable=True),
+    sa.Column('requires_manual_review', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['appointment_id'], ['appointments.id'], ),
+    sa.ForeignKeyConstraint(['doctor_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['patient_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('consultations', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_consultations_appointment_id'), ['appointment_id'], unique=True)
+
+    op.create_table('ai_logs',
+    sa.Column('id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+    sa.Column('consultation_id', sqlmodel.sql.sqltypes.GUID(), nullable=True),
+    sa.Column('model_version', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('status', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('latency_ms', sa.Float(), nullable=True),
+    sa.Column('error_message', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['consultation_id'], ['consultations.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('audio_files',
+    sa.Column('id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+    sa.Column('consultation_id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+    sa.Column('uploaded_by', sa.Enum('PATIENT', 'DOCTOR', 'SYSTEM', name='audiouploadertype'), nullable=False),
+    sa.Column('file_name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('file_url', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('file_size', sa.Integer(), nullable=True),
+    sa.Column('duration', sa.Float(), nullable=True),
+    sa.Column('mime_type', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('transcription', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('uploaded_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['consultation_id'], ['consultations.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('consultation_id')
+    )
+    op.create_table('soap_notes',
+    sa.Column('id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+    sa.Column('consultation_id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+    sa.Column('soap_json', sa.JSON(), nullable=True),
+    sa.Column('risk_flags', sa.JSON(), nullable=True),
+    sa.Column('confidence', sa.Float(), nullable=True),
+    sa.Column('generated_by_ai', sa.Boolean(), nullable=False),
+    sa.Column('reviewed_by_doctor', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['consultation_id'], ['consultations.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('consultation_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('soap_notes')
+    op.drop_table('audio_files')
+    op.drop_table('ai_logs')
+    with op.batch_alter_table('consultations', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_consultations_appointment_id'))
+
+    op.drop_table('consultations')
+    op.drop_table('patient_profiles')
+    op.drop_table('doctor_profiles')
+    with op.batch_alter_table('appointments', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_appointments_status'))
+        batch_op.drop_index(batch_op.f('ix_appointments_scheduled_at'))
+
+    op.drop_table('appointments')
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_role'))
+        batch_op.drop_index(batch_op.f('ix_users_id'))
+        batch_op.drop_index(batch_op.f('ix_users_email'))
+
+    op.drop_table('users')
@@ -0,0 +1,125 @@
+"""processing tables and audio transcript columns
+
+AudioFile transcript reuse columns plus the job queue, rate limiter, webhook
+callback and stage timing tables. init_db may already have created those tables
+(it creates missing new tables on startup) and databases built with create_all
+already have the columns, so anything that exists is left alone.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:15:58.275560
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+import sqlmodel
+
+
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _inspector():
+    # Offline (--sql) runs can't look at the database; they emit the full DDL
+    return None if context.is_offline_mode() else sa.inspect(op.get_bind())
+
+
+def upgrade() -> None:
+    inspector = _inspector()
+    existing = set(inspector.get_table_names()) if inspector else set()
+    if 'rate_limit_buckets' not in existing:
+        op.create_table('rate_limit_buckets',
+        sa.Column('name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('tokens', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.Float(), nullable=False),
+        sa.Column('blocked_until', sa.Float(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+        )
+    if 'stt_callbacks' not in existing:
+        op.create_table('stt_callbacks',
+        sa.Column('transcript_id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('status', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('received_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('transcript_id')
+        )
+    if 'processing_jobs' not in existing:
+        op.create_table('processing_jobs',
+        sa.Column('id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+        sa.Column('consultation_id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+        sa.Column('status', sa.Enum('QUEUED', 'RUNNING', 'SUCCEEDED', 'FAILED', name='jobstatus'), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('available_at', sa.DateTime(), nullable=False),
+        sa.Column('lease_owner', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['consultation_id'], ['consultations.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('processing_jobs', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_processing_jobs_available_at'), ['available_at'], unique=False)
+            batch_op.create_index(batch_op.f('ix_processing_jobs_consultation_id'), ['consultation_id'], unique=False)
+            batch_op.create_index(batch_op.f('ix_processing_jobs_status'), ['status'], unique=False)
+
+    if 'processing_stages' not in existing:
+        op.create_table('processing_stages',
+        sa.Column('id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+        sa.Column('consultation_id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+        sa.Column('run_id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+        sa.Column('stage', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('status', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('latency_ms', sa.Float(), nullable=False),
+        sa.Column('provider', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('model_version', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('audio_duration_seconds', sa.Float(), nullable=True),
+        sa.Column('audio_bytes', sa.Integer(), nullable=True),
+        sa.Column('error_message', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['consultation_id'], ['consultations.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('processing_stages', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_processing_stages_consultation_id'), ['consultation_id'], unique=False)
+            batch_op.create_index(batch_op.f('ix_processing_stages_created_at'), ['created_at'], unique=False)
+            batch_op.create_index(batch_op.f('ix_processing_stages_run_id'), ['run_id'], unique=False)
+
+    audio_columns = {column['name'] for column in inspector.get_columns('audio_files')} if inspector else set()
+    if 'content_hash' in audio_columns:
+        return
+    with op.batch_alter_table('audio_files', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+        batch_op.add_column(sa.Column('transcription_utterances', sa.JSON(), nullable=True))
+        batch_op.add_column(sa.Column('transcription_confidence', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('transcription_config', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_audio_files_content_hash'), ['content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('audio_files', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_audio_files_content_hash'))
+        batch_op.drop_column('transcription_config')
+        batch_op.drop_column('transcription_confidence')
+        batch_op.drop_column('transcription_utterances')
+        batch_op.drop_column('content_hash')
+
+    with op.batch_alter_table('processing_stages', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_processing_stages_run_id'))
+        batch_op.drop_index(batch_op.f('ix_processing_stages_created_at'))
+        batch_op.drop_index(batch_op.f('ix_processing_stages_consultation_id'))
+
+    op.drop_table('processing_stages')
+    with op.batch_alter_table('processing_jobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_processing_jobs_status'))
+        batch_op.drop_index(batch_op.f('ix_processing_jobs_consultation_id'))
+        batch_op.drop_index(batch_op.f('ix_processing_jobs_available_at'))
+
+    op.drop_table('processing_jobs')
+    op.drop_table('stt_callbacks')
+    op.drop_table('rate_limit_buckets')
@@ -0,0 +1,53 @@
+"""composite and partial indexes for hot queries
+
+Dashboard queue (status, urgency_score DESC, created_at), the failed queue as a
+partial index on requires_manual_review, and (owner, sort key, id) indexes for
+the keyset-paginated listings. Check the plans with
+`python -m benchmarks.explain_queries`.
+
+On PostgreSQL the indexes are built CONCURRENTLY (outside the migration
+transaction), so large tables stay writable while they build.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 09:16:23.570543
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (name, table, columns, dialect options)
+INDEXES = [
+    ("ix_appointments_doctor_scheduled", "appointments", ["doctor_id", "scheduled_at", "id"], {}),
+    ("ix_appointments_patient_scheduled", "appointments", ["patient_id", "scheduled_at", "id"], {}),
+    ("ix_appointments_scheduled", "appointments", ["scheduled_at", "id"], {}),
+    ("ix_consultations_queue", "consultations", ["status", sa.text("urgency_score DESC"), "created_at"], {}),
+    ("ix_consultations_manual_review", "consultations", ["created_at"], {
+        "sqlite_where": sa.text("requires_manual_review = 1"),
+        "postgresql_where": sa.text("requires_manual_review"),
+    }),
+    ("ix_consultations_doctor_created", "consultations", ["doctor_id", "created_at", "id"], {}),
+    ("ix_consultations_patient_created", "consultations", ["patient_id", "created_at", "id"], {}),
+    ("ix_consultations_created", "consultations", ["created_at", "id"], {}),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns, options in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True, **options)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
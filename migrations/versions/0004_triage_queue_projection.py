@@ -0,0 +1,88 @@
+"""triage queue projection
+
+triage_queue_entries holds one row per COMPLETED consultation so the dashboard
+reads the top of the queue off ix_triage_queue_order; it is filled here from
+existing consultations. init_db may already have created (and filled) it. The
+consultations-side queue index is no longer read and is dropped.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 09:20:39.845691
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+import sqlmodel
+
+
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# The PostgreSQL type already exists (consultations.triage_category)
+triage_category = sa.Enum('CRITICAL', 'HIGH', 'MODERATE', 'LOW', name='triagecategory').with_variant(
+    postgresql.ENUM('CRITICAL', 'HIGH', 'MODERATE', 'LOW', name='triagecategory', create_type=False), 'postgresql'
+)
+
+consultations = sa.table(
+    'consultations',
+    sa.column('id', sqlmodel.sql.sqltypes.GUID()),
+    sa.column('patient_id', sqlmodel.sql.sqltypes.GUID()),
+    sa.column('status', sa.String()),
+    sa.column('urgency_score', sa.Integer()),
+    sa.column('triage_category', sa.String()),
+    sa.column('safety_warnings', sa.JSON()),
+    sa.column('created_at', sa.DateTime()),
+)
+
+BATCH_SIZE = 1000
+
+
+def _backfill(entries: sa.Table) -> None:
+    if context.is_offline_mode():
+        return # Offline (--sql) runs: fill it with TriageQueueService.rebuild afterwards
+    bind = op.get_bind()
+    completed = bind.execute(sa.select(consultations).where(consultations.c.status == 'COMPLETED')).all()
+    queued_at = datetime.utcnow()
+    for start in range(0, len(completed), BATCH_SIZE):
+        op.bulk_insert(entries, [{
+            'consultation_id': row.id,
+            'patient_id': row.patient_id,
+            'urgency_score': row.urgency_score or 0,
+            'triage_category': row.triage_category,
+            'safety_warning_count': len(row.safety_warnings or []),
+            'created_at': row.created_at,
+            'queued_at': queued_at,
+        } for row in completed[start:start + BATCH_SIZE]])
+
+
+def upgrade() -> None:
+    existing = set() if context.is_offline_mode() else set(sa.inspect(op.get_bind()).get_table_names())
+    if 'triage_queue_entries' not in existing:
+        entries = op.create_table('triage_queue_entries',
+        sa.Column('consultation_id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+        sa.Column('patient_id', sqlmodel.sql.sqltypes.GUID(), nullable=False),
+        sa.Column('urgency_score', sa.Integer(), nullable=False),
+        sa.Column('triage_category', triage_category, nullable=True),
+        sa.Column('safety_warning_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('queued_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['consultation_id'], ['consultations.id'], ),
+        sa.ForeignKeyConstraint(['patient_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('consultation_id')
+        )
+        op.create_index('ix_triage_queue_order', 'triage_queue_entries', [sa.text('urgency_score DESC'), 'created_at'])
+        _backfill(entries)
+
+    op.drop_index('ix_consultations_queue', table_name='consultations', if_exists=True)
+
+
+def downgrade() -> None:
+    op.create_index('ix_consultations_queue', 'consultations', ['status', sa.text('urgency_score DESC'), 'created_at'])
+    op.drop_index('ix_triage_queue_order', table_name='triage_queue_entries')
+    op.drop_table('triage_queue_entries')
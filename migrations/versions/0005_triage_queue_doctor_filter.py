@@ -0,0 +1,67 @@
+"""triage queue doctor filter
+
+Adds doctor_id to triage_queue_entries (filled from consultations) with an index
+in queue order per doctor, for the dashboard's doctor filter.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 09:28:07.094996
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+import sqlmodel
+
+
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _recreating_table() -> bool:
+    # SQLite batch mode copies the table and reflects its indexes without their DESC
+    # elements, so the queue order index is dropped first and rebuilt afterwards
+    return op.get_context().dialect.name == 'sqlite'
+
+
+def _create_order_index() -> None:
+    op.create_index('ix_triage_queue_order', 'triage_queue_entries', [sa.text('urgency_score DESC'), 'created_at'])
+
+
+def upgrade() -> None:
+    # Databases built with create_all already have the column
+    if not context.is_offline_mode():
+        columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('triage_queue_entries')}
+        if 'doctor_id' in columns:
+            return
+
+    if _recreating_table():
+        op.drop_index('ix_triage_queue_order', table_name='triage_queue_entries')
+    with op.batch_alter_table('triage_queue_entries', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('doctor_id', sqlmodel.sql.sqltypes.GUID(), nullable=True))
+
+    op.execute(
+        "UPDATE triage_queue_entries SET doctor_id = "
+        "(SELECT consultations.doctor_id FROM consultations WHERE consultations.id = triage_queue_entries.consultation_id)"
+    )
+
+    with op.batch_alter_table('triage_queue_entries', schema=None) as batch_op:
+        batch_op.alter_column('doctor_id', existing_type=sqlmodel.sql.sqltypes.GUID(), nullable=False)
+        batch_op.create_foreign_key('fk_triage_queue_entries_doctor_id_users', 'users', ['doctor_id'], ['id'])
+
+    if _recreating_table():
+        _create_order_index()
+    op.create_index('ix_triage_queue_doctor', 'triage_queue_entries', ['doctor_id', sa.text('urgency_score DESC'), 'created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_triage_queue_doctor', table_name='triage_queue_entries')
+    if _recreating_table():
+        op.drop_index('ix_triage_queue_order', table_name='triage_queue_entries')
+    with op.batch_alter_table('triage_queue_entries', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_triage_queue_entries_doctor_id_users', type_='foreignkey')
+        batch_op.drop_column('doctor_id')
+    if _recreating_table():
+        _create_order_index()
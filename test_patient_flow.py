@@ -126,10 +126,18 @@ def test_complete_flow():
         return
     
     print(f"\n6. Testing Get My Appointments...")
-    response = requests.get(f"{BASE_URL}/appointments/me", headers=headers)
+    # Paginated listing: follow X-Next-Cursor until the last page
+    appointments, params = [], {}
+    while True:
+        response = requests.get(f"{BASE_URL}/appointments/me", params=params, headers=headers)
+        if response.status_code != 200:
+            break
+        appointments += response.json()
+        if not response.headers.get("X-Next-Cursor"):
+            break
+        params = {"cursor": response.headers["X-Next-Cursor"]}
     print(f"   Status: {response.status_code}")
     if response.status_code == 200:
-        appointments = response.json()
         print(f"   ✅ Retrieved {len(appointments)} appointment(s)")
         if appointments:
             print(f"   Latest: {appointments[0].get('doctor_name', 'N/A')} - {appointments[0]['scheduled_at']}")
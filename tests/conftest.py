@@ -5,32 +5,33 @@ from dotenv import load_dotenv
 # Load .env file
 load_dotenv()
 
+# Offline defaults so the suite runs on a laptop without .env (real values win)
+os.environ.setdefault("DATABASE_URL", "sqlite:///./_pytest.db")
+os.environ.setdefault("JWT_SECRET", "test-secret")
+
 from app.core.config import settings
 
-@pytest.fixture(scope="session", autouse=True)
-def check_environment():
+LIVE_KEYS = {"ASSEMBLYAI_API_KEY": settings.ASSEMBLYAI_API_KEY, "GOOGLE_API_KEY": settings.GOOGLE_API_KEY}
+
+def pytest_collection_modifyitems(config, items):
     """
-    Validates that necessary API keys are present in the environment
-    before running any live tests.
+    Skips the live provider tests (tests/test_live_*.py) when API keys are missing,
+    instead of failing the whole run. Everything else runs offline.
     """
-    assemblyai_key = settings.ASSEMBLYAI_API_KEY
-    google_key = settings.GOOGLE_API_KEY
-    
-    missing_keys = []
-    if not assemblyai_key:
-        missing_keys.append("ASSEMBLYAI_API_KEY")
-    if not google_key:
-        missing_keys.append("GOOGLE_API_KEY")
-        
-    if missing_keys:
-        pytest.fail(f"Missing required environment variables for Live Tests: {', '.join(missing_keys)}. Please ensure they are set in your .env file.")
+    missing_keys = [name for name, value in LIVE_KEYS.items() if not value]
+    if not missing_keys:
+        return
+    skip_live = pytest.mark.skip(reason=f"Missing required environment variables for Live Tests: {', '.join(missing_keys)}")
+    for item in items:
+        if os.path.basename(str(item.fspath)).startswith("test_live_"):
+            item.add_marker(skip_live)
 
 from fastapi.testclient import TestClient
 from sqlmodel import SQLModel
 from app.main import app
 from app.core.db import engine
 # Import models to ensure they are registered with SQLModel.metadata
-from app.models.base import User, PatientProfile, DoctorProfile, Appointment, Consultation, AudioFile, SOAPNote
+from app.models.base import PatientProfile, DoctorProfile, Appointment, Consultation, AudioFile, SOAPNote
 
 @pytest.fixture(scope="session", autouse=True)
 def init_db():
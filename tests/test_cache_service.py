@@ -0,0 +1,159 @@
+import asyncio
+import os
+import time
+import pytest
+from unittest.mock import AsyncMock
+from app.services.cache_service import DiskCache, MemoryLRUCache, ResponseCache, TieredCache, cache_key
+from app.services import stt_service, llm_service
+from app.services.stt_service import AssemblyAIService
+from app.services.llm_service import GeminiService
+
+def test_disk_cache_hit_and_miss(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=1024 * 1024, max_age_seconds=60)
+    key = cache_key("audio-hash", "config")
+
+    assert cache.get(key) is None
+    cache.set(key, {"text": "hello"})
+    assert cache.get(key) == {"text": "hello"}
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_disk_cache_age_eviction(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=1024 * 1024, max_age_seconds=0)
+    cache.set("ab" * 32, {"text": "stale"})
+    time.sleep(0.01)
+    assert cache.get("ab" * 32) is None
+    assert cache.stats()["evictions"] == 1
+
+def test_disk_cache_size_eviction_drops_least_recently_used(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=600, max_age_seconds=60)
+    keys = [cache_key(i) for i in range(3)]
+    for i, key in enumerate(keys[:2]):
+        cache.set(key, {"text": "x" * 200})
+        old = time.time() - 100 + i
+        os.utime(cache._path(key), (old, old))
+
+    cache.get(keys[0]) # Refresh: keys[1] is now the least recently used
+    cache.set(keys[2], {"text": "x" * 200})
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[2]) is not None
+
+@pytest.mark.asyncio
+async def test_transcription_is_served_from_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(stt_service, "transcript_cache", DiskCache(str(tmp_path), max_bytes=1024 * 1024, max_age_seconds=60))
+    provider = AsyncMock(return_value={"text": "hello", "utterances": [], "confidence": 0.9, "id": "t1"})
+    monkeypatch.setattr(AssemblyAIService, "_transcribe", provider)
+    audio = tmp_path / "a.wav"
+    audio.write_bytes(b"audio")
+
+    first = await AssemblyAIService.transcribe_audio_async(str(audio))
+    second = await AssemblyAIService.transcribe_audio_async(str(audio))
+    await AssemblyAIService.transcribe_audio_async(str(audio), redact_pii=False) # Different config fingerprint
+
+    assert first == second
+    assert provider.await_count == 2
+
+def test_memory_lru_ttl_and_capacity():
+    cache = MemoryLRUCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", {"n": 1})
+    cache.set("b", {"n": 2})
+    cache.get("a")
+    cache.set("c", {"n": 3}) # Evicts "b", the least recently used
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"n": 1}
+
+    expired = MemoryLRUCache(max_entries=2, ttl_seconds=0)
+    expired.set("a", {"n": 1})
+    time.sleep(0.01)
+    assert expired.get("a") is None
+
+@pytest.mark.asyncio
+async def test_soap_note_cache_and_bypass(tmp_path, monkeypatch):
+    cache = TieredCache(MemoryLRUCache(16, 60), DiskCache(str(tmp_path), max_bytes=1024 * 1024, max_age_seconds=60))
+    monkeypatch.setattr(llm_service, "soap_cache", cache)
+    provider = AsyncMock(return_value={"soap_note": {"subjective": "Headache"}, "risk_flags": []})
+    monkeypatch.setattr(GeminiService, "_generate", provider)
+
+    first = await GeminiService.generate_soap_note_async("Patient has a headache.")
+    first["soap_note"]["subjective"] = "mutated by caller"
+    second = await GeminiService.generate_soap_note_async("Patient has a headache.")
+    assert second["soap_note"]["subjective"] == "Headache"
+    assert provider.await_count == 1
+
+    await GeminiService.generate_soap_note_async("Patient has a headache.", bypass_cache=True)
+    assert provider.await_count == 2
+
+    cache.memory.clear() # Disk tier survives a process restart
+    await GeminiService.generate_soap_note_async("Patient has a headache.")
+    assert provider.await_count == 2
+
+class SlowLoader:
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        return self.value
+
+@pytest.mark.asyncio
+async def test_response_cache_coalesces_concurrent_loads():
+    cache = ResponseCache(max_entries=8, ttl_seconds=60)
+    loader = SlowLoader([{"urgency_score": 90}])
+
+    requests = [asyncio.create_task(cache.get_or_load("queue", loader)) for _ in range(5)]
+    await asyncio.sleep(0.01)
+    loader.release.set()
+    responses = await asyncio.gather(*requests)
+
+    assert loader.calls == 1
+    assert len(set(responses)) == 1
+    etag, body = responses[0]
+    assert body == b'[{"urgency_score":90}]'
+    assert (etag, body) == ResponseCache.render([{"urgency_score": 90}]) # Same body, same ETag
+    assert await cache.get_or_load("queue", loader) == (etag, body)
+    assert (cache.stats()["loads"], cache.stats()["coalesced"]) == (1, 4)
+
+@pytest.mark.asyncio
+async def test_response_cache_expires_and_skips_loads_invalidated_midway():
+    expiring = ResponseCache(max_entries=8, ttl_seconds=0)
+    loader = SlowLoader([])
+    loader.release.set()
+    await expiring.get_or_load("queue", loader)
+    time.sleep(0.01)
+    await expiring.get_or_load("queue", loader)
+    assert loader.calls == 2
+
+    cache = ResponseCache(max_entries=8, ttl_seconds=60)
+    stale = SlowLoader(["before"])
+    request = asyncio.create_task(cache.get_or_load("queue", stale))
+    await asyncio.sleep(0.01)
+    cache.invalidate() # The queue changed while the query was running
+    fresh = SlowLoader(["after"])
+    fresh.release.set()
+    assert (await cache.get_or_load("queue", fresh))[1] == b'["after"]'
+    stale.release.set()
+    assert (await request)[1] == b'["before"]'
+    assert (await cache.get_or_load("queue", stale))[1] == b'["after"]'
+
+@pytest.mark.asyncio
+async def test_response_cache_load_errors_reach_every_waiter():
+    cache = ResponseCache(max_entries=8, ttl_seconds=60)
+    release = asyncio.Event()
+
+    async def failing():
+        await release.wait()
+        raise RuntimeError("database unavailable")
+
+    requests = [asyncio.create_task(cache.get_or_load("queue", failing)) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    release.set()
+    results = await asyncio.gather(*requests, return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert cache.memory.get("queue") is None
@@ -0,0 +1,381 @@
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from uuid import uuid4
+from unittest.mock import AsyncMock
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.models.base import User, UserRole, PatientProfile, Appointment, Consultation, ConsultationStatus, AudioFile, AudioUploaderType, SOAPNote, AILog, ProcessingStage, TriageQueueEntry, ProcessingJob, JobStatus
+from app.services.job_queue import JobQueueService
+from app.services.triage_queue import dashboard_cache
+import app.services.consultation_processor as processor
+import app.worker as worker
+import app.services.providers as providers
+from app.core.config import settings
+from app.services.stt_service import AssemblyAIService
+from app.services.llm_service import GeminiService
+
+class PoolCheckoutCounter:
+    """
+    Tracks how many pooled connections are checked out at any moment.
+    """
+    def __init__(self, engine):
+        self.current = 0
+        self.peak = 0
+        self.total = 0
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+
+    def _on_checkout(self, *args):
+        self.current += 1
+        self.total += 1
+        self.peak = max(self.peak, self.current)
+
+    def _on_checkin(self, *args):
+        self.current -= 1
+
+@pytest.fixture
+def engine(tmp_path):
+    # File-backed SQLite so the engines use a real QueuePool
+    engine = create_engine(f"sqlite:///{tmp_path / 'processor.db'}")
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+@pytest.fixture
+def async_engine(engine, tmp_path, monkeypatch):
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'processor.db'}")
+    monkeypatch.setattr(processor, "async_engine", async_engine)
+    return async_engine
+
+def _seed_consultation(engine, content_hash="0f" * 32, file_url="uploads/a.wav"):
+    with Session(engine) as session:
+        user = User(email=f"{uuid4()}@test.com", password_hash="pw", role=UserRole.PATIENT)
+        session.add(user)
+        session.commit()
+        session.add(PatientProfile(user_id=user.id, first_name="Test", last_name="Patient", medical_history="History of ulcer"))
+        appointment = Appointment(patient_id=user.id, doctor_id=user.id, scheduled_at=datetime.utcnow())
+        session.add(appointment)
+        session.commit()
+        consultation = Consultation(appointment_id=appointment.id, patient_id=user.id, doctor_id=user.id)
+        session.add(consultation)
+        session.commit()
+        session.add(AudioFile(consultation_id=consultation.id, uploaded_by=AudioUploaderType.PATIENT, file_name="a.wav", file_url=file_url, content_hash=content_hash))
+        session.commit()
+        return consultation.id
+
+@pytest.fixture
+def consultation_id(engine):
+    return _seed_consultation(engine)
+
+@pytest.mark.asyncio
+async def test_no_connection_held_during_provider_calls(engine, async_engine, consultation_id, monkeypatch):
+    counter = PoolCheckoutCounter(async_engine.sync_engine)
+    checked_out_during_io = []
+
+    async def fake_transcribe(file_path, *args, **kwargs):
+        checked_out_during_io.append(counter.current)
+        return {"text": "I have chest pain.", "utterances": [{"speaker": "A", "text": "I have chest pain."}], "confidence": 0.9}
+
+    async def fake_soap(transcript_text, utterances=None, patient_context=None):
+        checked_out_during_io.append(counter.current)
+        assert patient_context["first_name"] == "Test"
+        return {"soap_note": {"subjective": "Chest pain", "plan": "Aspirin"}, "risk_flags": []}
+
+    monkeypatch.setattr(AssemblyAIService, "transcribe_audio_async", fake_transcribe)
+    monkeypatch.setattr(GeminiService, "generate_soap_note_async", fake_soap)
+
+    await processor.process_consultation_flow(consultation_id)
+
+    assert checked_out_during_io == [0, 0]
+    assert counter.current == 0
+    assert counter.peak == 1 # Stages never nest sessions
+
+    with Session(engine) as session:
+        consultation = session.get(Consultation, consultation_id)
+        assert consultation.status == ConsultationStatus.COMPLETED
+        assert consultation.urgency_score == 90
+        assert len(consultation.safety_warnings) == 1
+        assert session.exec(select(SOAPNote).where(SOAPNote.consultation_id == consultation_id)).first() is not None
+        audio_file = session.exec(select(AudioFile).where(AudioFile.consultation_id == consultation_id)).first()
+        assert audio_file.transcription == "I have chest pain."
+
+@pytest.mark.asyncio
+async def test_llm_failure_flags_manual_review(engine, async_engine, consultation_id, monkeypatch):
+    counter = PoolCheckoutCounter(async_engine.sync_engine)
+
+    monkeypatch.setattr(AssemblyAIService, "transcribe_audio_async", AsyncMock(return_value={"text": "hello", "utterances": []}))
+    monkeypatch.setattr(GeminiService, "generate_soap_note_async", AsyncMock(side_effect=Exception("429 quota")))
+
+    await processor.process_consultation_flow(consultation_id)
+
+    assert counter.current == 0
+    with Session(engine) as session:
+        consultation = session.get(Consultation, consultation_id)
+        assert consultation.status == ConsultationStatus.FAILED
+        assert consultation.requires_manual_review is True
+        log = session.exec(select(AILog).where(AILog.consultation_id == consultation_id)).first()
+        assert log.status == "FAIL"
+
+@pytest.mark.asyncio
+async def test_identical_audio_reuses_stored_transcription(engine, async_engine, consultation_id, monkeypatch):
+    transcribe = AsyncMock(return_value={"text": "hello", "utterances": [{"speaker": "A", "text": "hello"}], "confidence": 0.8})
+    soap = AsyncMock(return_value={"soap_note": {"subjective": "Routine"}, "risk_flags": []})
+    monkeypatch.setattr(AssemblyAIService, "transcribe_audio_async", transcribe)
+    monkeypatch.setattr(GeminiService, "generate_soap_note_async", soap)
+
+    await processor.process_consultation_flow(consultation_id)
+    duplicate_id = _seed_consultation(engine) # Same content hash, fresh upload
+    await processor.process_consultation_flow(duplicate_id)
+
+    assert transcribe.await_count == 1
+    assert soap.await_args_list[1].args[:2] == ("hello", [{"speaker": "A", "text": "hello"}])
+    with Session(engine) as session:
+        audio_file = session.exec(select(AudioFile).where(AudioFile.consultation_id == duplicate_id)).first()
+        assert audio_file.transcription == "hello"
+        assert audio_file.transcription_config == AssemblyAIService.config_fingerprint()
+        assert session.get(Consultation, duplicate_id).status == ConsultationStatus.COMPLETED
+
+@pytest.mark.asyncio
+async def test_pipeline_runs_offline_with_fake_providers(engine, async_engine, monkeypatch):
+    monkeypatch.setattr(settings, "STT_PROVIDER", "fake")
+    monkeypatch.setattr(settings, "LLM_PROVIDER", "fake")
+    monkeypatch.setattr(providers, "_instances", {})
+    consultation_id = _seed_consultation(engine, file_url="uploads/day4_consultation06_patient.wav")
+
+    await processor.process_consultation_flow(consultation_id)
+
+    with Session(engine) as session:
+        consultation = session.get(Consultation, consultation_id)
+        assert consultation.status == ConsultationStatus.COMPLETED
+        note = session.exec(select(SOAPNote).where(SOAPNote.consultation_id == consultation_id)).first()
+        assert "hopelessness" in note.soap_json["subjective"] # Fixture case matched by file name
+        assert note.risk_flags == {"flags": ["Suicide Risk", "Chest Pain", "Emergency"]}
+        audio_file = session.exec(select(AudioFile).where(AudioFile.consultation_id == consultation_id)).first()
+        assert audio_file.transcription_config == providers.get_stt_provider().config_fingerprint()
+
+@pytest.mark.asyncio
+async def test_stage_timings_are_recorded_per_run(engine, async_engine, monkeypatch):
+    monkeypatch.setattr(settings, "STT_PROVIDER", "fake")
+    monkeypatch.setattr(settings, "LLM_PROVIDER", "fake")
+    monkeypatch.setattr(providers, "_instances", {})
+    consultation_id = _seed_consultation(engine, file_url="uploads/day4_consultation06_patient.wav")
+
+    await processor.process_consultation_flow(consultation_id, queued_at=datetime.utcnow() - timedelta(seconds=2))
+
+    with Session(engine) as session:
+        stages = {s.stage: s for s in session.exec(select(ProcessingStage).where(ProcessingStage.consultation_id == consultation_id)).all()}
+        assert list(stages) == ["queue_wait", "start", "stt", "save_transcript", "llm", "triage_safety", "complete"]
+        assert len({s.run_id for s in stages.values()}) == 1
+        assert stages["queue_wait"].latency_ms >= 2000
+        assert (stages["stt"].provider, stages["stt"].audio_duration_seconds) == ("fake", 14.0)
+        assert (stages["llm"].provider, stages["llm"].model_version) == ("fake", "fake-soap-v1")
+        assert all(s.status == "SUCCESS" for s in stages.values())
+        log = session.exec(select(AILog).where(AILog.consultation_id == consultation_id)).one()
+        assert log.model_version == "fake-soap-v1"
+        assert log.latency_ms == stages["llm"].latency_ms
+        assert session.exec(select(AudioFile).where(AudioFile.consultation_id == consultation_id)).one().duration == 14.0
+
+@pytest.mark.asyncio
+async def test_failed_stage_is_recorded_with_error(engine, async_engine, consultation_id, monkeypatch):
+    monkeypatch.setattr(AssemblyAIService, "transcribe_audio_async", AsyncMock(return_value={"text": "hello", "utterances": []}))
+    monkeypatch.setattr(GeminiService, "generate_soap_note_async", AsyncMock(side_effect=Exception("429 quota")))
+
+    await processor.process_consultation_flow(consultation_id)
+
+    with Session(engine) as session:
+        stages = session.exec(select(ProcessingStage).where(ProcessingStage.consultation_id == consultation_id)).all()
+        assert [(s.stage, s.status) for s in stages] == [
+            ("start", "SUCCESS"), ("stt", "SUCCESS"), ("save_transcript", "SUCCESS"), ("llm", "FAIL"), ("fail", "SUCCESS")
+        ]
+        assert stages[3].error_message == "429 quota"
+        assert stages[3].model_version == GeminiService.MODEL_NAME
+        assert session.exec(select(AILog).where(AILog.consultation_id == consultation_id)).one().model_version == GeminiService.MODEL_NAME
+
+@pytest.mark.asyncio
+async def test_triage_queue_projection_follows_consultation_status(engine, async_engine, consultation_id, monkeypatch):
+    monkeypatch.setattr(AssemblyAIService, "transcribe_audio_async", AsyncMock(return_value={"text": "hello", "utterances": []}))
+    soap = AsyncMock(return_value={"soap_note": {"subjective": "Routine"}, "risk_flags": []})
+    monkeypatch.setattr(GeminiService, "generate_soap_note_async", soap)
+
+    invalidations = dashboard_cache.invalidations
+    await processor.process_consultation_flow(consultation_id)
+    assert dashboard_cache.invalidations > invalidations # On the AsyncSession commits
+    with Session(engine) as session:
+        consultation = session.get(Consultation, consultation_id)
+        entry = session.get(TriageQueueEntry, consultation_id)
+        assert (entry.urgency_score, entry.triage_category) == (consultation.urgency_score, consultation.triage_category)
+        assert entry.created_at == consultation.created_at
+
+    # Reprocessing takes it off the queue; a failed run leaves it off
+    soap.side_effect = Exception("429 quota")
+    await processor.process_consultation_flow(consultation_id)
+    with Session(engine) as session:
+        assert session.get(Consultation, consultation_id).status == ConsultationStatus.FAILED
+        assert session.get(TriageQueueEntry, consultation_id) is None
+
+@pytest.mark.asyncio
+async def test_rerun_skips_stored_transcription_and_replaces_note(engine, async_engine, consultation_id, monkeypatch):
+    transcribe = AsyncMock(return_value={"text": "hello", "utterances": []})
+    soap = AsyncMock(side_effect=Exception("429 quota"))
+    monkeypatch.setattr(AssemblyAIService, "transcribe_audio_async", transcribe)
+    monkeypatch.setattr(GeminiService, "generate_soap_note_async", soap)
+    await processor.process_consultation_flow(consultation_id)
+
+    # Re-queued from the manual-review queue: only the LLM stage runs again
+    soap.side_effect = None
+    soap.return_value = {"soap_note": {"subjective": "First"}, "risk_flags": []}
+    await processor.process_consultation_flow(consultation_id)
+    soap.return_value = {"soap_note": {"subjective": "Second"}, "risk_flags": []}
+    await processor.process_consultation_flow(consultation_id)
+
+    assert transcribe.await_count == 1
+    with Session(engine) as session:
+        assert session.get(Consultation, consultation_id).status == ConsultationStatus.COMPLETED
+        note = session.exec(select(SOAPNote).where(SOAPNote.consultation_id == consultation_id)).one()
+        assert note.soap_json == {"subjective": "Second"}
+
+def _claim(engine, worker_id="worker-a"):
+    with Session(engine) as session:
+        job = JobQueueService.claim_next(session, worker_id)
+        session.expunge(job)
+        return job
+
+@pytest.mark.asyncio
+async def test_worker_retries_provider_failures_then_flags_review(engine, async_engine, consultation_id, monkeypatch):
+    monkeypatch.setattr(worker, "engine", engine)
+    monkeypatch.setattr(AssemblyAIService, "transcribe_audio_async", AsyncMock(return_value={"text": "hello", "utterances": []}))
+    monkeypatch.setattr(GeminiService, "generate_soap_note_async", AsyncMock(side_effect=Exception("429 quota")))
+    with Session(engine) as session:
+        job_id = JobQueueService.enqueue(session, consultation_id, max_attempts=2).id
+        session.commit()
+
+    await worker._run_job(_claim(engine), "worker-a")
+    with Session(engine) as session:
+        job = session.get(ProcessingJob, job_id)
+        consultation = session.get(Consultation, consultation_id)
+        assert (job.status, job.last_error) == (JobStatus.QUEUED, "429 quota")
+        assert job.available_at > datetime.utcnow() # Backoff before the retry
+        assert (consultation.status, consultation.requires_manual_review) == (ConsultationStatus.IN_PROGRESS, False)
+        job.available_at = datetime.utcnow() - timedelta(seconds=1)
+        session.add(job)
+        session.commit()
+
+    await worker._run_job(_claim(engine), "worker-a")
+    with Session(engine) as session:
+        consultation = session.get(Consultation, consultation_id)
+        assert session.get(ProcessingJob, job_id).status == JobStatus.FAILED
+        assert (consultation.status, consultation.requires_manual_review) == (ConsultationStatus.FAILED, True)
+        assert len(session.exec(select(AILog).where(AILog.consultation_id == consultation_id)).all()) == 2
+
+@pytest.mark.asyncio
+async def test_reprocessed_job_that_fails_again_is_retried(engine, async_engine, consultation_id, monkeypatch):
+    monkeypatch.setattr(worker, "engine", engine)
+    monkeypatch.setattr(AssemblyAIService, "transcribe_audio_async", AsyncMock(return_value={"text": "hello", "utterances": []}))
+    monkeypatch.setattr(GeminiService, "generate_soap_note_async", AsyncMock(side_effect=Exception("429 quota")))
+    await processor.process_consultation_flow(consultation_id) # Flagged for manual review
+    with Session(engine) as session:
+        assert session.get(Consultation, consultation_id).requires_manual_review is True
+        job_id = JobQueueService.reprocess(session, [consultation_id])[0].id
+        session.commit()
+
+    await worker._run_job(_claim(engine), "worker-a")
+    with Session(engine) as session:
+        job = session.get(ProcessingJob, job_id)
+        consultation = session.get(Consultation, consultation_id)
+        assert (job.status, job.attempts) == (JobStatus.QUEUED, 1)
+        assert (consultation.status, consultation.requires_manual_review) == (ConsultationStatus.IN_PROGRESS, False)
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("heartbeat_error", [None, "database is locked"])
+async def test_worker_abandons_the_flow_once_its_lease_is_gone(engine, consultation_id, monkeypatch, heartbeat_error):
+    monkeypatch.setattr(worker, "engine", engine)
+    with Session(engine) as session:
+        job_id = JobQueueService.enqueue(session, consultation_id).id
+        session.commit()
+    job = _claim(engine)
+    monkeypatch.setattr(settings, "JOB_HEARTBEAT_SECONDS", 0.01)
+    monkeypatch.setattr(settings, "JOB_LEASE_SECONDS", 0.05)
+
+    outcomes = []
+    async def slow_flow(*args, **kwargs):
+        try:
+            await asyncio.sleep(5)
+            outcomes.append("finished")
+        except asyncio.CancelledError:
+            outcomes.append("cancelled")
+            raise
+    beats = []
+    def heartbeat(session, job_id, worker_id, lease_seconds=None):
+        beats.append(worker_id)
+        if heartbeat_error:
+            raise Exception(heartbeat_error) # Retried until the lease may have lapsed
+        return False # Reclaimed by another worker
+    monkeypatch.setattr(worker, "process_consultation_flow", slow_flow)
+    monkeypatch.setattr(JobQueueService, "heartbeat", staticmethod(heartbeat))
+
+    await asyncio.wait_for(worker._run_job(job, "worker-a"), 2.0)
+    assert outcomes == ["cancelled"]
+    if heartbeat_error:
+        assert len(beats) > 1 # A failed renewal is retried before giving up
+    else:
+        assert len(beats) == 1
+    with Session(engine) as session:
+        job = session.get(ProcessingJob, job_id)
+        assert (job.status, job.lease_owner) == (JobStatus.RUNNING, "worker-a") # Left for whoever reclaims it
+
+@pytest.mark.asyncio
+async def test_reprocessing_a_completed_flagged_consultation(engine, async_engine, consultation_id, monkeypatch):
+    monkeypatch.setattr(worker, "engine", engine)
+    monkeypatch.setattr(AssemblyAIService, "transcribe_audio_async", AsyncMock(return_value={"text": "hello", "utterances": []}))
+    monkeypatch.setattr(GeminiService, "generate_soap_note_async", AsyncMock(return_value={"soap_note": {"subjective": "Routine"}, "risk_flags": []}))
+    await processor.process_consultation_flow(consultation_id)
+    with Session(engine) as session:
+        # Flagged while a run it had lost the lease on went on to complete
+        consultation = session.get(Consultation, consultation_id)
+        consultation.requires_manual_review = True
+        session.add(consultation)
+        session.commit()
+
+        job_id = JobQueueService.reprocess(session, [consultation_id])[0].id
+        session.commit()
+        assert session.get(TriageQueueEntry, consultation_id) is None
+
+    await worker._run_job(_claim(engine), "worker-a")
+    with Session(engine) as session:
+        consultation = session.get(Consultation, consultation_id)
+        assert session.get(ProcessingJob, job_id).status == JobStatus.SUCCEEDED
+        assert (consultation.status, consultation.requires_manual_review) == (ConsultationStatus.COMPLETED, False)
+        assert len(session.exec(select(TriageQueueEntry)).all()) == 1
+
+@pytest.mark.asyncio
+async def test_completing_clears_the_manual_review_flag(engine, async_engine, consultation_id, monkeypatch):
+    monkeypatch.setattr(AssemblyAIService, "transcribe_audio_async", AsyncMock(return_value={"text": "hello", "utterances": []}))
+    monkeypatch.setattr(GeminiService, "generate_soap_note_async", AsyncMock(return_value={"soap_note": {"subjective": "Routine"}, "risk_flags": []}))
+    with Session(engine) as session:
+        JobQueueService._flag_for_review(session, consultation_id) # e.g. by fail_expired during the run
+        session.commit()
+
+    await processor.process_consultation_flow(consultation_id)
+    with Session(engine) as session:
+        consultation = session.get(Consultation, consultation_id)
+        assert (consultation.status, consultation.requires_manual_review) == (ConsultationStatus.COMPLETED, False)
+        assert session.exec(JobQueueService.reprocessable_query([consultation_id])).all() == []
+
+def test_stage_timings_endpoint_aggregates_recent_runs(engine):
+    from app.api.v1.system import get_stage_timings
+    consultation_id = _seed_consultation(engine)
+    run_id = uuid4()
+    with Session(engine) as session:
+        session.add_all([
+            ProcessingStage(consultation_id=consultation_id, run_id=run_id, stage="llm", status="SUCCESS", latency_ms=100.0, provider="gemini", model_version="gemini-2.5-flash"),
+            ProcessingStage(consultation_id=consultation_id, run_id=run_id, stage="llm", status="FAIL", latency_ms=300.0, provider="gemini", model_version="gemini-2.5-flash"),
+            ProcessingStage(consultation_id=consultation_id, run_id=run_id, stage="start", status="SUCCESS", latency_ms=5.0,
+                            created_at=datetime.utcnow() - timedelta(days=2)),
+        ])
+        session.commit()
+
+        assert get_stage_timings(hours=24, session=session) == [{
+            "stage": "llm", "provider": "gemini", "model_version": "gemini-2.5-flash",
+            "count": 2, "failures": 1, "mean_ms": 200.0, "max_ms": 300.0
+        }]
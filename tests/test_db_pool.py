@@ -0,0 +1,38 @@
+from sqlalchemy.pool import StaticPool
+from sqlmodel import create_engine
+from app.core import db
+from prometheus_client import REGISTRY
+from app.core.db import engine_options, InstrumentedQueuePool, PoolStats
+
+def test_postgres_defaults_and_overrides(monkeypatch):
+    monkeypatch.setattr(db.settings, "DB_POOL_SIZE", 3)
+    options = engine_options("postgresql://u:p@localhost/neuro")
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert options["pool_size"] == 3 # Setting wins
+    assert options["max_overflow"] == 20 # Dialect default
+    assert options["pool_pre_ping"] is True
+    assert options["connect_args"]["options"] == "-c statement_timeout=30000"
+
+def test_sqlite_memory_uses_static_pool():
+    options = engine_options("sqlite://")
+    assert options["poolclass"] is StaticPool
+    assert "pool_size" not in options
+
+def test_pool_stats_track_checkouts(tmp_path):
+    class TestPool(InstrumentedQueuePool):
+        stats = PoolStats("test")
+
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    engine = create_engine(url, **engine_options(url, pool_class=TestPool))
+    with engine.connect():
+        with engine.connect():
+            snapshot = TestPool.stats.snapshot(engine.pool)
+            assert snapshot["checked_out"] == 2
+            assert REGISTRY.get_sample_value("db_pool_connections_checked_out", {"pool": "test"}) == 2
+
+    snapshot = TestPool.stats.snapshot(engine.pool)
+    assert snapshot["checked_out"] == 0
+    assert snapshot["checkouts_total"] == 2
+    assert snapshot["wait_seconds_histogram"]["+Inf"] == 2
+    assert REGISTRY.get_sample_value("db_pool_connections_checked_out", {"pool": "test"}) == 0
+    assert REGISTRY.get_sample_value("db_pool_checkout_wait_seconds_count", {"pool": "test"}) == 2
@@ -0,0 +1,68 @@
+import asyncio
+import threading
+import time
+import pytest
+from app.services.executors import BoundedExecutor
+
+@pytest.mark.asyncio
+async def test_concurrency_is_capped_and_waits_are_recorded():
+    executor = BoundedExecutor("test", max_workers=2)
+    lock = threading.Lock()
+    in_flight = 0
+    peak = 0
+
+    def blocking_call(i):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.05)
+        with lock:
+            in_flight -= 1
+        return i
+
+    results = await asyncio.gather(*(executor.run(blocking_call, i) for i in range(6)))
+    executor.shutdown()
+
+    assert results == list(range(6))
+    assert peak == 2
+    stats = executor.stats()
+    assert stats["completed"] == 6
+    assert stats["queued"] == 0 and stats["active"] == 0
+    assert stats["peak_queued"] >= 4
+    assert stats["wait_max_ms"] >= 50 # Last calls waited for two rounds to finish
+
+@pytest.mark.asyncio
+async def test_failures_propagate_and_are_counted():
+    executor = BoundedExecutor("test", max_workers=1)
+
+    def boom():
+        raise ValueError("provider down")
+
+    with pytest.raises(ValueError):
+        await executor.run(boom)
+    executor.shutdown()
+    assert executor.stats()["failed"] == 1
+
+@pytest.mark.asyncio
+async def test_cancelled_waiting_call_leaves_the_queue_and_never_runs():
+    from app.core.metrics import PROVIDER_QUEUED
+    executor = BoundedExecutor("test-cancel", max_workers=1)
+    release = threading.Event()
+    ran = []
+
+    running = asyncio.create_task(executor.run(release.wait))
+    waiting = asyncio.create_task(executor.run(ran.append, "waiting"))
+    await asyncio.sleep(0.05)
+    assert executor.stats()["queued"] == 1
+
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    release.set()
+    await running
+    executor.shutdown()
+
+    assert ran == []
+    assert executor.stats()["queued"] == 0
+    assert PROVIDER_QUEUED.labels("test-cancel")._value.get() == 0
@@ -0,0 +1,51 @@
+import pytest
+from app.services.fake_providers import FakeSTTProvider, FakeLLMProvider, load_fixture_cases
+from app.services.providers import get_stt_provider, get_llm_provider, register_llm_provider
+from app.services.stt_service import AssemblyAIService
+
+CASES = load_fixture_cases("fixtures/mock_soap_data.json")
+
+@pytest.mark.asyncio
+async def test_fakes_are_deterministic_and_consistent():
+    stt = FakeSTTProvider(CASES)
+    llm = FakeLLMProvider(CASES)
+
+    transcript = await stt.transcribe_audio_async("uploads/day1_consultation01_patient.wav")
+    again = await FakeSTTProvider(CASES).transcribe_audio_async("uploads/day1_consultation01_patient.wav")
+    assert transcript == again
+    assert [u["speaker"] for u in transcript["utterances"]] == ["A", "B", "A"]
+
+    soap = await llm.generate_soap_note_async(transcript["text"], transcript["utterances"])
+    case = next(c for c in CASES if c["filename"] == "day1_consultation01_patient.wav")
+    assert soap["soap_note"] == case["soap_note"]
+    assert soap["risk_flags"] == case["risk_flags"]
+
+@pytest.mark.asyncio
+async def test_failure_rate_is_seeded():
+    async def outcomes(seed):
+        llm = FakeLLMProvider(CASES, failure_rate=0.5, seed=seed)
+        result = []
+        for _ in range(20):
+            try:
+                await llm.generate_soap_note_async("text")
+                result.append(True)
+            except Exception as e:
+                assert "injected" in str(e)
+                result.append(False)
+        return result
+
+    first = await outcomes(seed=7)
+    assert first == await outcomes(seed=7)
+    assert 0 < first.count(False) < 20
+
+def test_registry_selects_backends_by_name():
+    assert get_stt_provider("assemblyai") is AssemblyAIService
+    assert isinstance(get_stt_provider("fake"), FakeSTTProvider)
+    assert get_llm_provider("fake") is get_llm_provider("fake")
+
+    custom = FakeLLMProvider(CASES)
+    register_llm_provider("custom", lambda: custom)
+    assert get_llm_provider("custom") is custom
+
+    with pytest.raises(ValueError, match="Unknown stt provider"):
+        get_stt_provider("whisper")
@@ -0,0 +1,175 @@
+import pytest
+from datetime import datetime, timedelta
+from uuid import uuid4
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlalchemy.pool import StaticPool
+from app.models.base import User, UserRole, Appointment, Consultation, ConsultationStatus, ProcessingJob, JobStatus, AudioFile, AudioUploaderType
+from app.services import job_queue
+from app.services.job_queue import JobQueueService
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+@pytest.fixture
+def consultation(session):
+    user = User(email=f"{uuid4()}@test.com", password_hash="pw", role=UserRole.PATIENT)
+    session.add(user)
+    session.commit()
+    appointment = Appointment(patient_id=user.id, doctor_id=user.id, scheduled_at=datetime.utcnow())
+    session.add(appointment)
+    session.commit()
+    consultation = Consultation(appointment_id=appointment.id, patient_id=user.id, doctor_id=user.id, status=ConsultationStatus.IN_PROGRESS)
+    session.add(consultation)
+    session.commit()
+    return consultation
+
+def test_enqueue_is_idempotent_while_pending(session, consultation):
+    first = JobQueueService.enqueue(session, consultation.id)
+    session.commit()
+    second = JobQueueService.enqueue(session, consultation.id)
+    assert first.id == second.id
+
+def test_upload_during_a_run_queues_behind_it(session, consultation):
+    running = JobQueueService.enqueue(session, consultation.id)
+    session.commit()
+    JobQueueService.claim_next(session, "worker-a")
+
+    # The running job may already have read the old audio: the re-upload gets its own job
+    queued = JobQueueService.enqueue(session, consultation.id)
+    session.commit()
+    assert queued.id != running.id
+    assert JobQueueService.enqueue(session, consultation.id).id == queued.id
+    assert JobQueueService.claim_next(session, "worker-b") is None # Not alongside the running one
+
+    JobQueueService.complete(session, running.id, "worker-a")
+    assert JobQueueService.claim_next(session, "worker-b").id == queued.id
+
+def test_claim_is_exclusive(session, consultation):
+    JobQueueService.enqueue(session, consultation.id)
+    session.commit()
+
+    job = JobQueueService.claim_next(session, "worker-a")
+    assert job is not None
+    assert job.status == JobStatus.RUNNING
+    assert job.lease_owner == "worker-a"
+    assert job.attempts == 1
+
+    # Lease is live, nobody else can take it
+    assert JobQueueService.claim_next(session, "worker-b") is None
+    assert JobQueueService.heartbeat(session, job.id, "worker-a") is True
+    assert JobQueueService.heartbeat(session, job.id, "worker-b") is False
+
+def test_expired_lease_is_reclaimed(session, consultation):
+    queued = JobQueueService.enqueue(session, consultation.id)
+    queued.available_at = datetime.utcnow() - timedelta(minutes=10)
+    session.commit()
+    job = JobQueueService.claim_next(session, "worker-a")
+
+    # Simulate a crashed worker: no heartbeat, lease in the past
+    lapsed_at = datetime.utcnow() - timedelta(seconds=1)
+    job.lease_expires_at = lapsed_at
+    session.add(job)
+    session.commit()
+
+    reclaimed = JobQueueService.claim_next(session, "worker-b")
+    assert reclaimed.id == job.id
+    assert reclaimed.lease_owner == "worker-b"
+    assert reclaimed.attempts == 2
+    # Queue wait is measured from the lapsed lease, not from the first enqueue
+    assert reclaimed.available_at == lapsed_at
+    # The original worker can no longer extend it
+    assert JobQueueService.heartbeat(session, job.id, "worker-a") is False
+
+def test_fail_retries_then_flags_manual_review(session, consultation):
+    JobQueueService.enqueue(session, consultation.id, max_attempts=2)
+    session.commit()
+
+    job = JobQueueService.claim_next(session, "worker-a")
+    JobQueueService.fail(session, job.id, "worker-a", "boom")
+    session.refresh(job)
+    assert job.status == JobStatus.QUEUED
+    assert job.available_at > datetime.utcnow() # Backoff before the retry
+
+    job.available_at = datetime.utcnow() - timedelta(seconds=1)
+    session.add(job)
+    session.commit()
+
+    job = JobQueueService.claim_next(session, "worker-a")
+    JobQueueService.fail(session, job.id, "worker-a", "boom again")
+    session.refresh(job)
+    session.refresh(consultation)
+    assert job.status == JobStatus.FAILED
+    assert consultation.status == ConsultationStatus.FAILED
+    assert consultation.requires_manual_review is True
+
+def _flagged(session, minutes_ago, audio=True):
+    user = User(email=f"{uuid4()}@test.com", password_hash="pw", role=UserRole.PATIENT)
+    session.add(user)
+    session.flush()
+    appointment = Appointment(patient_id=user.id, doctor_id=user.id, scheduled_at=datetime.utcnow())
+    session.add(appointment)
+    session.flush()
+    consultation = Consultation(
+        appointment_id=appointment.id, patient_id=user.id, doctor_id=user.id, status=ConsultationStatus.FAILED,
+        requires_manual_review=True, created_at=datetime.utcnow() - timedelta(minutes=minutes_ago)
+    )
+    session.add(consultation)
+    session.flush()
+    if audio:
+        session.add(AudioFile(consultation_id=consultation.id, uploaded_by=AudioUploaderType.PATIENT, file_name="a.wav", file_url="uploads/a.wav"))
+    session.commit()
+    return consultation
+
+def test_reprocess_requeues_flagged_consultations_paced(session, monkeypatch):
+    monkeypatch.setattr(job_queue, "provider_blocked_until", lambda: 0.0)
+    newest, oldest, middle = _flagged(session, 1), _flagged(session, 30), _flagged(session, 10)
+    _flagged(session, 20, audio=False) # Nothing to re-run
+    already_queued = _flagged(session, 40)
+    JobQueueService.enqueue(session, already_queued.id)
+    session.commit()
+
+    jobs = JobQueueService.reprocess(session, per_minute=30)
+    session.commit()
+
+    assert [job.consultation_id for job in jobs] == [oldest.id, middle.id, newest.id]
+    assert [(later.available_at - earlier.available_at).total_seconds() for earlier, later in zip(jobs, jobs[1:])] == [2.0, 2.0]
+    for consultation in (oldest, middle, newest):
+        session.refresh(consultation)
+        assert (consultation.status, consultation.requires_manual_review) == (ConsultationStatus.IN_PROGRESS, False)
+    # Claimed oldest first, and only once its turn comes
+    assert JobQueueService.claim_next(session, "worker-a").consultation_id == already_queued.id
+    assert JobQueueService.claim_next(session, "worker-a").consultation_id == oldest.id
+    assert JobQueueService.claim_next(session, "worker-a") is None
+    assert JobQueueService.reprocess(session) == []
+
+def test_reprocess_selected_waits_out_provider_block(session, monkeypatch):
+    blocked_until = datetime.utcnow() + timedelta(minutes=5)
+    monkeypatch.setattr(job_queue, "provider_blocked_until", lambda: (blocked_until - datetime(1970, 1, 1)).total_seconds())
+    selected, other = _flagged(session, 5), _flagged(session, 10)
+
+    jobs = JobQueueService.reprocess(session, [selected.id])
+    session.commit()
+
+    assert [job.consultation_id for job in jobs] == [selected.id]
+    assert abs((jobs[0].available_at - blocked_until).total_seconds()) < 0.01
+    session.refresh(other)
+    assert other.requires_manual_review is True
+
+def test_concurrent_reprocess_enqueues_each_consultation_once(session, monkeypatch):
+    flagged = [_flagged(session, minutes) for minutes in (1, 2)]
+    first = JobQueueService.reprocess(session)
+    session.commit()
+
+    # A second call that read the candidates before the first one committed
+    stale = lambda consultation_ids=None, limit=None: select(Consultation).order_by(Consultation.created_at)
+    monkeypatch.setattr(JobQueueService, "reprocessable_query", staticmethod(stale))
+    second = JobQueueService.reprocess(session)
+    session.commit()
+
+    assert {job.consultation_id for job in first} == {c.id for c in flagged}
+    assert second == []
+    assert len(session.exec(select(ProcessingJob)).all()) == 2
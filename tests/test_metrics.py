@@ -0,0 +1,69 @@
+import os
+import subprocess
+import sys
+import textwrap
+from uuid import uuid4
+from prometheus_client.parser import text_string_to_metric_families
+from sqlmodel import Session
+from app.core.db import engine
+from app.core.security import create_access_token
+from app.models.base import User, UserRole
+
+def _samples(text: str):
+    return {(s.name, tuple(sorted(s.labels.items()))): s.value for family in text_string_to_metric_families(text) for s in family.samples}
+
+def _staff_headers():
+    with Session(engine) as session:
+        doctor = User(email=f"{uuid4()}@test.com", password_hash="pw", role=UserRole.DOCTOR)
+        session.add(doctor)
+        session.commit()
+        return {"Authorization": f"Bearer {create_access_token(doctor.id, doctor.role.value)}"}
+
+def test_metrics_endpoint_exports_http_and_pipeline_metrics(client):
+    assert client.get("/api/v1/system/executors").status_code == 401 # Staff only
+    assert client.get("/api/v1/system/executors", headers=_staff_headers()).status_code == 200
+    assert client.get("/api/v1/consultations/not-a-uuid").status_code in (401, 403, 422)
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    samples = _samples(response.text)
+
+    route = (("method", "GET"), ("route", "/api/v1/system/executors"))
+    assert samples[("http_requests_total", route + (("status", "200"),))] >= 1
+    assert samples[("http_request_duration_seconds_count", route)] >= 1
+    assert samples[("http_requests_in_progress", route)] == 0
+    # Labelled by route template, not the raw path
+    assert any(key[0] == "http_requests_total" and ("route", "/api/v1/consultations/{id}") in key[1] for key in samples)
+    assert ("pipeline_jobs", (("status", "QUEUED"),)) in samples
+    assert ("pipeline_manual_review_consultations", ()) in samples
+    assert ("db_pool_connections_checked_out", (("pool", "sync"),)) in samples
+
+def test_multiprocess_mode_aggregates_worker_processes(tmp_path):
+    metrics_dir = tmp_path / "prometheus"
+    metrics_dir.mkdir()
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(metrics_dir), "DATABASE_URL": f"sqlite:///{tmp_path / 'metrics.db'}"}
+    record = textwrap.dedent("""
+        from app.core.metrics import HTTP_REQUESTS, PROVIDER_IN_FLIGHT, observe_stage
+        HTTP_REQUESTS.labels("GET", "/api/v1/dashboard/queue", "200").inc(3)
+        PROVIDER_IN_FLIGHT.labels("stt").inc()
+        observe_stage("llm", 1.5, True)
+    """)
+    for _ in range(2): # Two "uvicorn workers"
+        subprocess.run([sys.executable, "-c", record], env=env, check=True)
+
+    output = tmp_path / "metrics.txt"
+    def scrape():
+        subprocess.run([sys.executable, "-c", f"from app.core.metrics import render_latest; open({str(output)!r}, 'wb').write(render_latest())"], env=env, check=True, capture_output=True)
+        return _samples(output.read_text())
+
+    samples = scrape()
+    assert samples[("http_requests_total", (("method", "GET"), ("route", "/api/v1/dashboard/queue"), ("status", "200")))] == 6
+    assert samples[("pipeline_stage_duration_seconds_count", (("outcome", "success"), ("stage", "llm")))] == 2
+    assert samples[("provider_calls_in_flight", (("pool", "stt"),))] == 2
+
+    # Exited workers' live gauges are dropped once marked dead
+    for pid_file in metrics_dir.glob("gauge_livesum_*.db"):
+        pid = int(pid_file.stem.rsplit("_", 1)[1])
+        subprocess.run([sys.executable, "-c", f"from app.core.metrics import mark_process_dead; mark_process_dead({pid})"], env=env, check=True)
+    assert ("provider_calls_in_flight", (("pool", "stt"),)) not in scrape()
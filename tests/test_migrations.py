@@ -0,0 +1,62 @@
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect
+from sqlmodel import SQLModel
+from app.core.db import engine
+from benchmarks.explain_queries import check
+
+HOT_INDEXES = {
+    "appointments": {"ix_appointments_doctor_scheduled", "ix_appointments_patient_scheduled", "ix_appointments_scheduled"},
+    "consultations": {"ix_consultations_manual_review", "ix_consultations_doctor_created",
+                      "ix_consultations_patient_created", "ix_consultations_created"},
+    "triage_queue_entries": {"ix_triage_queue_order", "ix_triage_queue_doctor"},
+}
+
+def _alembic(url: str) -> Config:
+    config = Config("alembic.ini")
+    config.set_main_option("sqlalchemy.url", url)
+    return config
+
+def _indexes(db_engine, table: str) -> set:
+    return {index["name"] for index in inspect(db_engine).get_indexes(table)}
+
+def test_migrations_upgrade_and_downgrade(tmp_path):
+    url = f"sqlite:///{tmp_path / 'migrated.db'}"
+    config = _alembic(url)
+    db_engine = create_engine(url)
+
+    command.upgrade(config, "head")
+    tables = set(inspect(db_engine).get_table_names())
+    assert set(SQLModel.metadata.tables) <= tables
+    for table, names in HOT_INDEXES.items():
+        assert names <= _indexes(db_engine, table)
+    assert {"content_hash", "transcription_utterances"} <= {c["name"] for c in inspect(db_engine).get_columns("audio_files")}
+
+    command.downgrade(config, "0002")
+    assert "triage_queue_entries" not in inspect(db_engine).get_table_names()
+    for table in ("appointments", "consultations"):
+        assert not HOT_INDEXES[table] & _indexes(db_engine, table)
+
+    command.downgrade(config, "base")
+    assert set(inspect(db_engine).get_table_names()) <= {"alembic_version"}
+    db_engine.dispose()
+
+def test_existing_database_is_stamped_then_upgraded(tmp_path):
+    # Databases created by init_db() before migrations existed: stamp the baseline and upgrade
+    url = f"sqlite:///{tmp_path / 'legacy.db'}"
+    db_engine = create_engine(url)
+    SQLModel.metadata.create_all(db_engine)
+    config = _alembic(url)
+
+    command.stamp(config, "0001")
+    command.upgrade(config, "head")
+
+    for table, names in HOT_INDEXES.items():
+        assert names <= _indexes(db_engine, table)
+    db_engine.dispose()
+
+def test_hot_queries_use_their_indexes():
+    results = check(engine)
+    missing = {name: result["plan"] for name, result in results.items() if not result["ok"]}
+    assert not missing
@@ -0,0 +1,63 @@
+import pytest
+from datetime import datetime, timedelta
+from uuid import uuid4
+from sqlmodel import Session
+from app.core.db import engine
+from app.core.security import create_access_token
+from app.models.base import User, UserRole, Appointment, Consultation
+from app.api.pagination import encode_cursor, decode_cursor
+
+BASE = datetime(2030, 1, 1, 9, 0)
+
+@pytest.fixture(scope="module")
+def patient(init_db):
+    with Session(engine) as session:
+        patient = User(email=f"{uuid4()}@page.test", password_hash="x", role=UserRole.PATIENT)
+        doctor = User(email=f"{uuid4()}@page.test", password_hash="x", role=UserRole.DOCTOR)
+        session.add_all([patient, doctor])
+        session.commit()
+        for i in range(7):
+            # Pairs share a timestamp, so ordering has to fall back to the id
+            when = BASE + timedelta(hours=i // 2)
+            appointment = Appointment(patient_id=patient.id, doctor_id=doctor.id, scheduled_at=when)
+            session.add(appointment)
+            session.flush()
+            session.add(Consultation(appointment_id=appointment.id, patient_id=patient.id, doctor_id=doctor.id, created_at=when))
+        session.commit()
+        return {"Authorization": f"Bearer {create_access_token(patient.id, UserRole.PATIENT.value)}"}
+
+def _all_pages(client, path, headers, **params):
+    pages, cursor = [], None
+    while True:
+        response = client.get(path, headers=headers, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200, response.text
+        pages.append(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return pages
+
+@pytest.mark.parametrize("path, sort_key", [("/api/v1/appointments/me", "scheduled_at"), ("/api/v1/consultations/me", None)])
+def test_pages_cover_every_row_once_in_stable_order(client, patient, path, sort_key):
+    pages = _all_pages(client, path, patient, limit=3)
+    assert [len(page) for page in pages] == [3, 3, 1]
+    ids = [row["id"] for page in pages for row in page]
+    assert len(set(ids)) == 7
+
+    ascending = [row["id"] for page in _all_pages(client, path, patient, limit=2, order="asc") for row in page]
+    assert ascending == ids[::-1]
+    if sort_key:
+        times = [row[sort_key] for page in pages for row in page]
+        assert times == sorted(times, reverse=True)
+
+def test_date_range_filters_on_sort_column(client, patient):
+    response = client.get("/api/v1/appointments/me", headers=patient, params={"from": (BASE + timedelta(hours=1)).isoformat(), "to": (BASE + timedelta(hours=3)).isoformat()})
+    assert len(response.json()) == 4
+    assert "X-Next-Cursor" not in response.headers
+
+def test_page_size_is_capped_and_cursors_validated(client, patient):
+    assert client.get("/api/v1/consultations/me", headers=patient, params={"limit": 10_000}).status_code == 422
+    assert client.get("/api/v1/consultations/me", headers=patient, params={"cursor": "not-a-cursor"}).status_code == 400
+
+def test_cursor_round_trip():
+    row_id = uuid4()
+    assert decode_cursor(encode_cursor(BASE, row_id)) == (BASE, row_id)
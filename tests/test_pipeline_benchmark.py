@@ -0,0 +1,53 @@
+import json
+import os
+import subprocess
+import sys
+from benchmarks.pipeline_throughput import summarize, compare
+from benchmarks.stats import percentile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _results(throughput, p95_ms, round_trips=12.0):
+    return {
+        "throughput_per_minute": throughput,
+        "db_roundtrips_per_consultation": round_trips,
+        "peak_rss_mb": 60.0,
+        "end_to_end": summarize([p95_ms / 1000]),
+        "stages": {"stt": summarize([p95_ms / 1000])},
+    }
+
+def test_percentiles_use_nearest_rank():
+    values = [i / 1000 for i in range(1, 101)] # 1..100 ms
+    assert percentile(values, 50) == 0.05
+    assert percentile(values, 95) == 0.095
+    assert percentile(values, 99) == 0.099
+    assert percentile([], 95) == 0.0
+
+def test_compare_flags_regressions_beyond_tolerance():
+    baseline = _results(1000, 400)
+    assert compare(_results(900, 450), baseline, tolerance=0.2) == []
+    regressions = compare(_results(700, 600, round_trips=20), baseline, tolerance=0.2)
+    assert [r.split(":")[0] for r in regressions] == [
+        "throughput_per_minute", "db_roundtrips_per_consultation", "end_to_end.p95_ms", "stages.stt.p95_ms"
+    ]
+    # Millisecond jitter on fast stages is below the noise floor
+    assert compare(_results(1000, 4), _results(1000, 2), tolerance=0.2) == []
+
+def _run_benchmark(*args):
+    command = [sys.executable, "-m", "benchmarks.pipeline_throughput", "--consultations", "2", "--stt-latency", "0", "--llm-latency", "0", *args]
+    return subprocess.run(command, cwd=ROOT, capture_output=True, text=True, timeout=120)
+
+def test_benchmark_runs_end_to_end_and_refuses_mismatched_baselines(tmp_path):
+    output = tmp_path / "results.json"
+    run = _run_benchmark("--concurrency", "2", "--output", str(output))
+    assert run.returncode == 0, run.stderr
+    results = json.loads(output.read_text())
+    assert results["completed"] == 2
+    assert {"start", "stt", "llm", "complete"} <= set(results["stages"])
+    assert results["config"]["concurrency"] == 2
+
+    # Same code, different concurrency: no verdict
+    mismatched = _run_benchmark("--concurrency", "1", "--baseline", str(output))
+    assert mismatched.returncode == 2, mismatched.stderr
+    assert "concurrency: baseline 2, this run 1" in mismatched.stdout
+    assert "REGRESSION" not in mismatched.stdout
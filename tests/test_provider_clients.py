@@ -0,0 +1,25 @@
+import pytest
+import assemblyai as aai
+from app.services.provider_clients import ProviderClients
+from app.services.llm_service import GeminiService
+
+@pytest.fixture(autouse=True)
+def fresh_registry(monkeypatch):
+    monkeypatch.setattr(aai.settings, "api_key", aai.settings.api_key or "test-key")
+    ProviderClients.reset()
+    yield
+    ProviderClients.reset()
+
+def test_assemblyai_clients_are_reused():
+    transcriber = ProviderClients.transcriber()
+    assert ProviderClients.transcriber() is transcriber
+    assert transcriber._client is ProviderClients.assemblyai_client()
+
+    http_client = ProviderClients.assemblyai_client().http_client
+    assert http_client.headers["authorization"]
+    assert str(http_client.base_url).startswith("https://")
+
+def test_gemini_models_are_keyed_by_config():
+    model = ProviderClients.gemini_model(GeminiService.MODEL_NAME, GeminiService.GENERATION_CONFIG)
+    assert ProviderClients.gemini_model(GeminiService.MODEL_NAME, dict(GeminiService.GENERATION_CONFIG)) is model
+    assert ProviderClients.gemini_model(GeminiService.MODEL_NAME, {"temperature": 0}) is not model
@@ -0,0 +1,182 @@
+import asyncio
+import json
+import pytest
+from datetime import datetime, timedelta
+from uuid import uuid4
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.models.base import User, UserRole, PatientProfile, Appointment, Consultation, ConsultationStatus
+from app.services.queue_broker import QueueBroker, diff_snapshots
+from app.services.triage_queue import TriageQueueService
+
+def _item(consultation_id, urgency, wait=0):
+    return {"consultation_id": consultation_id, "urgency_score": urgency, "wait_time_minutes": wait}
+
+class FakeQueues:
+    def __init__(self, queue=None, failed=None):
+        self.queue = queue or []
+        self.failed = failed or []
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return {"queue": list(self.queue), "failed": list(self.failed)}
+
+async def _next(buffer, timeout=1.0):
+    return await asyncio.wait_for(buffer.get(), timeout)
+
+def test_diff_reports_inserts_reprioritizations_and_removals():
+    old = {"queue": [_item("a", 50), _item("b", 40), _item("c", 10)], "failed": []}
+    new = {"queue": [_item("d", 90), _item("c", 60), _item("a", 50, wait=3)], "failed": [{"consultation_id": "b", "wait_time": "1 min"}]}
+
+    assert diff_snapshots(old, new) == [
+        {"type": "remove", "queue": "queue", "consultation_id": "b"},
+        {"type": "insert", "queue": "queue", "position": 0, "item": _item("d", 90)},
+        {"type": "reprioritize", "queue": "queue", "position": 1, "item": _item("c", 60)},
+        {"type": "insert", "queue": "failed", "position": 0, "item": {"consultation_id": "b", "wait_time": "1 min"}},
+    ]
+    assert diff_snapshots(new, new) == []
+
+@pytest.mark.asyncio
+async def test_one_poll_fans_out_to_every_subscriber():
+    fetch = FakeQueues(queue=[_item("a", 50)])
+    broker = QueueBroker(fetch, interval=0.01, heartbeat=5, buffer_size=10)
+
+    subscribers = [await broker.subscribe() for _ in range(3)]
+    for buffer in subscribers:
+        snapshot = await _next(buffer)
+        assert (snapshot["type"], snapshot["queue"]) == ("snapshot", [_item("a", 50)])
+
+    fetch.queue = [_item("b", 90), _item("a", 50)]
+    events = [await _next(buffer) for buffer in subscribers]
+    assert all((event["type"], event["item"]["consultation_id"]) == ("insert", "b") for event in events)
+    assert len({event["id"] for event in events}) == 1
+
+    calls = fetch.calls
+    for buffer in subscribers:
+        broker.unsubscribe(buffer)
+    await asyncio.sleep(0.05)
+    assert broker._task.done()
+    assert fetch.calls <= calls + 1
+    assert broker.stats()["subscribers"] == 0
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_is_dropped_and_resyncs():
+    fetch = FakeQueues()
+    broker = QueueBroker(fetch, interval=0.01, heartbeat=5, buffer_size=2)
+    slow = await broker.subscribe()
+
+    for i in range(3):
+        fetch.queue = [_item(str(j), j) for j in range(i + 1)]
+        await asyncio.sleep(0.03)
+
+    assert await _next(slow) is None
+    assert broker.stats()["dropped_subscribers"] == 1
+    resubscribed = await broker.subscribe()
+    assert [item["consultation_id"] for item in (await _next(resubscribed))["queue"]] == ["0", "1", "2"]
+    await broker.close()
+
+@pytest.mark.asyncio
+async def test_stream_formats_server_sent_events():
+    fetch = FakeQueues(queue=[_item("a", 50)])
+    broker = QueueBroker(fetch, interval=0.01, heartbeat=0.02, buffer_size=10)
+    stream = broker.stream()
+
+    assert await stream.__anext__() == "retry: 20\n\n"
+    snapshot = await stream.__anext__()
+    assert snapshot.startswith("id: 0\nevent: snapshot\ndata: ")
+    assert json.loads(snapshot.split("data: ", 1)[1]) == {"queue": [_item("a", 50)], "failed": []}
+    assert await stream.__anext__() == ": keep-alive\n\n"
+
+    fetch.queue = []
+    assert (await stream.__anext__()).startswith("id: 1\nevent: remove\n")
+    await broker.close()
+    with pytest.raises(StopAsyncIteration):
+        await stream.__anext__()
+    assert broker.stats()["subscribers"] == 0
+
+@pytest.mark.asyncio
+async def test_snapshot_reads_both_queues(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'broker.db'}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        ids = {}
+        for status in (ConsultationStatus.COMPLETED, ConsultationStatus.FAILED):
+            user = User(email=f"{uuid4()}@test.com", password_hash="pw", role=UserRole.PATIENT)
+            session.add(user)
+            session.flush()
+            session.add(PatientProfile(user_id=user.id, first_name="Pat", last_name=status.value))
+            appointment = Appointment(patient_id=user.id, doctor_id=user.id, scheduled_at=datetime.utcnow())
+            session.add(appointment)
+            session.flush()
+            consultation = Consultation(
+                appointment_id=appointment.id, patient_id=user.id, doctor_id=user.id, status=status, urgency_score=70,
+                requires_manual_review=status == ConsultationStatus.FAILED, created_at=datetime.utcnow() - timedelta(minutes=5)
+            )
+            session.add(consultation)
+            session.flush()
+            if status == ConsultationStatus.COMPLETED:
+                TriageQueueService.enter(session, consultation)
+            ids[status] = str(consultation.id)
+        session.commit()
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'broker.db'}")
+    async with AsyncSession(async_engine) as session:
+        snapshot = await TriageQueueService.snapshot_async(session, limit=10)
+    await async_engine.dispose()
+
+    assert [(item["consultation_id"], item["wait_time_minutes"]) for item in snapshot["queue"]] == [(ids[ConsultationStatus.COMPLETED], 5)]
+    assert [(item["consultation_id"], item["wait_time"]) for item in snapshot["failed"]] == [(ids[ConsultationStatus.FAILED], "5 min")]
+
+def test_stream_requires_staff_token(client):
+    from app.core.db import engine
+    from app.core.security import create_access_token
+    with Session(engine) as session:
+        patient = User(email=f"{uuid4()}@test.com", password_hash="pw", role=UserRole.PATIENT)
+        session.add(patient)
+        session.commit()
+        token = create_access_token(patient.id, patient.role.value)
+
+    assert client.get("/api/v1/dashboard/queue/stream").status_code == 401
+    assert client.get("/api/v1/dashboard/queue/stream", headers={"Authorization": f"Bearer {token}"}).status_code == 403
+
+@pytest.mark.asyncio
+async def test_open_stream_holds_no_pooled_connection(client, monkeypatch):
+    from app.core.db import engine
+    from app.core.security import create_access_token
+    from app.main import app
+    from app.services.queue_broker import queue_broker
+    with Session(engine) as session:
+        doctor = User(email=f"{uuid4()}@test.com", password_hash="pw", role=UserRole.DOCTOR)
+        session.add(doctor)
+        session.commit()
+        token = create_access_token(doctor.id, doctor.role.value)
+    monkeypatch.setattr(queue_broker, "fetch", FakeQueues())
+
+    # Drive the ASGI app directly: TestClient buffers the whole (endless) response
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": "/api/v1/dashboard/queue/stream", "raw_path": b"/api/v1/dashboard/queue/stream", "root_path": "",
+        "query_string": b"", "headers": [(b"authorization", f"Bearer {token}".encode())],
+        "client": ("127.0.0.1", 1234), "server": ("testserver", 80),
+    }
+    disconnect = asyncio.Event()
+    snapshots = asyncio.Queue()
+
+    async def receive():
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if b"event: snapshot" in message.get("body", b""):
+            await snapshots.put(message)
+
+    checked_out = engine.pool.checkedout()
+    streams = [asyncio.create_task(app(dict(scope), receive, send)) for _ in range(3)]
+    for _ in streams:
+        await _next(snapshots, timeout=5.0)
+    assert engine.pool.checkedout() == checked_out # Auth's session is closed while the streams stay open
+
+    disconnect.set()
+    await asyncio.wait_for(asyncio.gather(*streams), 5.0)
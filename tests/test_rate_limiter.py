@@ -0,0 +1,75 @@
+import threading
+import pytest
+from sqlmodel import SQLModel, create_engine
+from app.models.base import RateLimitBucket
+from app.services.rate_limiter import MemoryBucketStore, DbBucketStore, RateLimiter, retry_after_seconds
+
+@pytest.fixture
+def db_store(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'limits.db'}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine, tables=[RateLimitBucket.__table__])
+    return DbBucketStore(engine)
+
+@pytest.mark.parametrize("store_name", ["memory", "db"])
+def test_reservations_pace_at_the_refill_rate(store_name, request):
+    store = MemoryBucketStore() if store_name == "memory" else request.getfixturevalue("db_store")
+    # 60/min = 1 token/s with a burst of 2
+    waits = [store.reserve("gemini:rpm", 2, 1.0, 1, now=100.0) for _ in range(5)]
+    assert waits == [0.0, 0.0, 1.0, 2.0, 3.0]
+    # Time passing pays back the deficit
+    assert store.reserve("gemini:rpm", 2, 1.0, 1, now=104.0) == 0.0
+
+def test_db_store_is_consistent_under_concurrent_reservations(db_store):
+    def worker():
+        for _ in range(10):
+            db_store.reserve("assemblyai:rpm", 5, 1.0, 1, now=0.0)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # 5 initial tokens minus 40 reservations, none lost to a race
+    assert db_store.reserve("assemblyai:rpm", 5, 1.0, 0, now=0.0) == 35.0
+
+@pytest.mark.asyncio
+async def test_penalize_blocks_every_caller(db_store, monkeypatch):
+    clock = {"now": 1000.0}
+    slept = []
+    async def fake_sleep(seconds):
+        slept.append(seconds)
+        clock["now"] += seconds
+    monkeypatch.setattr("app.services.rate_limiter.time.time", lambda: clock["now"])
+    monkeypatch.setattr("app.services.rate_limiter.asyncio.sleep", fake_sleep)
+
+    limiter = RateLimiter("gemini:rpm", 6000, db_store)
+    other_process = RateLimiter("gemini:rpm", 6000, db_store)
+    await limiter.acquire()
+    assert slept == []
+
+    await limiter.penalize(retry_after=30)
+    await other_process.acquire()
+    assert slept == [30.0]
+    assert limiter.stats()["penalties"] == 1
+
+@pytest.mark.parametrize("store_name", ["memory", "db"])
+def test_block_before_first_reservation_sticks(store_name, request):
+    store = MemoryBucketStore() if store_name == "memory" else request.getfixturevalue("db_store")
+    store.block("gemini:rpm", 130.0, 2, now=100.0)
+    store.block("gemini:rpm", 110.0, 2, now=100.0) # An earlier block never shortens it
+
+    assert store.blocked_until("gemini:rpm") == 130.0
+    # The bucket starts full; only the block delays the caller
+    assert store.reserve("gemini:rpm", 2, 1.0, 1, now=100.0) == 30.0
+
+def test_retry_after_parsing():
+    class Response:
+        headers = {"retry-after": "12"}
+    class HttpError(Exception):
+        response = Response()
+
+    assert retry_after_seconds(HttpError("429 Too Many Requests")) == 12.0
+    assert retry_after_seconds(Exception("429 Resource exhausted. Please retry in 7.5s.")) == 7.5
+    assert retry_after_seconds(Exception("429 quota exceeded retry_delay { seconds: 41 }")) == 41.0
+    assert retry_after_seconds(Exception("500 internal")) is None
@@ -0,0 +1,36 @@
+import asyncio
+import httpx
+from sqlmodel import Session, select, func
+from app.main import app
+from app.core.db import engine
+from app.models.base import Consultation, ConsultationStatus, SOAPNote
+from benchmarks.seed_dataset import DatasetSeeder
+from benchmarks.api_load import ENDPOINTS, mint_tokens, run
+
+def test_seeded_dataset_serves_read_path_load():
+    manifest = DatasetSeeder(engine, 300, seed=16, batch_size=64).run()
+    assert manifest["shape"] == {"consultations": 300, "doctors": 5, "patients": 60, "front_desk": 2}
+    assert manifest["rows"]["users"] == 67
+    assert manifest["rows"]["appointments"] == manifest["rows"]["consultations"] == 300
+
+    with Session(engine) as session:
+        seeded = select(Consultation).where(Consultation.doctor_id.in_(manifest["users"]["DOCTOR"]))
+        completed = session.exec(select(func.count()).select_from(
+            seeded.where(Consultation.status == ConsultationStatus.COMPLETED).subquery()
+        )).one()
+        notes = session.exec(select(func.count()).select_from(SOAPNote).join(Consultation).where(
+            Consultation.doctor_id.in_(manifest["users"]["DOCTOR"])
+        )).one()
+    assert 150 < completed < 260 # ~70%
+    assert notes == completed
+    assert manifest["rows"]["triage_queue_entries"] == completed
+
+    tokens = mint_tokens(manifest["users"])
+    results = asyncio.run(run(
+        "http://testserver", list(ENDPOINTS), tokens, concurrency=4, duration=0.3, warmup=0.0, timeout=30,
+        transport=httpx.ASGITransport(app=app)
+    ))
+    for name, result in results.items():
+        assert result["requests"] > 0, name
+        assert result["errors"] == 0, (name, result["statuses"])
+        assert result["latency"]["p95_ms"] >= result["latency"]["p50_ms"]
@@ -0,0 +1,45 @@
+import hashlib
+import io
+import os
+import pytest
+from fastapi import UploadFile
+from app.services.storage_service import StorageService, UploadTooLargeError
+
+@pytest.mark.asyncio
+async def test_streams_to_disk_with_size_and_hash(tmp_path):
+    data = os.urandom(3 * 1024 + 17)
+    upload = UploadFile(io.BytesIO(data), filename="visit.wav")
+
+    stored = await StorageService.save_upload_async(upload, str(tmp_path), ".wav", chunk_size=1024)
+
+    sha256 = hashlib.sha256(data).hexdigest()
+    assert stored["file_size"] == len(data)
+    assert stored["sha256"] == sha256
+    assert stored["path"] == os.path.join(str(tmp_path), sha256[:2], f"{sha256}.wav")
+    assert stored["deduplicated"] is False
+    with open(stored["path"], "rb") as f:
+        assert f.read() == data
+
+@pytest.mark.asyncio
+async def test_identical_content_is_stored_once(tmp_path):
+    data = b"same audio bytes"
+    first = await StorageService.save_upload_async(UploadFile(io.BytesIO(data), filename="a.wav"), str(tmp_path), ".wav")
+    second = await StorageService.save_upload_async(UploadFile(io.BytesIO(data), filename="b.wav"), str(tmp_path), ".wav")
+
+    src = tmp_path / "copy.wav"
+    src.write_bytes(data)
+    third = StorageService.store_local_file(str(src), str(tmp_path / "store"))
+
+    assert second["path"] == first["path"]
+    assert second["deduplicated"] is True
+    assert third["sha256"] == first["sha256"]
+    assert len(os.listdir(tmp_path / first["sha256"][:2])) == 1 # No leftover .part files
+
+@pytest.mark.asyncio
+async def test_rejects_oversized_upload_without_leftovers(tmp_path):
+    upload = UploadFile(io.BytesIO(b"x" * 5000), filename="big.wav")
+
+    with pytest.raises(UploadTooLargeError):
+        await StorageService.save_upload_async(upload, str(tmp_path), ".wav", max_bytes=4096, chunk_size=1024)
+
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,65 @@
+import socket
+import threading
+import time
+import assemblyai as aai
+import google.generativeai as genai
+import google.generativeai.client as genai_client
+import pytest
+import uvicorn
+from fastapi.testclient import TestClient
+from benchmarks.stub_providers import FaultConfig, create_app
+from app.services.provider_clients import ProviderClients
+from app.services.stt_service import AssemblyAIService
+from app.services.llm_service import GeminiService
+
+@pytest.fixture
+def stub_url(monkeypatch):
+    """
+    Runs the stub on a free port and points both SDKs at it.
+    """
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(create_app(FaultConfig(stt_processing_seconds=0.2, llm_latency_ms=10)), port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    url = f"http://127.0.0.1:{port}"
+    monkeypatch.setattr(aai.settings, "base_url", url)
+    monkeypatch.setattr(aai.settings, "api_key", "stub")
+    monkeypatch.setattr(aai.settings, "polling_interval", 0.05)
+    # A private client manager, so the global Gemini config is restored on teardown
+    monkeypatch.setattr(genai_client, "_client_manager", genai_client._ClientManager())
+    genai.configure(api_key="stub", transport="rest", client_options={"api_endpoint": url})
+    ProviderClients.reset()
+    yield url
+    ProviderClients.reset()
+    server.should_exit = True
+    thread.join()
+
+@pytest.mark.asyncio
+async def test_real_sdk_paths_run_against_the_stub(stub_url, tmp_path):
+    audio = tmp_path / "day4_consultation06_patient.wav"
+    audio.write_bytes(b"RIFF" + b"\0" * 1024)
+
+    transcript = await AssemblyAIService._transcribe(str(audio), redact_pii=True)
+    assert transcript["text"] and [u["speaker"] for u in transcript["utterances"]] == ["A", "B", "A"]
+
+    prompt = GeminiService.build_prompt(transcript["text"], transcript["utterances"])
+    soap = await GeminiService._generate(prompt)
+    assert set(soap["soap_note"]) == {"subjective", "objective", "assessment", "plan"}
+
+def test_fault_knobs():
+    client = TestClient(create_app(FaultConfig(burst_429_every=3, burst_429_length=2, retry_after_seconds=7, llm_latency_ms=0, malformed_json_rate=1.0)))
+    statuses = [client.post("/v1beta/models/gemini-2.5-flash:generateContent", json={"contents": [{"parts": [{"text": "hi"}]}]}) for _ in range(6)]
+
+    assert [r.status_code for r in statuses] == [200, 200, 429, 429, 200, 429]
+    assert statuses[2].headers["retry-after"] == "7.0"
+    text = statuses[0].json()["candidates"][0]["content"]["parts"][0]["text"]
+    assert text.startswith("```json") or not text.endswith("}") # Malformed either way
+    assert client.get("/_stub/stats").json()["requests"]["generateContent 429"] == 3
+
+    client.put("/_stub/faults", json={"llm_latency_ms": 0})
+    assert client.post("/v1beta/models/gemini-2.5-flash:generateContent", json={"contents": []}).status_code == 200
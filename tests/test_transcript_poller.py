@@ -0,0 +1,78 @@
+import asyncio
+import threading
+import httpx
+import pytest
+from sqlmodel import Session, SQLModel, create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.models.base import SttCallback
+import app.services.transcript_poller as poller_module
+from app.services.transcript_poller import TranscriptPoller
+
+def _mock_client(handler):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="https://api.assemblyai.test")
+    return lambda: client
+
+@pytest.mark.asyncio
+async def test_many_transcripts_share_one_polling_loop():
+    polls = {}
+
+    def handler(request):
+        transcript_id = request.url.path.rsplit("/", 1)[-1]
+        polls[transcript_id] = polls.get(transcript_id, 0) + 1
+        if polls[transcript_id] < 3:
+            return httpx.Response(200, json={"id": transcript_id, "status": "processing"})
+        if transcript_id == "t-13":
+            return httpx.Response(200, json={"id": transcript_id, "status": "error", "error": "bad audio"})
+        return httpx.Response(200, json={"id": transcript_id, "status": "completed", "text": f"text {transcript_id}", "utterances": []})
+
+    poller = TranscriptPoller(0.01, 0.05, timeout=10, use_callbacks=False)
+    poller._client = _mock_client(handler)
+    threads_before = threading.active_count()
+
+    results = await asyncio.gather(*(poller.wait(f"t-{i}") for i in range(100)), return_exceptions=True)
+
+    assert threading.active_count() == threads_before # No thread per transcript
+    assert isinstance(results[13], Exception) and "bad audio" in str(results[13])
+    assert [r["text"] for i, r in enumerate(results) if i != 13] == [f"text t-{i}" for i in range(100) if i != 13]
+    assert all(count == 3 for count in polls.values()) # Polled until done, never after
+    assert poller.stats() == {"in_flight": 0, "polls": 300, "completed": 99, "failed": 1, "webhook_callbacks": 0}
+
+@pytest.mark.asyncio
+async def test_webhook_callback_short_circuits_the_fallback_interval(tmp_path, monkeypatch):
+    sync_engine = create_engine(f"sqlite:///{tmp_path / 'stt.db'}")
+    SQLModel.metadata.create_all(sync_engine, tables=[SttCallback.__table__])
+    monkeypatch.setattr(poller_module, "async_engine", create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'stt.db'}"))
+
+    completed = set()
+    def handler(request):
+        transcript_id = request.url.path.rsplit("/", 1)[-1]
+        status = "completed" if transcript_id in completed else "processing"
+        return httpx.Response(200, json={"id": transcript_id, "status": status, "text": "done"})
+
+    # Fallback polling every 60s; only the callback can finish this in time
+    poller = TranscriptPoller(0.02, 60, timeout=120, use_callbacks=True)
+    poller._client = _mock_client(handler)
+    waiter = asyncio.create_task(poller.wait("t-webhook"))
+    await asyncio.sleep(0.05)
+
+    completed.add("t-webhook")
+    with Session(sync_engine) as session: # As recorded by POST /api/v1/webhooks/assemblyai
+        session.add(SttCallback(transcript_id="t-webhook", status="completed"))
+        session.commit()
+
+    result = await asyncio.wait_for(waiter, timeout=2)
+    assert result["text"] == "done"
+    assert poller.stats()["webhook_callbacks"] == 1
+    with Session(sync_engine) as session:
+        assert session.get(SttCallback, "t-webhook") is None
+
+def test_webhook_is_refused_without_a_configured_secret(client, monkeypatch):
+    from app.core.config import settings
+    payload = {"transcript_id": "t-forged", "status": "completed"}
+
+    monkeypatch.setattr(settings, "STT_WEBHOOK_SECRET", None)
+    assert client.post("/api/v1/webhooks/assemblyai", json=payload).status_code == 404
+
+    monkeypatch.setattr(settings, "STT_WEBHOOK_SECRET", "s3cret")
+    assert client.post("/api/v1/webhooks/assemblyai", json=payload, headers={"X-Webhook-Secret": "wrong"}).status_code == 401
+    assert client.post("/api/v1/webhooks/assemblyai", json=payload, headers={"X-Webhook-Secret": "s3cret"}).status_code == 204
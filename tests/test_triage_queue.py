@@ -0,0 +1,201 @@
+import json
+import pytest
+from datetime import datetime, timedelta
+from uuid import uuid4
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine
+from fastapi import HTTPException
+from app.models.base import User, UserRole, PatientProfile, Appointment, Consultation, ConsultationStatus, TriageCategory, TriageQueueEntry, AudioFile, AudioUploaderType
+from app.api.v1.dashboard import QueueFilters, ReprocessRequest, get_patient_queue, get_failed_queue, reprocess_failed_queue
+from app.services.job_queue import JobQueueService
+from app.services.triage_queue import TriageQueueService, dashboard_cache
+
+@pytest.fixture(autouse=True)
+def _fresh_dashboard_cache():
+    dashboard_cache.invalidate()
+    yield
+    dashboard_cache.invalidate()
+
+def _engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'queue.db'}")
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+def _consultation(session, urgency, minutes_ago, status=ConsultationStatus.COMPLETED, warnings=None, category=TriageCategory.LOW):
+    user = User(email=f"{uuid4()}@test.com", password_hash="pw", role=UserRole.PATIENT)
+    session.add(user)
+    session.flush()
+    session.add(PatientProfile(user_id=user.id, first_name="Pat", last_name=f"U{urgency}"))
+    appointment = Appointment(patient_id=user.id, doctor_id=user.id, scheduled_at=datetime.utcnow())
+    session.add(appointment)
+    session.flush()
+    consultation = Consultation(
+        appointment_id=appointment.id, patient_id=user.id, doctor_id=user.id, status=status,
+        urgency_score=urgency, triage_category=category, safety_warnings=warnings,
+        created_at=datetime.utcnow() - timedelta(minutes=minutes_ago)
+    )
+    session.add(consultation)
+    session.flush()
+    return consultation
+
+def _filters(**kwargs):
+    return QueueFilters(**{"doctor_id": None, "triage_category": None, "limit": 50, "offset": 0, **kwargs})
+
+async def _get(tmp_path, endpoint, if_none_match=None, **filters):
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'queue.db'}")
+    async with AsyncSession(async_engine) as session:
+        response = await endpoint(filters=_filters(**filters), if_none_match=if_none_match, session=session)
+    await async_engine.dispose()
+    return response
+
+async def _items(tmp_path, endpoint, **filters):
+    return json.loads((await _get(tmp_path, endpoint, **filters)).body)
+
+@pytest.mark.asyncio
+async def test_queue_endpoint_returns_top_k_in_priority_order(tmp_path):
+    engine = _engine(tmp_path)
+    with Session(engine) as session:
+        for urgency, minutes_ago in [(40, 5), (90, 1), (40, 30), (10, 60)]:
+            TriageQueueService.enter(session, _consultation(session, urgency, minutes_ago, warnings=[{"drug": "A"}]))
+        _consultation(session, 99, 1, status=ConsultationStatus.FAILED) # Never queued
+        session.commit()
+
+    queue = await _items(tmp_path, get_patient_queue, limit=3)
+    second_page = await _items(tmp_path, get_patient_queue, limit=3, offset=3)
+
+    assert [(item["urgency_score"], item["wait_time_minutes"]) for item in queue] == [(90, 1), (40, 30), (40, 5)]
+    assert queue[0]["patient_name"] == "Pat U90"
+    assert queue[0]["safety_warnings"] == 1
+    assert [(item["urgency_score"], item["wait_time_minutes"]) for item in second_page] == [(10, 60)]
+
+@pytest.mark.asyncio
+async def test_queues_filter_by_doctor_and_category(tmp_path):
+    engine = _engine(tmp_path)
+    with Session(engine) as session:
+        mine = _consultation(session, 80, 10, category=TriageCategory.HIGH)
+        TriageQueueService.enter(session, mine)
+        TriageQueueService.enter(session, _consultation(session, 85, 10, category=TriageCategory.CRITICAL))
+        failed = _consultation(session, 0, 7, status=ConsultationStatus.FAILED)
+        failed.requires_manual_review = True
+        other_failed = _consultation(session, 0, 3, status=ConsultationStatus.FAILED)
+        other_failed.requires_manual_review = True
+        session.commit()
+        mine_doctor, failed_doctor = mine.doctor_id, failed.doctor_id
+        mine_id, failed_id, other_failed_id = str(mine.id), str(failed.id), str(other_failed.id)
+
+    by_doctor = await _items(tmp_path, get_patient_queue, doctor_id=mine_doctor)
+    by_category = await _items(tmp_path, get_patient_queue, triage_category=TriageCategory.CRITICAL)
+    failed_queue = await _items(tmp_path, get_failed_queue)
+    failed_for_doctor = await _items(tmp_path, get_failed_queue, doctor_id=failed_doctor)
+
+    assert [item["consultation_id"] for item in by_doctor] == [mine_id]
+    assert [item["urgency_score"] for item in by_category] == [85]
+    assert [(item["consultation_id"], item["wait_time"]) for item in failed_queue] == [(other_failed_id, "3 min"), (failed_id, "7 min")]
+    assert [item["consultation_id"] for item in failed_for_doctor] == [failed_id]
+
+@pytest.mark.asyncio
+async def test_queue_revalidates_with_etag_until_the_queue_changes(tmp_path):
+    engine = _engine(tmp_path)
+    with Session(engine) as session:
+        TriageQueueService.enter(session, _consultation(session, 40, 5))
+        session.commit()
+
+    first = await _get(tmp_path, get_patient_queue)
+    etag = first.headers["etag"]
+    assert first.status_code == 200
+    assert (await _get(tmp_path, get_patient_queue, if_none_match=etag)).status_code == 304
+    assert (await _get(tmp_path, get_patient_queue, if_none_match=f"W/{etag}")).status_code == 304
+
+    with Session(engine) as session:
+        TriageQueueService.enter(session, _consultation(session, 90, 1)) # Invalidates the cache
+        session.commit()
+
+    changed = await _get(tmp_path, get_patient_queue, if_none_match=etag)
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert [item["urgency_score"] for item in json.loads(changed.body)] == [90, 40]
+
+@pytest.mark.asyncio
+async def test_cache_is_invalidated_when_the_change_commits(tmp_path):
+    engine = _engine(tmp_path)
+    with Session(engine) as session:
+        TriageQueueService.enter(session, _consultation(session, 40, 5))
+        session.commit()
+    await _items(tmp_path, get_patient_queue)
+
+    with Session(engine) as session:
+        TriageQueueService.enter(session, _consultation(session, 90, 1))
+        session.flush()
+        invalidations = dashboard_cache.invalidations
+        # A read before the commit still sees (and may cache) the old queue...
+        assert [item["urgency_score"] for item in await _items(tmp_path, get_patient_queue)] == [40]
+        assert dashboard_cache.invalidations == invalidations
+        session.commit()
+    # ...and the commit drops it
+    assert dashboard_cache.invalidations == invalidations + 1
+    assert [item["urgency_score"] for item in await _items(tmp_path, get_patient_queue)] == [90, 40]
+
+    with Session(engine) as session:
+        TriageQueueService.enter(session, _consultation(session, 10, 1))
+        session.rollback()
+    assert dashboard_cache.invalidations == invalidations + 1
+
+@pytest.mark.asyncio
+async def test_reprocessing_empties_the_failed_queue(tmp_path):
+    engine = _engine(tmp_path)
+    with Session(engine) as session:
+        failed = _consultation(session, 0, 7, status=ConsultationStatus.FAILED)
+        failed.requires_manual_review = True
+        session.add(AudioFile(consultation_id=failed.id, uploaded_by=AudioUploaderType.PATIENT, file_name="a.wav", file_url="uploads/a.wav"))
+        session.commit()
+        failed_id = failed.id
+    assert [item["consultation_id"] for item in await _items(tmp_path, get_failed_queue)] == [str(failed_id)]
+
+    with Session(engine) as session:
+        with pytest.raises(HTTPException):
+            reprocess_failed_queue(ReprocessRequest(), session=session, current_user=None)
+        result = reprocess_failed_queue(ReprocessRequest(all=True), session=session, current_user=None)
+
+    assert [job["consultation_id"] for job in result["jobs"]] == [failed_id]
+    assert await _items(tmp_path, get_failed_queue) == []
+
+def test_leaving_completed_removes_entry(tmp_path):
+    engine = _engine(tmp_path)
+    with Session(engine) as session:
+        consultation = _consultation(session, 50, 1)
+        TriageQueueService.enter(session, consultation)
+        job = JobQueueService.enqueue(session, consultation.id)
+        session.commit()
+
+        JobQueueService._flag_for_review(session, job.consultation_id)
+        session.commit()
+
+        assert session.get(Consultation, consultation.id).status == ConsultationStatus.FAILED
+        assert session.get(TriageQueueEntry, consultation.id) is None
+
+def test_enter_and_leave_tolerate_ordering_slips(tmp_path):
+    engine = _engine(tmp_path)
+    with Session(engine) as session:
+        consultation = _consultation(session, 50, 1)
+        TriageQueueService.enter(session, consultation)
+        consultation.urgency_score = 60
+        TriageQueueService.enter(session, consultation) # Replaces, no unique-key failure
+        session.commit()
+        assert session.exec(select(TriageQueueEntry.urgency_score)).all() == [60]
+
+        consultation.status = ConsultationStatus.IN_PROGRESS # Status changed before leaving
+        TriageQueueService.leave(session, consultation)
+        session.commit()
+        assert session.exec(select(TriageQueueEntry)).all() == []
+
+def test_rebuild_fills_projection_from_completed_consultations(tmp_path):
+    engine = _engine(tmp_path)
+    with Session(engine) as session:
+        completed = [_consultation(session, urgency, 1) for urgency in (20, 70)]
+        _consultation(session, 80, 1, status=ConsultationStatus.IN_PROGRESS)
+        session.commit()
+
+        assert TriageQueueService.rebuild(session, batch_size=1) == 2
+        entries = session.exec(select(TriageQueueEntry)).all()
+        assert {entry.consultation_id for entry in entries} == {c.id for c in completed}